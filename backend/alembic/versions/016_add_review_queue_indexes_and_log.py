@@ -0,0 +1,34 @@
+"""Add flashcard_review_logs and the review queue index on flashcards.
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flashcard_review_logs",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.String(36), nullable=False),
+        sa.Column("card_id", sa.Integer, sa.ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("rating", sa.Integer, nullable=False),
+        sa.Column("state", sa.String(16), nullable=False),
+        sa.Column("reviewed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_ms", sa.Integer, nullable=True),
+    )
+    op.create_index("ix_flashcard_review_logs_user_reviewed", "flashcard_review_logs", ["user_id", "reviewed_at"])
+    op.create_index("ix_flashcards_user_state_due", "flashcards", ["user_id", "state", "next_review"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flashcards_user_state_due", table_name="flashcards")
+    op.drop_index("ix_flashcard_review_logs_user_reviewed", table_name="flashcard_review_logs")
+    op.drop_table("flashcard_review_logs")
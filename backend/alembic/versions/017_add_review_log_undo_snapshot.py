@@ -0,0 +1,23 @@
+"""Add session_id and the pre-review snapshot to flashcard_review_logs.
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("flashcard_review_logs", sa.Column("session_id", sa.String(64), nullable=True))
+    op.add_column("flashcard_review_logs", sa.Column("snapshot", sa.JSON, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("flashcard_review_logs", "snapshot")
+    op.drop_column("flashcard_review_logs", "session_id")
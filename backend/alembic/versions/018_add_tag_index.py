@@ -0,0 +1,74 @@
+"""Add flashcard_tags and note_tags, backfilled from the tags strings.
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "018"
+down_revision = "017"
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+
+def _parse(value):
+    seen = {}
+    for part in (value or "").split(","):
+        tag = part.strip()[:100]
+        if tag:
+            seen.setdefault(tag)
+    return list(seen)
+
+
+def _backfill(bind, items: str, tags: str, item_column: str) -> None:
+    item_table = sa.table(items, sa.column("id"), sa.column("user_id"), sa.column("tags"))
+    tag_table = sa.table(tags, sa.column(item_column), sa.column("tag"), sa.column("user_id"))
+    rows = bind.execute(
+        sa.select(item_table.c.id, item_table.c.user_id, item_table.c.tags).where(item_table.c.tags.isnot(None))
+    ).all()
+    for start in range(0, len(rows), BATCH):
+        batch = rows[start:start + BATCH]
+        tag_rows = [
+            {item_column: item_id, "tag": tag, "user_id": user_id}
+            for item_id, user_id, value in batch
+            for tag in _parse(value)
+        ]
+        if tag_rows:
+            bind.execute(tag_table.insert(), tag_rows)
+        # Store the canonical "a, b" form the API now writes.
+        bind.execute(
+            item_table.update().where(item_table.c.id == sa.bindparam("item_id")).values(tags=sa.bindparam("canonical")),
+            [{"item_id": item_id, "canonical": ", ".join(_parse(value)) or None} for item_id, _, value in batch],
+        )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flashcard_tags",
+        sa.Column("card_id", sa.Integer, sa.ForeignKey("flashcards.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("tag", sa.String(100), primary_key=True),
+        sa.Column("user_id", sa.String(36), nullable=False),
+    )
+    op.create_index("ix_flashcard_tags_user_tag", "flashcard_tags", ["user_id", "tag", "card_id"])
+    op.create_table(
+        "note_tags",
+        sa.Column("note_id", sa.Integer, sa.ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("tag", sa.String(100), primary_key=True),
+        sa.Column("user_id", sa.String(36), nullable=False),
+    )
+    op.create_index("ix_note_tags_user_tag", "note_tags", ["user_id", "tag", "note_id"])
+
+    bind = op.get_bind()
+    _backfill(bind, "flashcards", "flashcard_tags", "card_id")
+    _backfill(bind, "notes", "note_tags", "note_id")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_note_tags_user_tag", table_name="note_tags")
+    op.drop_table("note_tags")
+    op.drop_index("ix_flashcard_tags_user_tag", table_name="flashcard_tags")
+    op.drop_table("flashcard_tags")
@@ -0,0 +1,22 @@
+"""Index flashcard_review_logs on (user_id, session_id, id) for undo.
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "019"
+down_revision = "018"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_flashcard_review_logs_user_session", "flashcard_review_logs", ["user_id", "session_id", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flashcard_review_logs_user_session", table_name="flashcard_review_logs")
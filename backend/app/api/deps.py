@@ -1,12 +1,16 @@
 """Shared FastAPI dependencies."""
-from typing import Callable, Optional
+import logging
+from typing import AsyncGenerator, Callable, Generator, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.db import get_db
+from app.db import get_async_db, get_db
+from app.db.replicas import get_replica_router
 from app.models import User
 from app.services.auth import (
     decode_token,
@@ -14,6 +18,9 @@ from app.services.auth import (
     verify_supabase_token,
 )
 from app.services.plans import get_plan_limits, is_pro, PLAN_PRO
+from app.services.token_cache import get_user_cache
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
@@ -23,15 +30,26 @@ def _resolve_token(token: str, db: Session) -> Optional[User]:
     settings = get_settings()
 
     if settings.SUPABASE_JWT_SECRET or settings.SUPABASE_URL:
+        cache = get_user_cache()
+        cached_id = cache.get(token)
+        if cached_id:
+            # Primary-key read only: no decode, no profile sync, always-fresh plan.
+            user = db.get(User, cached_id)
+            if user:
+                return user
+            cache.invalidate(token)
+
         payload = verify_supabase_token(token)
         if payload:
-            return get_or_create_user_from_supabase(
+            user = get_or_create_user_from_supabase(
                 db,
                 supabase_id=payload["sub"],
                 email=payload["email"],
                 name=payload.get("full_name"),
                 avatar_url=payload.get("avatar_url"),
             )
+            cache.put(token, user.id, payload.get("exp"))
+            return user
 
     user_id = decode_token(token)
     if user_id:
@@ -58,6 +76,7 @@ def get_current_user(
     if credentials:
         user = _resolve_token(credentials.credentials, db)
         if user:
+            db.info["user_id"] = user.id  # commits of this session pin the user to the primary
             return user
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,7 +86,9 @@ def get_current_user(
     settings = get_settings()
     if settings.ENVIRONMENT == "development":
         from app.services.auth import get_or_create_demo_user
-        return get_or_create_demo_user(db)
+        user = get_or_create_demo_user(db)
+        db.info["user_id"] = user.id
+        return user
 
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -84,3 +105,84 @@ def require_pro(current_user: User = Depends(get_current_user)) -> User:
             headers={"X-Upgrade-Required": "true"},
         )
     return current_user
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Dependency that restricts a route to ADMIN_EMAILS."""
+    admins = {e.lower() for e in get_settings().ADMIN_EMAILS}
+    if (current_user.email or "").lower() not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
+
+
+# ── Read-only sessions (replica when DATABASE_REPLICA_URLS is set) ──
+
+def _replica_or(primary: Session, user_id: Optional[str]) -> Generator[Session, None, None]:
+    router = get_replica_router()
+    replica = router.session(user_id) if router else None
+    if replica is not None:
+        try:
+            replica.connection()  # connect up front so an unreachable replica falls back to the primary
+        except DBAPIError:
+            logger.warning("Replica connect failed; reading from the primary", exc_info=True)
+            replica.close()
+            router.mark_failed(replica)
+            replica = None
+    if replica is None:
+        yield primary
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def _async_replica_or(primary: AsyncSession, user_id: Optional[str]) -> AsyncGenerator[AsyncSession, None]:
+    router = get_replica_router()
+    replica = router.async_session(user_id) if router else None
+    if replica is not None:
+        try:
+            await replica.connection()
+        except DBAPIError:
+            logger.warning("Replica connect failed; reading from the primary", exc_info=True)
+            await replica.close()
+            router.mark_failed(replica)
+            replica = None
+    if replica is None:
+        yield primary
+        return
+    try:
+        yield replica
+    finally:
+        await replica.close()
+
+
+def get_read_db(db: Session = Depends(get_db)) -> Generator[Session, None, None]:
+    """Session for catalog reads; a replica when one is healthy."""
+    yield from _replica_or(db, None)
+
+
+def get_user_read_db(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Generator[Session, None, None]:
+    """Session for the current user's analytics; the primary if they wrote recently."""
+    yield from _replica_or(db, current_user.id)
+
+
+async def get_async_read_db(db: AsyncSession = Depends(get_async_db)) -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of get_read_db."""
+    async for session in _async_replica_or(db, None):
+        yield session
+
+
+async def get_user_async_read_db(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of get_user_read_db."""
+    async for session in _async_replica_or(db, current_user.id):
+        yield session
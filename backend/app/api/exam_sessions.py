@@ -3,25 +3,108 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func as sqlfunc, insert, literal, select, update
 from sqlalchemy.orm import Session, selectinload
 
 from app.api.deps import get_current_user
 from app.db import get_db
-from app.models import User
+from app.db.sqlite import run_write
+from app.models import Question, User, UserProgress
 from app.models.exam_session import ExamSession, ExamSessionAnswer
 from app.schemas.exam_session import (
     ExamSessionAnswerBatchUpdate,
     ExamSessionAnswerResponse,
     ExamSessionAnswerUpdate,
+    ExamSessionComplete,
     ExamSessionCreate,
     ExamSessionDetailResponse,
     ExamSessionResponse,
     ExamSessionUpdate,
 )
+from app.services.answer_buffer import SessionClosedError, get_answer_buffer
+from app.services.plans import count_today_progress, get_plan_limits
 
 router = APIRouter()
 
 
+def _bulk_insert_answers(db: Session, session_id: int, question_ids: list[str]) -> None:
+    """Insert one answer row per question in a single multi-row INSERT."""
+    db.execute(
+        insert(ExamSessionAnswer),
+        [
+            {"session_id": session_id, "question_id": qid, "order_index": idx}
+            for idx, qid in enumerate(question_ids)
+        ],
+    )
+
+
+def _claim_session(db: Session, session_id: int) -> bool:
+    """Mark the session completed unless another request already did; True if this call won."""
+    claimed = db.execute(
+        update(ExamSession)
+        .where(ExamSession.id == session_id, ExamSession.completed_at.is_(None))
+        .values(status="completed", completed_at=datetime.now(timezone.utc))
+    )
+    return claimed.rowcount == 1
+
+
+def _score_session(db: Session, session_id: int, user_id: str, plan: str, record_progress: bool) -> None:
+    """Claim the session, then set counts and accuracy from the stored answers (caller commits).
+
+    Does nothing when the session was already completed, so two concurrent
+    completions score (and record progress) only once.
+    """
+    if not _claim_session(db, session_id):
+        return
+    session = db.get(ExamSession, session_id)
+    totals = (
+        db.query(
+            sqlfunc.sum(case((ExamSessionAnswer.correct == True, 1), else_=0)).label("correct"),  # noqa: E712
+            sqlfunc.sum(case((ExamSessionAnswer.correct == False, 1), else_=0)).label("incorrect"),  # noqa: E712
+        )
+        .filter(ExamSessionAnswer.session_id == session_id)
+        .one()
+    )
+    correct = int(totals.correct or 0)
+    incorrect = int(totals.incorrect or 0)
+    total = session.total_questions
+
+    if record_progress:
+        answered = correct + incorrect
+        limits = get_plan_limits(plan)
+        if answered and count_today_progress(user_id, db) + answered > limits.daily_questions:
+            raise HTTPException(
+                status_code=429,
+                detail="Daily question limit reached",
+                headers={"X-Upgrade-Required": "true"},
+            )
+        answered_rows = (
+            select(
+                literal(user_id),
+                ExamSessionAnswer.question_id,
+                Question.section,
+                ExamSessionAnswer.correct,
+                ExamSessionAnswer.answer_selected,
+            )
+            .join(Question, Question.id == ExamSessionAnswer.question_id)
+            .where(
+                ExamSessionAnswer.session_id == session_id,
+                ExamSessionAnswer.correct.isnot(None),
+            )
+        )
+        db.execute(
+            insert(UserProgress).from_select(
+                ["user_id", "question_id", "section", "correct", "answer_selected"],
+                answered_rows,
+            )
+        )
+
+    session.correct_count = correct
+    session.incorrect_count = incorrect
+    session.unanswered_count = max(0, total - correct - incorrect)
+    session.accuracy = (correct / total) * 100 if total > 0 else 0
+
+
 @router.get("", response_model=list[ExamSessionResponse])
 def list_sessions(
     status_filter: Optional[str] = None,
@@ -45,22 +128,23 @@ def create_session(
     if not body.question_ids:
         raise HTTPException(status_code=400, detail="question_ids must not be empty")
 
-    session = ExamSession(
-        user_id=user.id,
-        mode=body.mode,
-        total_questions=len(body.question_ids),
-        subjects=body.subjects,
-        status="in_progress",
-    )
-    db.add(session)
-    db.flush()
+    user_id = user.id
 
-    for idx, qid in enumerate(body.question_ids):
-        db.add(ExamSessionAnswer(session_id=session.id, question_id=qid, order_index=idx))
+    def _create(w: Session) -> int:
+        session = ExamSession(
+            user_id=user_id,
+            mode=body.mode,
+            total_questions=len(body.question_ids),
+            subjects=body.subjects,
+            status="in_progress",
+        )
+        w.add(session)
+        w.flush()
+        _bulk_insert_answers(w, session.id, body.question_ids)
+        return session.id
 
-    db.commit()
-    db.refresh(session)
-    return session
+    session_id = run_write(db, _create)
+    return db.get(ExamSession, session_id)
 
 
 @router.get("/{session_id}", response_model=ExamSessionDetailResponse)
@@ -69,15 +153,20 @@ def get_session(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    session = (
+    owned = db.query(ExamSession.id).filter(
+        ExamSession.id == session_id, ExamSession.user_id == user.id
+    ).first()
+    if not owned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    buffer = get_answer_buffer()
+    if buffer:
+        buffer.flush(db, session_id)
+    return (
         db.query(ExamSession)
         .options(selectinload(ExamSession.answers))
-        .filter(ExamSession.id == session_id, ExamSession.user_id == user.id)
-        .first()
+        .filter(ExamSession.id == session_id)
+        .one()
     )
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    return session
 
 
 @router.patch("/{session_id}", response_model=ExamSessionResponse)
@@ -93,13 +182,68 @@ def update_session(
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
 
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(session, field, value)
+    buffer = get_answer_buffer()
+    completing = body.status == "completed"
+    if buffer:
+        if completing:
+            buffer.close(db, session_id, user.id)
+        else:
+            buffer.flush(db, session_id)
 
-    if body.status == "completed" and not session.completed_at:
-        session.completed_at = datetime.now(timezone.utc)
+    try:
+        for field, value in body.model_dump(exclude_unset=True).items():
+            setattr(session, field, value)
 
-    db.commit()
+        if completing and not session.completed_at:
+            session.completed_at = datetime.now(timezone.utc)
+
+        db.commit()
+    except Exception:
+        if buffer and completing:
+            buffer.reopen(session_id)
+        raise
+    if buffer and completing:
+        buffer.discard(session_id)
+    db.refresh(session)
+    return session
+
+
+@router.post("/{session_id}/complete", response_model=ExamSessionResponse)
+def complete_session(
+    session_id: int,
+    body: Optional[ExamSessionComplete] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Score a session server-side from its stored answers and mark it completed.
+
+    Counts come from a single aggregate over exam_session_answers. With
+    record_progress=true, one user_progress row per answered question is
+    written with a single INSERT ... SELECT. The session is claimed with a
+    conditional UPDATE (completed_at IS NULL) before scoring, so retries and
+    concurrent completions return it unchanged and never record progress twice.
+    """
+    session = db.query(ExamSession).filter(
+        ExamSession.id == session_id, ExamSession.user_id == user.id
+    ).first()
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    if session.status == "completed":
+        return session
+
+    buffer = get_answer_buffer()
+    if buffer:
+        buffer.close(db, session_id, user.id)
+    user_id, plan = user.id, user.plan
+    record_progress = bool(body and body.record_progress)
+    try:
+        run_write(db, lambda w: _score_session(w, session_id, user_id, plan, record_progress))
+    except Exception:
+        if buffer:
+            buffer.reopen(session_id)
+        raise
+    if buffer:
+        buffer.discard(session_id)
     db.refresh(session)
     return session
 
@@ -111,6 +255,19 @@ def batch_update_answers(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    buffer = get_answer_buffer()
+    if buffer:
+        try:
+            rows = buffer.apply(db, session_id, user.id, [
+                (item.question_id, item.model_dump(exclude_unset=True, exclude={"question_id"}))
+                for item in body.answers
+            ])
+        except SessionClosedError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session already completed")
+        if rows is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+        return rows
+
     session = db.query(ExamSession).filter(
         ExamSession.id == session_id, ExamSession.user_id == user.id
     ).first()
@@ -124,18 +281,17 @@ def batch_update_answers(
         ).all()
     }
 
-    updated: list[ExamSessionAnswer] = []
+    updated: list[ExamSessionAnswerResponse] = []
     for item in body.answers:
         answer = qid_map.get(item.question_id)
         if not answer:
             continue
         for field, value in item.model_dump(exclude_unset=True, exclude={"question_id"}).items():
             setattr(answer, field, value)
-        updated.append(answer)
+        # Serialize before commit so expired attributes are not re-read row by row.
+        updated.append(ExamSessionAnswerResponse.model_validate(answer))
 
     db.commit()
-    for a in updated:
-        db.refresh(a)
     return updated
 
 
@@ -150,6 +306,18 @@ def update_answer(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    buffer = get_answer_buffer()
+    if buffer:
+        try:
+            rows = buffer.apply(db, session_id, user.id, [(question_id, body.model_dump(exclude_unset=True))])
+        except SessionClosedError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session already completed")
+        if rows is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Answer not found")
+        return rows[0]
+
     session = db.query(ExamSession).filter(
         ExamSession.id == session_id, ExamSession.user_id == user.id
     ).first()
@@ -166,9 +334,9 @@ def update_answer(
     for field, value in body.model_dump(exclude_unset=True).items():
         setattr(answer, field, value)
 
+    result = ExamSessionAnswerResponse.model_validate(answer)
     db.commit()
-    db.refresh(answer)
-    return answer
+    return result
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -182,5 +350,8 @@ def delete_session(
     ).first()
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    buffer = get_answer_buffer()
+    if buffer:
+        buffer.discard(session_id)
     db.delete(session)
     db.commit()
@@ -3,10 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
+from app.api.responses import json_bytes_response
 from app.db import get_db
 from app.models import User
 from app.schemas.exam import ExamGenerateRequest, ExamGenerateResponse
-from app.schemas.question import QuestionResponse
 from app.services.exam import generate_exam
 from app.services.plans import get_plan_limits
 
@@ -36,7 +36,4 @@ def generate(
         body.mode,
         body.count,
     )
-    return ExamGenerateResponse(
-        questions=[QuestionResponse.model_validate(q) for q in questions],
-        total=len(questions),
-    )
+    return json_bytes_response(ExamGenerateResponse, {"questions": questions, "total": len(questions)})
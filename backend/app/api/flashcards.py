@@ -1,42 +1,76 @@
 """API routes for flashcards and decks."""
+import os
+import random
 from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy import distinct, func as sa_func
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy import and_, case, distinct, delete, func as sa_func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from app.api.deps import get_current_user
-from app.db import get_db
+from app.api.deps import get_current_user, get_user_read_db
+from app.api.responses import json_bytes_response
+from app.config import get_settings as get_app_settings
+from app.db import get_async_db, get_db
 from app.models import User
 from app.models.flashcard import Flashcard, FlashcardDeck
+from app.models.flashcard_review_log import FlashcardReviewLog
 from app.models.flashcard_settings import FlashcardSettings
 from app.models.exam_session import ExamSession, ExamSessionAnswer
 from app.models.question import Question
 from app.models.user_progress import UserProgress
 from app.services.plans import count_deck_cards, count_user_decks, get_plan_limits
 from app.schemas.flashcard import (
+    FlashcardBulkOperation,
+    FlashcardBulkResponse,
     FlashcardCreate,
     FlashcardDeckCreate,
     FlashcardDeckResponse,
     FlashcardDeckUpdate,
     FlashcardResponse,
     FlashcardReview,
+    FlashcardReviewBatch,
+    FlashcardReviewBatchResponse,
     FlashcardReviewResponse,
     FlashcardStatsDayHistory,
     FlashcardStatsResponse,
     FlashcardUpdate,
+    ForecastResponse,
     GenerationQuestionItem,
     GenerationQuestionsRequest,
     GenerationQuestionsResponse,
     GenerationSessionSource,
     GenerationSourcesResponse,
     IntervalPreview,
+    ReviewQueuePage,
+    ReviewQueueResponse,
     ScheduleInfo,
 )
 from app.schemas.flashcard_settings import FlashcardSettingsResponse, FlashcardSettingsUpdate
+from app.schemas.tag import TagCount
+from app.services.apkg_export import export_deck, export_filename
 from app.services.apkg_parser import parse_apkg
-from app.services.fsrs import CardState, preview_intervals
-from app.services.fsrs import review as fsrs_review
+from app.services.card_bulk import apply_bulk_operation, move_counts
+from app.services.due_histogram import DueHistogram, get_due_histograms
+from app.services.forecast import CardArrays, get_forecast_jobs, simulate
+from app.services.fsrs import STATE_NEW, CardState, ReviewResult, Scheduler
+from app.services.scheduler_config import get_scheduler_configs
+from app.services.tags import CARD_TAGS
+from app.services.review_undo import UndoEntry, get_undo_buffer, restore_fields, snapshot
+from app.services.review_queue import (
+    InvalidCursor,
+    ReviewOrder,
+    build_queue,
+    build_queue_async,
+    decode_cursor,
+    fetch_cards,
+    fetch_cards_async,
+    paginate,
+)
 
 router = APIRouter()
 
@@ -50,22 +84,38 @@ def list_decks(
 ):
     decks = db.query(FlashcardDeck).filter(FlashcardDeck.user_id == user.id).order_by(FlashcardDeck.updated_at.desc()).all()
     now = datetime.now(timezone.utc)
+    # One grouped aggregate for every deck instead of loading each deck's cards.
+    count_rows = (
+        db.query(
+            Flashcard.deck_id,
+            sa_func.sum(case((Flashcard.state == "new", 1), else_=0)).label("new_count"),
+            sa_func.sum(case((Flashcard.state == "learning", 1), else_=0)).label("learning_count"),
+            sa_func.sum(case(
+                (and_(
+                    Flashcard.state != "new",
+                    Flashcard.next_review.isnot(None),
+                    Flashcard.next_review <= now,
+                ), 1),
+                else_=0,
+            )).label("due_count"),
+        )
+        .filter(
+            Flashcard.user_id == user.id,
+            Flashcard.suspended == False,  # noqa: E712
+            Flashcard.buried == False,  # noqa: E712
+        )
+        .group_by(Flashcard.deck_id)
+        .all()
+    )
+    counts = {row.deck_id: row for row in count_rows}
     result = []
     for deck in decks:
-        cards = db.query(Flashcard).filter(Flashcard.deck_id == deck.id, Flashcard.user_id == user.id).all()
-        new_count = sum(1 for c in cards if c.state == "new" and not c.suspended and not c.buried)
-        learning_count = sum(1 for c in cards if c.state == "learning" and not c.suspended and not c.buried)
-        due_count = sum(
-            1 for c in cards
-            if not c.suspended and not c.buried
-            and c.state not in ("new",)
-            and c.next_review is not None
-            and c.next_review <= now
-        )
         d = FlashcardDeckResponse.model_validate(deck)
-        d.new_count = new_count
-        d.learning_count = learning_count
-        d.due_count = due_count
+        row = counts.get(deck.id)
+        if row:
+            d.new_count = int(row.new_count or 0)
+            d.learning_count = int(row.learning_count or 0)
+            d.due_count = int(row.due_count or 0)
         result.append(d)
     return result
 
@@ -118,22 +168,62 @@ def delete_deck(
     deck = db.query(FlashcardDeck).filter(FlashcardDeck.id == deck_id, FlashcardDeck.user_id == user.id).first()
     if not deck:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    CARD_TAGS.discard(db, user.id, None, select(Flashcard.id).where(Flashcard.deck_id == deck.id))
     db.delete(deck)
     db.commit()
 
 
+@router.get("/decks/{deck_id}/export.apkg", response_class=FileResponse)
+def export_deck_apkg(
+    deck_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Download a deck as an Anki .apkg, with each card's FSRS state.
+
+    The file is built on disk from batched reads and streamed in chunks,
+    so memory use does not grow with the deck.
+    """
+    deck = db.query(FlashcardDeck).filter(FlashcardDeck.id == deck_id, FlashcardDeck.user_id == user.id).first()
+    if not deck:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    scheduler = _load_scheduler(user.id, db)
+    path = export_deck(db, deck, desired_retention=scheduler.desired_retention)
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=export_filename(deck),
+        background=BackgroundTask(os.unlink, path),
+    )
+
+
 # ── Cards ──
 
 @router.get("/decks/{deck_id}/cards", response_model=list[FlashcardResponse])
 def list_cards(
     deck_id: int,
+    tag: Optional[list[str]] = Query(None),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    """Cards in a deck; pass tag (repeatable) to keep only cards with every given tag."""
     deck = db.query(FlashcardDeck).filter(FlashcardDeck.id == deck_id, FlashcardDeck.user_id == user.id).first()
     if not deck:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
-    return db.query(Flashcard).filter(Flashcard.deck_id == deck_id, Flashcard.user_id == user.id).all()
+    q = db.query(Flashcard).filter(Flashcard.deck_id == deck_id, Flashcard.user_id == user.id)
+    q = q.filter(*CARD_TAGS.has_all(user.id, tag or []))
+    return json_bytes_response(list[FlashcardResponse], q.all())
+
+
+@router.get("/tags", response_model=list[TagCount])
+def list_card_tags(
+    deck_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Tag facets: each tag with its number of cards (optionally within one deck), most used first."""
+    where = [Flashcard.deck_id == deck_id] if deck_id is not None else []
+    return [TagCount(tag=t, count=n) for t, n in CARD_TAGS.counts(db, user.id, *where)]
 
 
 @router.get("/decks/{deck_id}/review", response_model=list[FlashcardResponse])
@@ -144,32 +234,78 @@ def get_deck_review_cards(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Get cards to study in a deck. mode=due: only due/new cards; mode=all: all cards in deck."""
+    """Get cards to study in a deck.
+
+    mode=due: the deck's review queue (learning, due reviews, then new cards
+    within today's limits); mode=all: all cards in deck.
+    """
     deck = db.query(FlashcardDeck).filter(FlashcardDeck.id == deck_id, FlashcardDeck.user_id == user.id).first()
     if not deck:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    if mode == "due":
+        queue = build_queue(db, user.id, deck_id=deck_id, config=get_scheduler_configs().get(db, user.id))
+        return fetch_cards(db, user.id, queue.ids[:limit])
     q = db.query(Flashcard).filter(Flashcard.deck_id == deck_id, Flashcard.user_id == user.id)
     q = q.filter(Flashcard.suspended == False, Flashcard.buried == False)  # noqa: E712
-    if mode == "due":
-        now = datetime.now(timezone.utc)
-        q = q.filter((Flashcard.next_review == None) | (Flashcard.next_review <= now))  # noqa: E711
     return q.limit(limit).all()
 
 
 @router.get("/due", response_model=list[FlashcardResponse])
-def get_due_cards(
+async def get_due_cards(
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user),
 ):
-    now = datetime.now(timezone.utc)
-    return (
-        db.query(Flashcard)
-        .filter(Flashcard.user_id == user.id)
-        .filter(Flashcard.suspended == False, Flashcard.buried == False)  # noqa: E712
-        .filter((Flashcard.next_review == None) | (Flashcard.next_review <= now))  # noqa: E711
-        .limit(limit)
-        .all()
+    """The first limit cards of the review queue across all decks."""
+    config = await get_scheduler_configs().get_async(db, user.id)
+    queue = await build_queue_async(db, user.id, config=config)
+    cards = await fetch_cards_async(db, user.id, queue.ids[:limit])
+    return json_bytes_response(list[FlashcardResponse], cards)
+
+
+@router.get("/queue", response_model=ReviewQueueResponse)
+async def get_review_queue(
+    deck_id: Optional[int] = None,
+    review_order: ReviewOrder = "due",
+    page_size: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user),
+):
+    """Build the session's card order; page through the rest with /queue/cards?cursor=."""
+    config = await get_scheduler_configs().get_async(db, user.id)
+    queue = await build_queue_async(db, user.id, deck_id=deck_id, review_order=review_order, config=config)
+    page, next_cursor = paginate(queue.ids, page_size)
+    cards = await fetch_cards_async(db, user.id, page)
+    return json_bytes_response(
+        ReviewQueueResponse,
+        {
+            "ids": queue.ids,
+            "counts": queue.counts(),
+            "cards": cards,
+            "intervals": _interval_previews(config.scheduler, cards),
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+@router.get("/queue/cards", response_model=ReviewQueuePage)
+async def get_review_queue_cards(
+    cursor: str,
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user),
+):
+    """The next page of card bodies for a queue cursor."""
+    try:
+        ids = decode_cursor(cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    page, next_cursor = paginate(ids, limit)
+    cards = await fetch_cards_async(db, user.id, page)
+    config = await get_scheduler_configs().get_async(db, user.id)
+    return json_bytes_response(
+        ReviewQueuePage,
+        {"cards": cards, "intervals": _interval_previews(config.scheduler, cards), "next_cursor": next_cursor},
     )
 
 
@@ -210,7 +346,10 @@ def update_card(
     card = db.query(Flashcard).filter(Flashcard.id == card_id, Flashcard.user_id == user.id).first()
     if not card:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Card not found")
-    for field, value in body.model_dump(exclude_unset=True).items():
+    fields = body.model_dump(exclude_unset=True)
+    if "tags" in fields:
+        fields["tags"] = CARD_TAGS.set(db, user.id, card.id, fields["tags"])
+    for field, value in fields.items():
         setattr(card, field, value)
     db.commit()
     db.refresh(card)
@@ -231,28 +370,62 @@ def _card_to_state(card: Flashcard) -> CardState:
     )
 
 
-def _parse_steps(s: str) -> list[int]:
-    """Parse comma-separated step minutes like '1,10' -> [1, 10]."""
-    parts = [p.strip() for p in s.split(",") if p.strip()]
-    return [int(p) for p in parts if p.isdigit()]
+def _result_fields(result: ReviewResult) -> dict:
+    """Flashcard column values for a review result."""
+    return {
+        "stability": result.stability,
+        "difficulty": result.difficulty,
+        "interval_days": result.interval_days,
+        "repetitions": result.repetitions,
+        "lapses": result.lapses,
+        "state": result.state,
+        "learning_step": result.learning_step,
+        "next_review": result.next_review,
+        "last_review": result.last_review,
+    }
 
 
-def _load_fsrs_overrides(user_id: str, db: Session) -> dict:
-    """Load user FSRS settings overrides for passing to review/preview_intervals."""
-    try:
-        settings = db.query(FlashcardSettings).filter(FlashcardSettings.user_id == user_id).first()
-    except Exception:
-        return {}
-    if not settings:
-        return {}
+def _load_scheduler(user_id: str, db: Session) -> Scheduler:
+    """The FSRS scheduler for the user's settings (cached; see scheduler_config)."""
+    return get_scheduler_configs().get(db, user_id).scheduler
+
+
+def _interval_previews(scheduler: Scheduler, cards: list[Flashcard]) -> dict[int, dict]:
+    """IntervalPreview payloads for a page of cards, keyed by card id."""
+    previews = scheduler.preview_many(_card_to_state(c) for c in cards)
     return {
-        "learning_steps": _parse_steps(settings.learning_steps),
-        "relearning_steps": _parse_steps(settings.relearning_steps),
-        "desired_retention": settings.desired_retention,
-        "max_interval": settings.max_interval_days,
+        card.id: {"again": raw[1], "hard": raw[2], "good": raw[3], "easy": raw[4]}
+        for card, raw in zip(cards, previews)
     }
 
 
+def _fuzz_options(db: Session, user_id: str) -> tuple[dict, Optional[DueHistogram]]:
+    """fsrs.review() fuzz kwargs for the user, and the due histogram to balance against and keep current."""
+    settings = get_app_settings()
+    if not settings.FSRS_FUZZ_ENABLED:
+        return {}, None
+    if not settings.FSRS_LOAD_BALANCE:
+        return {"fuzz": True}, None
+    return {"fuzz": True}, get_due_histograms().get(db, user_id)
+
+
+def _review_options(fuzz: dict, histogram: Optional[DueHistogram], reviewed_at: datetime) -> dict:
+    """fuzz plus due_load counted from the review's own UTC day (not today's, for a late sync)."""
+    if histogram is None:
+        return fuzz
+    return {**fuzz, "due_load": histogram.load_from(reviewed_at.astimezone(timezone.utc).date())}
+
+
+def _review_rng(card_id: int, cs: CardState) -> random.Random:
+    # Seeded per card and review, so replaying a review gives the same due date.
+    return random.Random(f"{card_id}:{cs.repetitions}")
+
+
+def _move_due(histogram: Optional[DueHistogram], before: CardState, result: ReviewResult) -> None:
+    if histogram is not None:
+        histogram.move(before.next_review if before.state != STATE_NEW else None, result.next_review)
+
+
 @router.post("/cards/{card_id}/review", response_model=FlashcardReviewResponse)
 def review_card(
     card_id: int,
@@ -267,24 +440,38 @@ def review_card(
 
     now = datetime.now(timezone.utc)
     cs = _card_to_state(card)
-    overrides = _load_fsrs_overrides(user.id, db)
-    result = fsrs_review(cs, body.rating, now, **overrides)
-
-    card.stability = result.stability
-    card.difficulty = result.difficulty
-    card.interval_days = result.interval_days
-    card.repetitions = result.repetitions
-    card.lapses = result.lapses
-    card.state = result.state
-    card.learning_step = result.learning_step
-    card.next_review = result.next_review
-    card.last_review = result.last_review
+    scheduler = _load_scheduler(user.id, db)
+    fuzz, histogram = _fuzz_options(db, user.id)
+    options = _review_options(fuzz, histogram, now)
+    result = scheduler.review(cs, body.rating, now, rng=_review_rng(card.id, cs), **options)
+    _move_due(histogram, cs, result)
+
+    # The log's pre-review state is what the queue counts against today's limits;
+    # its snapshot is what undo restores.
+    log = FlashcardReviewLog(
+        user_id=user.id,
+        card_id=card.id,
+        rating=body.rating,
+        state=card.state,
+        reviewed_at=now,
+        duration_ms=body.duration_ms,
+        session_id=body.session_id,
+        snapshot=snapshot(cs),
+    )
+    db.add(log)
+
+    for field, value in _result_fields(result).items():
+        setattr(card, field, value)
 
+    db.flush()
+    undo_entry = UndoEntry(log.id, card.id, log.snapshot, now)
+    undo_key = (user.id, body.session_id)
     db.commit()
+    get_undo_buffer().push(undo_key, undo_entry)
     db.refresh(card)
 
     new_cs = _card_to_state(card)
-    raw_intervals = preview_intervals(new_cs, now, **overrides)
+    raw_intervals = scheduler.preview(new_cs, now)
 
     return FlashcardReviewResponse(
         card=FlashcardResponse.model_validate(card),
@@ -294,6 +481,143 @@ def review_card(
     )
 
 
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@router.post("/reviews/batch", response_model=FlashcardReviewBatchResponse)
+def review_cards_batch(
+    body: FlashcardReviewBatch,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Replay reviews made offline or in a burst, oldest first.
+
+    One settings load, one SELECT for the cards, then one executemany UPDATE
+    and one log INSERT. Reviews of unknown cards, or older than the card's
+    last review (already superseded by a newer sync), are skipped.
+    Future timestamps are clamped to the server's clock.
+    """
+    now = datetime.now(timezone.utc)
+    order = sorted(range(len(body.reviews)), key=lambda i: _utc(body.reviews[i].reviewed_at))
+    card_ids = {r.card_id for r in body.reviews}
+    cards = {
+        c.id: c
+        for c in db.query(Flashcard).filter(Flashcard.user_id == user.id, Flashcard.id.in_(card_ids))
+    } if card_ids else {}
+    scheduler = _load_scheduler(user.id, db)
+    fuzz, histogram = _fuzz_options(db, user.id) if cards else ({}, None)
+
+    states: dict[int, CardState] = {}
+    changes: dict[int, dict] = {}
+    logs: list[dict] = []
+    skipped: list[int] = []
+    for i in order:
+        item = body.reviews[i]
+        card = cards.get(item.card_id)
+        if card is None:
+            skipped.append(i)
+            continue
+        cs = states.get(card.id) or _card_to_state(card)
+        reviewed_at = min(_utc(item.reviewed_at), now)
+        if cs.last_review is not None and reviewed_at < _utc(cs.last_review):
+            skipped.append(i)
+            continue
+        options = _review_options(fuzz, histogram, reviewed_at)
+        result = scheduler.review(cs, item.rating, reviewed_at, rng=_review_rng(card.id, cs), **options)
+        _move_due(histogram, cs, result)
+        fields = _result_fields(result)
+        states[card.id] = CardState(**fields)
+        changes[card.id] = fields
+        logs.append({
+            "user_id": user.id,
+            "card_id": card.id,
+            "rating": item.rating,
+            "state": cs.state,
+            "reviewed_at": reviewed_at,
+            "duration_ms": item.duration_ms,
+            "session_id": body.session_id,
+            "snapshot": snapshot(cs),
+        })
+
+    # Build the response from the loaded rows before commit expires them.
+    updated = [
+        FlashcardResponse.model_validate(cards[card_id]).model_copy(update={**fields, "updated_at": now})
+        for card_id, fields in changes.items()
+    ]
+    if changes:
+        db.execute(update(Flashcard), [{"id": card_id, **fields, "updated_at": now} for card_id, fields in changes.items()])
+        db.execute(insert(FlashcardReviewLog), logs)
+    # The in-memory undo stack would now be older than the log; undo reads the log instead.
+    get_undo_buffer().clear((user.id, body.session_id))
+    db.commit()
+    return FlashcardReviewBatchResponse(cards=updated, applied=len(logs), skipped=sorted(skipped))
+
+
+def _pop_undo(db: Session, user_id: str, session_id: Optional[str]) -> Optional[UndoEntry]:
+    """Delete and return the latest undoable review: from the session's stack, else the log."""
+    buffer = get_undo_buffer()
+    while (entry := buffer.pop((user_id, session_id))) is not None:
+        deleted = db.execute(
+            delete(FlashcardReviewLog).where(FlashcardReviewLog.id == entry.log_id, FlashcardReviewLog.user_id == user_id)
+        )
+        if deleted.rowcount:
+            return entry
+    q = select(FlashcardReviewLog).where(FlashcardReviewLog.user_id == user_id, FlashcardReviewLog.snapshot.isnot(None))
+    if session_id is not None:
+        q = q.where(FlashcardReviewLog.session_id == session_id)
+    log = db.scalars(q.order_by(FlashcardReviewLog.id.desc()).limit(1)).first()
+    if log is None:
+        return None
+    entry = UndoEntry(log.id, log.card_id, log.snapshot, log.reviewed_at)
+    db.delete(log)
+    return entry
+
+
+@router.post("/reviews/undo", response_model=FlashcardResponse)
+def undo_review(
+    session_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Undo the latest review (of session_id, when given); repeat to undo further back.
+
+    409 when the card was reviewed again after that review (e.g. in another
+    session or on another device): the later review must be undone first.
+    """
+    entry = _pop_undo(db, user.id, session_id)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nothing to undo")
+    card = db.scalars(
+        update(Flashcard)
+        .where(
+            Flashcard.id == entry.card_id,
+            Flashcard.user_id == user.id,
+            Flashcard.last_review == entry.reviewed_at,
+        )
+        .values(**restore_fields(entry.snapshot), updated_at=datetime.now(timezone.utc))
+        .returning(Flashcard),
+        # "evaluate" would compare last_review in Python, where naive (SQLite) and
+        # aware datetimes never match; "fetch" uses the rows RETURNING matched.
+        execution_options={"synchronize_session": "fetch"},
+    ).first()
+    if card is None:
+        db.rollback()
+        exists = db.scalar(select(Flashcard.id).where(Flashcard.id == entry.card_id, Flashcard.user_id == user.id))
+        if exists is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Card not found")
+        # The log row is still there; keep the entry on top of the stack.
+        get_undo_buffer().push((user.id, session_id), entry)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Card was reviewed again since; undo that review first",
+        )
+    response = FlashcardResponse.model_validate(card)
+    get_due_histograms().invalidate(user.id)
+    db.commit()
+    return response
+
+
 @router.get("/cards/{card_id}/intervals", response_model=IntervalPreview)
 def get_card_intervals(
     card_id: int,
@@ -306,8 +630,7 @@ def get_card_intervals(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Card not found")
 
     cs = _card_to_state(card)
-    overrides = _load_fsrs_overrides(user.id, db)
-    raw = preview_intervals(cs, **overrides)
+    raw = _load_scheduler(user.id, db).preview(cs)
     return IntervalPreview(
         again=ScheduleInfo(**raw[1]),
         hard=ScheduleInfo(**raw[2]),
@@ -330,10 +653,43 @@ def delete_card(
     if deck:
         deck.card_count = max(0, deck.card_count - 1)
 
+    CARD_TAGS.discard(db, user.id, None, [card.id])
     db.delete(card)
     db.commit()
 
 
+@router.post("/cards/bulk", response_model=FlashcardBulkResponse)
+def bulk_card_operation(
+    body: FlashcardBulkOperation,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Move, tag, untag, suspend, unsuspend, reset or delete many cards at once.
+
+    Select cards by card_ids or by filter; each action runs as set-based SQL
+    (see app.services.card_bulk) and deck card counts are adjusted in the same
+    transaction. affected counts the cards that actually changed.
+    """
+    moving = None
+    if body.action == "move":
+        target = db.query(FlashcardDeck).filter(FlashcardDeck.id == body.deck_id, FlashcardDeck.user_id == user.id).first()
+        if not target:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+        moving = move_counts(db, user.id, body)
+        limits = get_plan_limits(user.plan)
+        if count_deck_cards(target.id, user.id, db) + sum(moving.values()) > limits.max_cards_per_deck:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Card limit reached ({limits.max_cards_per_deck} per deck). Upgrade to Pro for unlimited cards.",
+                headers={"X-Upgrade-Required": "true"},
+            )
+    affected = apply_bulk_operation(db, user.id, body, moving=moving)
+    db.commit()
+    if affected and body.action in ("suspend", "unsuspend", "reset", "delete"):
+        get_due_histograms().invalidate(user.id)
+    return FlashcardBulkResponse(action=body.action, affected=affected)
+
+
 @router.post("/cards/unbury-all", status_code=status.HTTP_200_OK)
 def unbury_all_cards(
     db: Session = Depends(get_db),
@@ -353,7 +709,7 @@ def unbury_all_cards(
 
 @router.get("/stats", response_model=FlashcardStatsResponse)
 def get_flashcard_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     user: User = Depends(get_current_user),
 ):
     """Aggregate flashcard stats for the current user."""
@@ -426,6 +782,77 @@ def get_flashcard_stats(
     )
 
 
+# ── Workload Forecast ──
+
+MAX_FORECAST_TARGETS = 5
+
+
+@router.get("/forecast", response_model=ForecastResponse)
+def get_forecast(
+    retention: Optional[list[float]] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Projected daily reviews and retention for one or more desired_retention values.
+
+    Pass retention several times to compare targets (default: the user's
+    setting). Simulations run in the background: targets without a cached
+    result are started and listed in pending with HTTP 202; poll again.
+    Targets whose simulation failed are listed in failed (status "failed"
+    once nothing is pending) until FORECAST_FAILURE_TTL_SECONDS pass.
+    """
+    row = db.query(FlashcardSettings).filter(FlashcardSettings.user_id == user.id).first()
+    fc_settings = row or FlashcardSettingsResponse()
+    targets = sorted({round(r, 3) for r in (retention or [fc_settings.desired_retention])})
+    if len(targets) > MAX_FORECAST_TARGETS or any(not 0.70 <= r <= 0.99 for r in targets):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Pass up to {MAX_FORECAST_TARGETS} retention values between 0.70 and 0.99",
+        )
+
+    jobs = get_forecast_jobs()
+    limits = (fc_settings.daily_new_cards, fc_settings.daily_review_limit, fc_settings.max_interval_days)
+    forecasts, pending, failed = [], [], []
+    cards = None
+    for target in targets:
+        key = (user.id, target, days, limits)
+        result = jobs.get(key)
+        if result is not None:
+            forecasts.append(result)
+            continue
+        if jobs.error(key) is not None:
+            failed.append(target)
+            continue
+        pending.append(target)
+        if jobs.is_pending(key):
+            continue
+        if cards is None:
+            cards = CardArrays.from_rows(
+                db.query(Flashcard.stability, Flashcard.difficulty, Flashcard.state, Flashcard.next_review, Flashcard.last_review)
+                .filter(Flashcard.user_id == user.id, Flashcard.suspended == False)  # noqa: E712
+                .order_by(Flashcard.next_review, Flashcard.id)
+                .all()
+            )
+        jobs.submit(key, partial(
+            simulate,
+            cards,
+            retention=target,
+            days=days,
+            new_per_day=limits[0],
+            review_limit=limits[1],
+            max_interval=limits[2],
+            runs=get_app_settings().FORECAST_RUNS,
+        ))
+
+    state = "pending" if pending else "failed" if failed else "ready"
+    return json_bytes_response(
+        ForecastResponse,
+        {"status": state, "forecasts": forecasts, "pending": pending, "failed": failed},
+        status_code=status.HTTP_202_ACCEPTED if pending else status.HTTP_200_OK,
+    )
+
+
 # ── Settings ──
 
 @router.get("/settings", response_model=FlashcardSettingsResponse)
@@ -464,6 +891,7 @@ def update_settings(
         setattr(row, field, value)
     db.commit()
     db.refresh(row)
+    get_scheduler_configs().put(user.id, row)
     return row
 
 
@@ -488,35 +916,38 @@ def get_generation_sources(
     """Return available sources for AI flashcard generation."""
     existing_qids = _existing_flashcard_qids(user.id, db)
 
-    # Completed sessions with at least one incorrect answer
-    sessions_raw = (
-        db.query(ExamSession)
+    # Completed sessions with at least one incorrect answer, joined to their
+    # incorrect question ids in one query (ordered newest first).
+    incorrect_rows = (
+        db.query(ExamSession, ExamSessionAnswer.question_id)
+        .join(ExamSessionAnswer, ExamSessionAnswer.session_id == ExamSession.id)
         .filter(
             ExamSession.user_id == user.id,
             ExamSession.status == "completed",
             ExamSession.incorrect_count > 0,
+            ExamSessionAnswer.correct == False,  # noqa: E712
         )
-        .order_by(ExamSession.completed_at.desc())
+        .order_by(ExamSession.completed_at.desc(), ExamSession.id)
         .all()
     )
-    sessions = []
-    for s in sessions_raw:
-        incorrect_qids = [
-            a.question_id
-            for a in db.query(ExamSessionAnswer.question_id)
-            .filter(ExamSessionAnswer.session_id == s.id, ExamSessionAnswer.correct == False)  # noqa: E712
-            .all()
-        ]
-        remaining = [qid for qid in incorrect_qids if qid not in existing_qids]
-        if remaining:
-            sessions.append(GenerationSessionSource(
-                id=s.id,
-                mode=s.mode,
-                date=s.completed_at.isoformat() if s.completed_at else s.started_at.isoformat(),
-                subjects=s.subjects,
-                accuracy=s.accuracy,
-                incorrect_count=len(remaining),
-            ))
+    remaining_by_session: dict[int, tuple[ExamSession, int]] = {}
+    for s, qid in incorrect_rows:
+        if qid in existing_qids:
+            continue
+        _, n = remaining_by_session.get(s.id, (s, 0))
+        remaining_by_session[s.id] = (s, n + 1)
+
+    sessions = [
+        GenerationSessionSource(
+            id=s.id,
+            mode=s.mode,
+            date=s.completed_at.isoformat() if s.completed_at else s.started_at.isoformat(),
+            subjects=s.subjects,
+            accuracy=s.accuracy,
+            incorrect_count=n,
+        )
+        for s, n in remaining_by_session.values()
+    ]
 
     # Sections and systems from missed questions that don't already have flashcards
     missed_qids_rows = (
@@ -0,0 +1,111 @@
+"""Prometheus text-format metrics endpoint."""
+from typing import Callable, Iterable
+
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.questions import get_question_cache
+from app.config import get_settings
+from app.db.session import engine
+from app.services.due_histogram import get_due_histograms
+from app.services.forecast import get_forecast_jobs
+from app.services.jwks import all_jwks_managers
+from app.services.metrics import REGISTRY, Family, cache_family, gauge_family
+from app.services.review_undo import get_undo_buffer
+from app.services.scheduler_config import get_scheduler_configs
+from app.services.token_cache import get_user_cache, get_verified_token_cache
+
+router = APIRouter()
+
+
+def _pool_families() -> Iterable[Family]:
+    pool = engine.pool
+    samples = {
+        "db_pool_size": ("Configured pool size.", getattr(pool, "size", None)),
+        "db_pool_checked_out": ("Connections currently checked out.", getattr(pool, "checkedout", None)),
+        "db_pool_overflow": ("Connections open beyond pool_size.", getattr(pool, "overflow", None)),
+        "db_pool_checked_in": ("Idle connections in the pool.", getattr(pool, "checkedin", None)),
+    }
+    for name, (help_text, fn) in samples.items():
+        if callable(fn):
+            yield gauge_family(name, help_text, [({}, float(fn()))])
+
+
+def _threadpool_families() -> Iterable[Family]:
+    try:
+        limiter = current_default_thread_limiter()
+    except RuntimeError:  # rendered outside the event loop
+        return
+    yield gauge_family(
+        "threadpool_busy_threads", "Worker threads running sync endpoints.", [({}, limiter.borrowed_tokens)]
+    )
+    yield gauge_family("threadpool_max_threads", "Worker thread limit.", [({}, limiter.total_tokens)])
+
+
+def _counts(getter: Callable) -> tuple[int, int]:
+    """hits/misses of an lru_cache singleton, without building it for a scrape."""
+    if not getter.cache_info().currsize:
+        return 0, 0
+    cache = getter()
+    return cache.hits, cache.misses
+
+
+def _cache_families() -> Iterable[Family]:
+    user_cache = get_user_cache()
+    verified = get_verified_token_cache()
+    question_cache = get_question_cache()
+    jwks = [m.stats() for m in all_jwks_managers().values()]
+    stats = {
+        "questions": (question_cache.hits, question_cache.misses),
+        "auth_user": (user_cache.hits, user_cache.misses),
+        "verified_token": (verified.hits, verified.misses),
+        "jwks": (sum(s["key_hits"] for s in jwks), sum(s["key_misses"] for s in jwks)),
+        "scheduler_config": _counts(get_scheduler_configs),
+        "due_histogram": _counts(get_due_histograms),
+        "forecast": _counts(get_forecast_jobs),
+        "review_undo": _counts(get_undo_buffer),
+    }
+    yield from cache_family(stats)
+
+
+def _jwks_families() -> Iterable[Family]:
+    managers = all_jwks_managers()
+    if not managers:
+        return
+    rows = [(url, m.stats()) for url, m in managers.items()]
+    yield gauge_family(
+        "jwks_refreshes_total", "JWKS fetches.", [({"issuer": u}, s["refreshes"]) for u, s in rows], "counter"
+    )
+    yield gauge_family(
+        "jwks_refresh_failures_total", "Failed JWKS fetches.",
+        [({"issuer": u}, s["refresh_failures"]) for u, s in rows], "counter",
+    )
+    yield gauge_family(
+        "jwks_stale_served_total", "Lookups served from an expired key set.",
+        [({"issuer": u}, s["stale_served"]) for u, s in rows], "counter",
+    )
+    yield gauge_family(
+        "jwks_age_seconds", "Age of the cached key set.", [({"issuer": u}, s["age_seconds"]) for u, s in rows]
+    )
+
+
+REGISTRY.register_collector(_pool_families)
+REGISTRY.register_collector(_threadpool_families)
+REGISTRY.register_collector(_cache_families)
+REGISTRY.register_collector(_jwks_families)
+
+
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape target. Requires METRICS_TOKEN as a bearer token when set.
+
+    In production the endpoint is not served at all unless a token is configured.
+    """
+    settings = get_settings()
+    token = settings.METRICS_TOKEN
+    if not token and settings.ENVIRONMENT == "production":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if token and request.headers.get("authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -9,7 +9,9 @@ from app.db import get_db
 from app.models import User
 from app.models.note import Note
 from app.schemas.note import NoteCreate, NoteResponse, NoteUpdate
+from app.schemas.tag import TagCount
 from app.services.plans import count_user_notes, get_plan_limits
+from app.services.tags import NOTE_TAGS
 
 router = APIRouter()
 
@@ -18,6 +20,7 @@ router = APIRouter()
 def list_notes(
     question_id: Optional[str] = None,
     section: Optional[str] = None,
+    tag: Optional[list[str]] = Query(None),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
     limit: int = Query(100, ge=1, le=500),
@@ -28,9 +31,21 @@ def list_notes(
         q = q.filter(Note.question_id == question_id)
     if section:
         q = q.filter(Note.section == section)
+    q = q.filter(*NOTE_TAGS.has_all(user.id, tag or []))
     return q.order_by(Note.updated_at.desc()).offset(offset).limit(limit).all()
 
 
+@router.get("/tags", response_model=list[TagCount])
+def list_note_tags(
+    section: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Tag facets: each tag with its number of notes, most used first."""
+    where = [Note.section == section] if section else []
+    return [TagCount(tag=t, count=n) for t, n in NOTE_TAGS.counts(db, user.id, *where)]
+
+
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 def create_note(
     body: NoteCreate,
@@ -48,6 +63,8 @@ def create_note(
 
     note = Note(user_id=user.id, **body.model_dump())
     db.add(note)
+    db.flush()
+    note.tags = NOTE_TAGS.set(db, user.id, note.id, note.tags)
     db.commit()
     db.refresh(note)
     return note
@@ -75,7 +92,10 @@ def update_note(
     note = db.query(Note).filter(Note.id == note_id, Note.user_id == user.id).first()
     if not note:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
-    for field, value in body.model_dump(exclude_unset=True).items():
+    fields = body.model_dump(exclude_unset=True)
+    if "tags" in fields:
+        fields["tags"] = NOTE_TAGS.set(db, user.id, note.id, fields["tags"])
+    for field, value in fields.items():
         setattr(note, field, value)
     db.commit()
     db.refresh(note)
@@ -91,5 +111,6 @@ def delete_note(
     note = db.query(Note).filter(Note.id == note_id, Note.user_id == user.id).first()
     if not note:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    NOTE_TAGS.discard(db, user.id, None, [note.id])
     db.delete(note)
     db.commit()
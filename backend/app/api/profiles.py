@@ -0,0 +1,27 @@
+"""Admin access to sampled request profiles (collapsed-stack files)."""
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.api.deps import require_admin
+from app.config import get_settings
+from app.models import User
+from app.schemas.profile import ProfileFileResponse
+from app.services.profiler import list_profiles, resolve_profile
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[ProfileFileResponse])
+def get_profiles(current_user: User = Depends(require_admin)):
+    """Newest first. Open the files in speedscope or pipe them to flamegraph.pl."""
+    return [asdict(p) for p in list_profiles(get_settings().PROFILING_OUTPUT_DIR)]
+
+
+@router.get("/{name}")
+def download_profile(name: str, current_user: User = Depends(require_admin)):
+    path = resolve_profile(get_settings().PROFILING_OUTPUT_DIR, name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
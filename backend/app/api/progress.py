@@ -5,11 +5,13 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import case, func as sqlfunc, cast, Date as SADate
+from sqlalchemy import case, func as sqlfunc, cast, select, Date as SADate
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_user_async_read_db, get_user_read_db
+from app.api.responses import FastJSONResponse
 from app.db import get_db
 from app.models import User, UserProgress
 from app.models.exam_session import ExamSessionAnswer, ExamSession
@@ -38,23 +40,23 @@ def get_progress(
         .limit(limit)
         .all()
     )
-    return [
+    return FastJSONResponse([
         {"question_id": r.question_id, "correct": r.correct, "section": r.section}
         for r in rows
-    ]
+    ])
 
 
 @router.get("/stats", response_model=ProgressStatsResponse)
-def get_stats(
+async def get_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_user_async_read_db),
 ):
     """Aggregate stats using SQL — no full table scan into Python."""
-    base = db.query(UserProgress).filter(UserProgress.user_id == current_user.id)
+    mine = UserProgress.user_id == current_user.id
+    correct_sum = sqlfunc.sum(case((UserProgress.correct == True, 1), else_=0))  # noqa: E712
 
-    totals = base.with_entities(
-        sqlfunc.count().label("total"),
-        sqlfunc.sum(case((UserProgress.correct == True, 1), else_=0)).label("correct"),  # noqa: E712
+    totals = (
+        await db.execute(select(sqlfunc.count().label("total"), correct_sum.label("correct")).where(mine))
     ).first()
 
     total = totals.total or 0
@@ -62,14 +64,12 @@ def get_stats(
     incorrect = total - correct
 
     section_rows = (
-        base.with_entities(
-            UserProgress.section,
-            sqlfunc.count().label("total"),
-            sqlfunc.sum(case((UserProgress.correct == True, 1), else_=0)).label("correct"),  # noqa: E712
+        await db.execute(
+            select(UserProgress.section, sqlfunc.count().label("total"), correct_sum.label("correct"))
+            .where(mine)
+            .group_by(UserProgress.section)
         )
-        .group_by(UserProgress.section)
-        .all()
-    )
+    ).all()
 
     by_section = [
         {
@@ -88,7 +88,7 @@ def get_stats(
     ]
     weak_areas.sort(key=lambda s: s["accuracy"])
 
-    total_sections_available = db.query(sqlfunc.count(sqlfunc.distinct(Question.section))).scalar() or 1
+    total_sections_available = await db.scalar(select(sqlfunc.count(sqlfunc.distinct(Question.section)))) or 1
     sections_touched = len(by_section)
     coverage = min(1.0, sections_touched / total_sections_available) if total_sections_available else 0
 
@@ -96,11 +96,13 @@ def get_stats(
     volume_score = min(1.0, total / 500)
 
     recent_rows = (
-        base.with_entities(UserProgress.correct, UserProgress.created_at)
-        .order_by(UserProgress.created_at.desc())
-        .limit(100)
-        .all()
-    )
+        await db.execute(
+            select(UserProgress.correct, UserProgress.created_at)
+            .where(mine)
+            .order_by(UserProgress.created_at.desc())
+            .limit(100)
+        )
+    ).all()
     if len(recent_rows) >= 20:
         first_half = recent_rows[len(recent_rows) // 2:]
         second_half = recent_rows[:len(recent_rows) // 2]
@@ -181,7 +183,7 @@ def get_daily_summary(
 @router.get("/time-stats")
 def get_time_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
 ):
     """Average time per question overall and by section."""
     base = (
@@ -256,7 +258,7 @@ def get_time_stats(
 @router.get("/trends")
 def get_trends(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
 ):
     """Weekly accuracy trends by section (top 8 sections by volume).
 
@@ -1,37 +1,39 @@
 """Questions endpoints."""
-import time
+from functools import lru_cache
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.api.deps import get_async_read_db
+from app.api.responses import dumps, json_bytes_response
+from app.config import get_settings
 from app.models import Question
 from app.models.question import QUESTION_STATUS_READY, QUESTION_STATUS_INCOMPLETE
 from app.schemas.question import QuestionListResponse, QuestionResponse
+from app.services.compression import PayloadCache, PrecompressedPayload
 
 router = APIRouter()
 
 USABLE_STATUSES = [QUESTION_STATUS_READY, QUESTION_STATUS_INCOMPLETE]
 
-_cache: dict[str, tuple[float, Any]] = {}
-CACHE_TTL = 300  # 5 minutes
 
+@lru_cache
+def get_question_cache() -> PayloadCache:
+    """Encoded sections, stats and single-question bodies, shared by the routes below."""
+    settings = get_settings()
+    return PayloadCache(settings.QUESTION_CACHE_SIZE, settings.QUESTION_CACHE_TTL_SECONDS)
 
-def _get_cached(key: str):
-    entry = _cache.get(key)
-    if entry and (time.monotonic() - entry[0]) < CACHE_TTL:
-        return entry[1]
-    return None
 
-
-def _set_cached(key: str, value: Any):
-    _cache[key] = (time.monotonic(), value)
+def _payload(value: Any) -> PrecompressedPayload:
+    """Wrap a JSON-able value so each encoding is compressed once per cache entry."""
+    return PrecompressedPayload(dumps(value), minimum_size=get_settings().COMPRESSION_MIN_SIZE)
 
 
 @router.get("", response_model=QuestionListResponse)
-def list_questions(
-    db: Session = Depends(get_db),
+async def list_questions(
+    db: AsyncSession = Depends(get_async_read_db),
     sections: Optional[List[str]] = Query(None, alias="sections[]"),
     status: Optional[List[str]] = Query(None, alias="status[]"),
     limit: int = Query(100, ge=1, le=500),
@@ -42,60 +44,57 @@ def list_questions(
     By default only 'ready' and 'incomplete' questions are returned.
     Pass status[]=all to include every question regardless of status.
     """
-    q = db.query(Question)
+    stmt = select(Question)
     if sections:
-        q = q.filter(Question.section.in_(sections))
+        stmt = stmt.where(Question.section.in_(sections))
     if status and "all" in status:
         pass
     elif status:
-        q = q.filter(Question.status.in_(status))
+        stmt = stmt.where(Question.status.in_(status))
     else:
-        q = q.filter(Question.status.in_(USABLE_STATUSES))
-    total = q.count()
-    items = q.offset(offset).limit(limit).all()
-    return QuestionListResponse(
-        items=[QuestionResponse.model_validate(x) for x in items],
-        total=total,
-    )
+        stmt = stmt.where(Question.status.in_(USABLE_STATUSES))
+    total = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    items = (await db.scalars(stmt.offset(offset).limit(limit))).all()
+    return json_bytes_response(QuestionListResponse, {"items": items, "total": total})
 
 
 @router.get("/sections")
-def list_sections(db: Session = Depends(get_db)):
-    """Return distinct section names (only from usable questions). Cached for 5 min."""
-    cached = _get_cached("sections")
+async def list_sections(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Return distinct section names (only from usable questions). Cached for QUESTION_CACHE_TTL_SECONDS."""
+    cache = get_question_cache()
+    cached = cache.get("sections")
     if cached is not None:
-        return cached
-    rows = (
-        db.query(Question.section)
-        .filter(Question.status.in_(USABLE_STATUSES))
+        return cached.response(request.headers.get("accept-encoding", ""))
+    rows = await db.scalars(
+        select(Question.section)
+        .where(Question.status.in_(USABLE_STATUSES))
         .distinct()
-        .all()
     )
-    result = {"sections": [r[0] for r in rows]}
-    _set_cached("sections", result)
-    return result
+    payload = _payload({"sections": list(rows)})
+    cache.put("sections", payload)
+    return payload.response(request.headers.get("accept-encoding", ""))
 
 
 @router.get("/stats")
-def question_stats(db: Session = Depends(get_db)):
-    """Return count of questions per status. Cached for 5 min."""
-    cached = _get_cached("stats")
+async def question_stats(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Return count of questions per status. Cached for QUESTION_CACHE_TTL_SECONDS."""
+    cache = get_question_cache()
+    cached = cache.get("stats")
     if cached is not None:
-        return cached
-    from sqlalchemy import func
-    rows = db.query(Question.status, func.count()).group_by(Question.status).all()
-    result = {s: count for s, count in rows}
-    _set_cached("stats", result)
-    return result
+        return cached.response(request.headers.get("accept-encoding", ""))
+    rows = await db.execute(select(Question.status, func.count()).group_by(Question.status))
+    payload = _payload({s: count for s, count in rows})
+    cache.put("stats", payload)
+    return payload.response(request.headers.get("accept-encoding", ""))
 
 
 MAX_BY_IDS = 200
 
 
 @router.post("/by-ids", response_model=list[QuestionResponse])
-def get_questions_by_ids(
+async def get_questions_by_ids(
     body: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """Fetch questions by a list of IDs, preserving the requested order."""
     ids = body.get("ids", [])
@@ -103,16 +102,22 @@ def get_questions_by_ids(
         return []
     if len(ids) > MAX_BY_IDS:
         raise HTTPException(status_code=400, detail=f"Maximum {MAX_BY_IDS} IDs per request")
-    rows = db.query(Question).filter(Question.id.in_(ids)).all()
+    rows = await db.scalars(select(Question).where(Question.id.in_(ids)))
     by_id = {q.id: q for q in rows}
     ordered = [by_id[qid] for qid in ids if qid in by_id]
     return [QuestionResponse.model_validate(q) for q in ordered]
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
-def get_question(question_id: str, db: Session = Depends(get_db)):
-    """Get a single question by id."""
-    q = db.query(Question).filter(Question.id == question_id).first()
-    if not q:
-        raise HTTPException(status_code=404, detail="Question not found")
-    return QuestionResponse.model_validate(q)
+async def get_question(question_id: str, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Get a single question by id. The encoded body is cached for QUESTION_CACHE_TTL_SECONDS."""
+    key = f"question:{question_id}"
+    cache = get_question_cache()
+    cached = cache.get(key)
+    if cached is None:
+        q = await db.get(Question, question_id)
+        if not q:
+            raise HTTPException(status_code=404, detail="Question not found")
+        cached = _payload(QuestionResponse.model_validate(q).model_dump(mode="json"))
+        cache.put(key, cached)
+    return cached.response(request.headers.get("accept-encoding", ""))
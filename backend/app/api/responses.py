@@ -0,0 +1,59 @@
+"""Response classes and helpers that encode JSON straight to bytes.
+
+FastJSONResponse renders with orjson when installed and falls back to a
+compact json.dumps. json_bytes_response validates ORM rows against a schema
+and dumps them with Pydantic's Rust serializer in one pass, skipping the
+dict -> jsonable_encoder -> json.dumps round trip on list-heavy routes.
+
+DEFAULT_RESPONSE_CLASS is what the app uses by default. FastAPI releases
+that already dump response_model routes straight to bytes only do so while
+the route's response class is left at its default, so there it stays
+JSONResponse; older releases get FastJSONResponse.
+"""
+from __future__ import annotations
+
+import inspect
+import json
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+NATIVE_DUMP_JSON = "dump_json" in inspect.signature(serialize_response).parameters
+DEFAULT_RESPONSE_CLASS: type[JSONResponse] = JSONResponse if NATIVE_DUMP_JSON else FastJSONResponse
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def json_bytes_response(schema: Any, value: Any, status_code: int = 200) -> Response:
+    """Validate value (ORM objects allowed) as schema and return it as JSON bytes.
+
+    schema is any type Pydantic accepts, e.g. ``list[FlashcardResponse]``.
+    Keep ``response_model`` on the route for the OpenAPI schema.
+    """
+    adapter = _adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
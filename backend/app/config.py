@@ -1,13 +1,20 @@
 """Application configuration from environment."""
+import json
 from functools import lru_cache
-from typing import List, Union
+from typing import Annotated, List, Literal, Union
 
 from pydantic import field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 
-def _parse_cors_origins(v: Union[str, List[str]]) -> List[str]:
-    """Parse CORS_ORIGINS from comma-separated string or list (e.g. production env)."""
+# List settings given as comma-separated env vars; NoDecode hands the raw string to _parse_comma_list.
+CommaList = Annotated[List[str], NoDecode]
+
+
+def _parse_comma_list(v: Union[str, List[str]]) -> List[str]:
+    """Parse a comma-separated string, JSON array or list (e.g. CORS_ORIGINS from the production env)."""
+    if isinstance(v, str) and v.lstrip().startswith("["):
+        v = json.loads(v)
     if isinstance(v, str):
         return [x.strip() for x in v.split(",") if x.strip()]
     return list(v) if v else []
@@ -22,6 +29,31 @@ class Settings(BaseSettings):
 
     # Database: sqlite for dev, postgres for production
     DATABASE_URL: str = "sqlite:///./step2ck.db"
+    # Async driver URL for get_async_db; empty derives it from DATABASE_URL (asyncpg / aiosqlite)
+    ASYNC_DATABASE_URL: str = ""
+    # Connection pool (Postgres). PRE_PING checks each connection on checkout; liveness also
+    # pings every INTERVAL seconds (0 = off) so a server restart invalidates the pool before
+    # requests find out. PGBOUNCER_MODE: NullPool, no prepared-statement cache.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_LIVENESS_INTERVAL_SECONDS: float = 30.0
+    DB_PGBOUNCER_MODE: bool = False
+    # SQLite profile (file databases): WAL, synchronous, page cache, mmap, busy timeout.
+    SQLITE_TUNING_ENABLED: bool = True
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE_MB: int = 256
+    # Run exam writes through one dedicated connection and queue (avoids "database is locked").
+    SQLITE_SINGLE_WRITER: bool = True
+    # Read replicas for analytics/catalog reads (comma-separated URLs; empty = primary only).
+    # Users are pinned to the primary for PIN_SECONDS after they write.
+    DATABASE_REPLICA_URLS: CommaList = []
+    REPLICA_PIN_SECONDS: float = 5.0
+    REPLICA_HEALTH_INTERVAL_SECONDS: float = 10.0
 
     # Environment: "development" or "production"
     ENVIRONMENT: str = "development"
@@ -31,17 +63,55 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     GOOGLE_CLIENT_ID: str = ""  # Optional; used to verify Google ID tokens (audience check)
+    # Comma-separated emails allowed to use admin endpoints (e.g. /admin/profiles)
+    ADMIN_EMAILS: CommaList = []
 
     # Supabase Auth (required in production)
     SUPABASE_URL: str = ""  # e.g. https://<ref>.supabase.co — used to fetch JWKS for ES256 tokens
     SUPABASE_JWT_SECRET: str = ""  # HS256 fallback (older Supabase projects)
 
+    # Verified token -> user id cache; skips JWT verification and profile sync on repeat tokens.
+    # Entries never outlive the token's exp. Set TTL to 0 to disable.
+    AUTH_USER_CACHE_TTL_SECONDS: int = 300
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10_000
+    # Verified Supabase JWT claims, held per token until exp. 0 disables.
+    SUPABASE_VERIFIED_TOKEN_CACHE_SIZE: int = 10_000
+
     # CORS: comma-separated string in production (e.g. CORS_ORIGINS=https://app.com)
-    CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
+    CORS_ORIGINS: CommaList = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
     # Logging
     LOG_LEVEL: str = "INFO"
 
+    # Per-request SQL instrumentation (Server-Timing header + app.sql log lines)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10  # warn when one statement repeats this often in a request
+    SQL_SLOW_REQUEST_MS: float = 500.0  # log at INFO above this duration, else DEBUG
+
+    # Response compression (gzip always; br/zstd when brotli/zstandard are installed).
+    # Bodies smaller than MIN_SIZE bytes are sent as-is.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+
+    # Encoded /questions payloads (sections, stats, single questions), each with its
+    # compressed variants, kept per worker in an LRU of this many entries.
+    QUESTION_CACHE_SIZE: int = 2000
+    QUESTION_CACHE_TTL_SECONDS: float = 300.0
+
+    # /metrics (Prometheus). When set, scrapers must send "Authorization: Bearer <token>".
+    # Required in production: without it /metrics returns 404 there.
+    METRICS_TOKEN: str = ""
+
+    # Sampling profiler (off by default; the middleware is not installed unless enabled).
+    # Profiles SAMPLE_RATE of requests, plus any carrying an X-Profile-Request token
+    # signed with PROFILING_SECRET (see app.services.profiler.sign_profile_token).
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_SECRET: str = ""
+    PROFILING_OUTPUT_DIR: str = "./profiles"
+    PROFILING_MAX_FILES: int = 200
+
     # Stripe
     STRIPE_SECRET_KEY: str = ""
     STRIPE_PUBLISHABLE_KEY: str = ""
@@ -55,10 +125,53 @@ class Settings(BaseSettings):
     AI_BASE_URL: str = "https://api.openai.com/v1"
     AI_TIMEOUT_SECONDS: float = 25.0
 
+    # Exam autosave: coalesce answer/flag PATCHes in memory and bulk-write them.
+    # FLUSH_SECONDS bounds how much is lost on a crash; MAX_PENDING=1 is write-through.
+    EXAM_AUTOSAVE_ENABLED: bool = False
+    EXAM_AUTOSAVE_FLUSH_SECONDS: float = 5.0
+    EXAM_AUTOSAVE_MAX_PENDING: int = 50
+
+    # FSRS due-date fuzz: spread day intervals over a small range so cards reviewed
+    # together don't all come due together. LOAD_BALANCE picks the least-loaded
+    # day, from a per-user due histogram cached for up to HISTOGRAM_USERS users.
+    FSRS_FUZZ_ENABLED: bool = True
+    FSRS_LOAD_BALANCE: bool = True
+    FSRS_HISTOGRAM_USERS: int = 5000
+    FSRS_HISTOGRAM_TTL_SECONDS: float = 600.0
+
+    # Compiled per-user scheduler settings (step lists, retention, daily limits):
+    # LRU of at most USERS entries, reloaded after TTL_SECONDS for other workers.
+    SCHEDULER_CONFIG_USERS: int = 10000
+    SCHEDULER_CONFIG_TTL_SECONDS: float = 300.0
+
+    # /flashcards/forecast: Monte Carlo runs per forecast, worker threads, and how
+    # long finished forecasts are served from cache (at most CACHE_SIZE of them).
+    # A failed simulation is reported as failed for FAILURE_TTL seconds, then retried.
+    FORECAST_RUNS: int = 64
+    FORECAST_WORKERS: int = 1
+    FORECAST_CACHE_TTL_SECONDS: float = 900.0
+    FORECAST_CACHE_SIZE: int = 500
+    FORECAST_FAILURE_TTL_SECONDS: float = 60.0
+
+    # Flashcard review undo: the last DEPTH reviews per study session are kept in
+    # memory (at most SESSIONS sessions, LRU); older undos read the review log.
+    REVIEW_UNDO_DEPTH: int = 50
+    REVIEW_UNDO_SESSIONS: int = 10000
+
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
     def parse_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
-        return _parse_cors_origins(v) if v else []
+        return _parse_comma_list(v) if v else []
+
+    @field_validator("ADMIN_EMAILS", mode="before")
+    @classmethod
+    def parse_admin_emails(cls, v: Union[str, List[str]]) -> List[str]:
+        return _parse_comma_list(v) if v else []
+
+    @field_validator("DATABASE_REPLICA_URLS", mode="before")
+    @classmethod
+    def parse_replica_urls(cls, v: Union[str, List[str]]) -> List[str]:
+        return _parse_comma_list(v) if v else []
 
 
 @lru_cache
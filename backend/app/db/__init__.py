@@ -1,5 +1,5 @@
 """Database package."""
 from app.db.base import Base
-from app.db.session import SessionLocal, engine, get_db
+from app.db.session import SessionLocal, engine, get_async_db, get_db
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db"]
+__all__ = ["Base", "engine", "SessionLocal", "get_db", "get_async_db"]
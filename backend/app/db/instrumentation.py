@@ -0,0 +1,124 @@
+"""Per-request SQL instrumentation: query count, DB time, slowest statement.
+
+Cursor-execute events on every Engine are timed and recorded into the
+QueryStats bound to the current context (set by QueryStatsMiddleware).
+Sync route handlers run in a threadpool with a copy of the request
+context, so they record into the same QueryStats object.
+"""
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_statement: Optional[str] = None
+    statements: Counter = field(default_factory=Counter)
+    checkouts: int = 0
+    pool_wait_ms: float = 0.0
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def record_checkout(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.pool_wait_ms += wait_ms
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least threshold times (likely N+1 loops)."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [f"{self.count} queries, {self.total_ms:.1f}ms total"]
+        for stmt, n in self.statements.most_common(limit):
+            lines.append(f"  {n}x {' '.join(stmt.split())[:200]}")
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Bind a fresh QueryStats to the current context for the duration of the block."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+_installed = False
+
+
+def install() -> None:
+    """Attach the timing listeners to every Engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+@contextmanager
+def count_queries(*engines: Engine) -> Iterator[QueryStats]:
+    """Record every statement executed on the engines in the block, from any thread.
+
+    For an AsyncEngine pass its ``sync_engine``.
+    """
+    stats = QueryStats()
+    starts: dict[int, float] = {}
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        starts[id(cursor)] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        start = starts.pop(id(cursor), time.perf_counter())
+        stats.record(statement, (time.perf_counter() - start) * 1000)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before)
+        event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield stats
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before)
+            event.remove(engine, "after_cursor_execute", after)
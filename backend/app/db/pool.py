@@ -0,0 +1,126 @@
+"""Connection pool configuration, checkout timing and background liveness.
+
+pool_options() turns the DB_POOL_* settings into create_engine kwargs. In
+DB_PGBOUNCER_MODE pooling is left to PgBouncer: NullPool, and asyncpg's
+prepared-statement caches are off (transaction pooling hands each
+transaction a different server connection).
+
+The Timed* pools record how long each checkout waited into the request's
+QueryStats (Server-Timing ``pool``) and the db_pool_wait_seconds
+histogram, which is what to watch when sizing pools against workers.
+
+pool_pre_ping stays on by default: it is what keeps any one stale pooled
+connection from reaching a request. run_liveness() complements it by
+pinging each engine every DB_LIVENESS_INTERVAL_SECONDS; after a server
+restart the ping raises a disconnect error, which makes SQLAlchemy
+invalidate the whole pool so later checkouts reconnect without each
+paying a failed pre-ping first. It checks out one connection per engine,
+so it cannot replace pre-ping on its own.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Callable, Iterable
+
+from anyio import to_thread
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.config import get_settings
+from app.db.instrumentation import current_query_stats
+from app.services.metrics import DB_POOL_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+def record_pool_wait(seconds: float) -> None:
+    DB_POOL_WAIT.observe(seconds)
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record_checkout(seconds * 1000)
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            record_pool_wait(time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            record_pool_wait(time.perf_counter() - start)
+
+
+def pool_options(url: str, is_async: bool = False) -> dict[str, Any]:
+    """create_engine kwargs for url's pool; SQLite keeps SQLAlchemy's defaults."""
+    if url.startswith("sqlite"):
+        return {}
+    settings = get_settings()
+    if settings.DB_PGBOUNCER_MODE:
+        options: dict[str, Any] = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        return options
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _pooled_server(engine) -> bool:
+    return engine.dialect.name != "sqlite" and isinstance(engine.pool, QueuePool)
+
+
+def ping(engine: Engine) -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        logger.warning("Liveness ping failed for %s", engine.url.render_as_string(), exc_info=True)
+        return False
+
+
+async def ping_async(engine) -> bool:
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        logger.warning("Liveness ping failed for %s", engine.url.render_as_string(), exc_info=True)
+        return False
+
+
+async def run_liveness(
+    sync_engines: Callable[[], Iterable[Engine]],
+    async_engines: Callable[[], Iterable[Any]],
+    interval: float,
+) -> None:
+    """Ping every pooled engine each interval until cancelled (start with asyncio.create_task)."""
+    while True:
+        await asyncio.sleep(interval)
+        for engine in sync_engines():
+            if _pooled_server(engine):
+                await to_thread.run_sync(ping, engine)
+        for engine in async_engines():
+            if _pooled_server(engine):
+                await ping_async(engine)
@@ -0,0 +1,233 @@
+"""Read-replica routing for analytics and catalog reads.
+
+ReplicaRouter hands out sessions on DATABASE_REPLICA_URLS round-robin,
+skipping replicas that failed their last health check (a background
+``SELECT 1`` every REPLICA_HEALTH_INTERVAL_SECONDS), dropped a connection
+mid-request or could not be connected to (mark_failed). It returns None
+-- meaning "use the primary" -- when no replica is healthy or when the
+user wrote within the last REPLICA_PIN_SECONDS, so people read their own
+writes despite replica lag.
+
+Writes are detected on primary sessions tagged with ``info["user_id"]``
+(set by get_current_user, and carried over to the SQLite writer's session
+by run_write): any flush or ORM insert/update/delete marks the session,
+and its commit pins the user. Pins live in process memory,
+so with several workers a read can still land on a worker that did not
+see the write; keep REPLICA_PIN_SECONDS above typical replica lag.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_PINS = 50_000
+
+
+@dataclass
+class Replica:
+    url: str
+    engine: Engine
+    sessions: Optional[sessionmaker] = None
+    healthy: bool = True
+    failures: int = 0
+    _async_sessions: Any = field(default=None, repr=False)
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        urls: list[str],
+        pin_seconds: float = 5.0,
+        health_interval: float = 10.0,
+        engine_factory: Optional[Callable[[str], Engine]] = None,
+        async_engine_factory: Optional[Callable[[str], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if engine_factory is None:
+            from app.db.session import create_db_engine as engine_factory
+        self._async_engine_factory = async_engine_factory
+        self.replicas: list[Replica] = []
+        for url in urls:
+            engine = engine_factory(url)
+            replica = Replica(url, engine)
+            # info["replica"] lets mark_failed() find the replica behind a session.
+            replica.sessions = sessionmaker(bind=engine, autoflush=False, info={"replica": replica})
+            event.listen(engine, "handle_error", self._error_listener(replica))
+            self.replicas.append(replica)
+        self.pin_seconds = pin_seconds
+        self.health_interval = health_interval
+        self._clock = clock
+        self._next = 0
+        self._lock = threading.Lock()
+        self._pins: dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.pinned_reads = 0
+
+    # ── Pinning ──
+
+    def pin(self, user_id: str) -> None:
+        """Route user_id's reads to the primary for pin_seconds."""
+        now = self._clock()
+        with self._lock:
+            if len(self._pins) >= MAX_PINS:
+                self._pins = {u: t for u, t in self._pins.items() if t > now}
+            self._pins[user_id] = now + self.pin_seconds
+
+    def is_pinned(self, user_id: Optional[str]) -> bool:
+        if user_id is None:
+            return False
+        expires = self._pins.get(user_id)
+        return expires is not None and expires > self._clock()
+
+    # ── Selection ──
+
+    def choose(self, user_id: Optional[str] = None) -> Optional[Replica]:
+        """Next healthy replica round-robin, or None to read from the primary."""
+        if self.is_pinned(user_id):
+            self.pinned_reads += 1
+            return None
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.healthy:
+                    self.replica_reads += 1
+                    return replica
+        self.primary_reads += 1
+        return None
+
+    def session(self, user_id: Optional[str] = None) -> Optional[Session]:
+        replica = self.choose(user_id)
+        return replica.sessions() if replica else None
+
+    def async_session(self, user_id: Optional[str] = None):
+        replica = self.choose(user_id)
+        if replica is None:
+            return None
+        if replica._async_sessions is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+
+            factory = self._async_engine_factory
+            if factory is None:
+                from app.db.session import create_async_db_engine as factory
+            replica._async_sessions = async_sessionmaker(
+                factory(replica.url), autoflush=False, expire_on_commit=False, info={"replica": replica}
+            )
+        return replica._async_sessions()
+
+    # ── Health ──
+
+    def _error_listener(self, replica: Replica):
+        def on_error(context) -> None:
+            if context.is_disconnect:
+                self._mark(replica, False)
+
+        return on_error
+
+    def mark_failed(self, session) -> None:
+        """Take the replica behind session (sync or async) out of rotation until its next good health check."""
+        replica = session.info.get("replica")
+        if replica is not None:
+            self._mark(replica, False)
+
+    def _mark(self, replica: Replica, healthy: bool) -> None:
+        if replica.healthy != healthy:
+            logger.warning("Replica %s is %s", replica.engine.url.render_as_string(), "up" if healthy else "down")
+        replica.healthy = healthy
+        if not healthy:
+            replica.failures += 1
+
+    def check_health(self) -> None:
+        """Probe every replica with SELECT 1 and update its healthy flag."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except Exception:
+                self._mark(replica, False)
+            else:
+                self._mark(replica, True)
+
+    def start(self) -> None:
+        """Start the background health-check thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.replicas),
+            "healthy": sum(1 for r in self.replicas if r.healthy),
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+        }
+
+
+@lru_cache
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """Process-wide router, or None when DATABASE_REPLICA_URLS is empty."""
+    settings = get_settings()
+    if not settings.DATABASE_REPLICA_URLS:
+        return None
+    return ReplicaRouter(
+        settings.DATABASE_REPLICA_URLS,
+        pin_seconds=settings.REPLICA_PIN_SECONDS,
+        health_interval=settings.REPLICA_HEALTH_INTERVAL_SECONDS,
+    )
+
+
+# ── Write detection on primary sessions ──
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session: Session) -> None:
+    if not session.info.pop("wrote", False):
+        return
+    user_id = session.info.get("user_id")
+    router = get_replica_router() if user_id else None
+    if router is not None:
+        router.pin(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_write_mark(session: Session) -> None:
+    session.info.pop("wrote", None)
@@ -1,43 +1,60 @@
-"""Database engine and session factory."""
+"""Database engine and session factory.
+
+The sync engine/SessionLocal serve most routes. High-QPS read routes use
+get_async_db instead, which runs on an AsyncEngine (asyncpg for Postgres,
+aiosqlite for SQLite) so waiting on the database does not hold one of
+Starlette's threadpool threads.
+"""
 import logging
 from contextlib import contextmanager
-from typing import Generator
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import get_settings
 from app.db.base import Base
+from app.db.pool import pool_options
+from app.db.sqlite import apply_sqlite_profile, is_file_sqlite
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
 
-def get_engine():
+def create_db_engine(url: str, **engine_kwargs):
+    """Sync engine for url with the configured pool and SQLite settings (primary or replica).
+
+    engine_kwargs override the pool defaults (e.g. the SQLite writer's single connection).
+    """
     settings = get_settings()
     connect_args = {}
-    is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+    is_sqlite = url.startswith("sqlite")
 
     if is_sqlite:
         connect_args["check_same_thread"] = False
 
-    pool_kwargs = {}
-    if not is_sqlite:
-        pool_kwargs = {
-            "pool_size": 10,
-            "max_overflow": 20,
-            "pool_recycle": 1800,
-            "pool_pre_ping": True,
-        }
+    options = {**pool_options(url), **engine_kwargs}
+    connect_args.update(options.pop("connect_args", {}))
 
     engine = create_engine(
-        settings.DATABASE_URL,
+        url,
         connect_args=connect_args,
         echo=settings.LOG_LEVEL.upper() == "DEBUG",
-        **pool_kwargs,
+        **options,
     )
+    if is_sqlite and settings.SQLITE_TUNING_ENABLED:
+        apply_sqlite_profile(engine, file_backed=is_file_sqlite(url))
     return engine
 
 
+def get_engine():
+    return create_db_engine(get_settings().DATABASE_URL)
+
+
 engine = get_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -67,3 +84,66 @@ def get_db() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a sync DATABASE_URL for its async driver.
+
+    ``postgres://`` and ``postgresql+psycopg2://`` become ``postgresql+asyncpg://``
+    (asyncpg takes ``ssl`` instead of libpq's ``sslmode``); ``sqlite://`` becomes
+    ``sqlite+aiosqlite://``. URLs that already name an async driver are kept.
+    """
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS or parsed.get_driver_name() in ("aiosqlite", "asyncpg"):
+        return url
+    parsed = parsed.set(drivername=_ASYNC_DRIVERS[backend])
+    if backend == "postgresql" and "sslmode" in parsed.query:
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str):
+    """AsyncEngine for a sync-style url (driver rewritten by async_database_url)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    settings = get_settings()
+    url = async_database_url(url)
+    engine = create_async_engine(url, echo=settings.LOG_LEVEL.upper() == "DEBUG", **pool_options(url, is_async=True))
+    if url.startswith("sqlite") and settings.SQLITE_TUNING_ENABLED:
+        apply_sqlite_profile(engine.sync_engine, file_backed=is_file_sqlite(url))
+    return engine
+
+
+@lru_cache
+def get_async_engine():
+    """AsyncEngine for get_async_db. Built on first use so the async drivers stay optional."""
+    settings = get_settings()
+    return create_async_db_engine(settings.ASYNC_DATABASE_URL or settings.DATABASE_URL)
+
+
+@lru_cache
+def get_async_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    """FastAPI dependency: yield an AsyncSession and commit/rollback on exit."""
+    db = get_async_sessionmaker()()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
@@ -0,0 +1,182 @@
+"""SQLite performance profile and single-writer queue.
+
+apply_sqlite_profile() sets per-connection pragmas on an engine: WAL
+journal (readers never block the writer), synchronous=NORMAL (durable
+across app crashes, fsync only at checkpoints), a larger page cache,
+memory-mapped reads, busy_timeout and in-memory temp tables.
+
+SQLite allows one writer at a time; under concurrent exam submissions
+separate connections racing for the write lock surface as "database is
+locked". SQLiteWriter owns one dedicated connection and runs write jobs
+from a queue in order, so the app's own writes never contend. Use
+run_write(db, fn) from routes; it falls back to db when the writer is off.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas(file_backed: bool = True) -> list[str]:
+    """PRAGMA statements for the configured profile (journal_mode only applies to files)."""
+    settings = get_settings()
+    pragmas = [
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",  # negative = KiB
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if file_backed:
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, file_backed: bool = True) -> None:
+    """Run sqlite_pragmas() on every new connection of engine (sync, or an AsyncEngine's sync_engine)."""
+    pragmas = sqlite_pragmas(file_backed)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record) -> None:
+        cursor = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class SQLiteWriter:
+    """Run write jobs one at a time on a dedicated connection.
+
+    ``run(fn)`` queues ``fn(session)``, commits it on the writer thread and
+    returns its result (or re-raises its exception). Return plain values:
+    ORM objects come back detached from the caller's session.
+    """
+
+    def __init__(self, engine: Engine, max_queue: int = 1000):
+        self.engine = engine
+        self._sessions = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.jobs = 0
+        self.failures = 0
+        self.wait_ms_total = 0.0
+        self.max_depth = 0
+
+    def submit(self, fn: Callable[[Session], T]) -> "Future[T]":
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((fn, future, time.perf_counter()))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return future
+
+    def run(self, fn: Callable[[Session], T], timeout: Optional[float] = None) -> T:
+        return self.submit(fn).result(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            fn, future, queued_at = job
+            self.wait_ms_total += (time.perf_counter() - queued_at) * 1000
+            if not future.set_running_or_notify_cancel():
+                continue
+            db = self._sessions()
+            try:
+                result = fn(db)
+                db.commit()
+            except BaseException as exc:
+                db.rollback()
+                self.failures += 1
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+            finally:
+                db.close()
+                self.jobs += 1
+
+    def stop(self) -> None:
+        """Finish queued jobs, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=10)
+
+    def stats(self) -> dict:
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "queued": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "wait_ms_total": round(self.wait_ms_total, 1),
+        }
+
+
+@lru_cache
+def get_sqlite_writer() -> Optional[SQLiteWriter]:
+    """Process-wide writer for a file-backed SQLite DATABASE_URL with SQLITE_SINGLE_WRITER on."""
+    settings = get_settings()
+    if not settings.SQLITE_SINGLE_WRITER or not is_file_sqlite(settings.DATABASE_URL):
+        return None
+    from app.db.session import create_db_engine
+
+    # pool_size=1/max_overflow=0: exactly one connection ever writes.
+    return SQLiteWriter(create_db_engine(settings.DATABASE_URL, pool_size=1, max_overflow=0))
+
+
+def run_write(db: Session, fn: Callable[[Session], T]) -> T:
+    """Run fn's writes through the SQLite writer when enabled, else on db; commits either way.
+
+    With the writer, db is committed first so its read snapshot ends and the
+    route sees the writer's changes when it reloads objects afterwards. The
+    writer session inherits db's ``info["user_id"]``, so its commit pins the
+    user to the primary like a write on db would (see app.db.replicas).
+    """
+    writer = get_sqlite_writer()
+    if writer is None:
+        result = fn(db)
+        db.commit()
+        return result
+    db.commit()
+    user_id = db.info.get("user_id")
+    if user_id is None:
+        return writer.run(fn)
+
+    def job(w: Session) -> T:
+        w.info["user_id"] = user_id
+        return fn(w)
+
+    return writer.run(job)
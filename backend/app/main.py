@@ -1,4 +1,5 @@
 """FastAPI application entrypoint."""
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -8,30 +9,24 @@ from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
-from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.api.responses import DEFAULT_RESPONSE_CLASS
 from app.config import get_settings
-from app.api import health, auth, questions, progress, exams, ai, exam_sessions, notes, flashcards, bookmarks, study_profile, study_plan, billing
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Inject standard security headers into every response."""
-
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = (
-            "camera=(), microphone=(), geolocation=(), payment=()"
-        )
-        settings = get_settings()
-        if settings.ENVIRONMENT == "production":
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=63072000; includeSubDomains; preload"
-            )
-        return response
+from app.db import instrumentation
+from app.db.replicas import get_replica_router
+from app.db.pool import run_liveness
+from app.db.session import SessionLocal, engine, get_async_engine
+from app.db.sqlite import get_sqlite_writer
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.security_headers import SecurityHeadersMiddleware
+from app.services.answer_buffer import get_answer_buffer
+from app.services.forecast import get_forecast_jobs
+from app.services.jwks import get_jwks_manager
+from app.api import health, auth, questions, progress, exams, ai, exam_sessions, notes, flashcards, bookmarks, study_profile, study_plan, billing, metrics, profiles
+
 
 logging.basicConfig(
     level=get_settings().LOG_LEVEL,
@@ -52,8 +47,40 @@ async def lifespan(app: FastAPI):
                 "Set SECRET_KEY to a strong random value (openssl rand -hex 32)."
             )
         logger.warning("SECRET_KEY is the default. Set SECRET_KEY before deploying.")
+    answer_buffer = get_answer_buffer()
+    if answer_buffer:
+        answer_buffer.start(SessionLocal, settings.EXAM_AUTOSAVE_FLUSH_SECONDS)
+    jwks_manager = get_jwks_manager(settings.SUPABASE_URL) if settings.SUPABASE_URL else None
+    if jwks_manager:
+        jwks_manager.start()
+    replica_router = get_replica_router()
+    if replica_router:
+        replica_router.start()
+    liveness = None
+    if settings.DB_LIVENESS_INTERVAL_SECONDS > 0:
+        liveness = asyncio.create_task(run_liveness(
+            lambda: [engine] + ([r.engine for r in replica_router.replicas] if replica_router else []),
+            # Only ping the async engine once a request has built it.
+            lambda: [get_async_engine()] if get_async_engine.cache_info().currsize else [],
+            settings.DB_LIVENESS_INTERVAL_SECONDS,
+        ))
     logger.info("Application startup")
     yield
+    if liveness:
+        liveness.cancel()
+    if replica_router:
+        replica_router.stop()
+    if jwks_manager:
+        jwks_manager.stop()
+    if answer_buffer:
+        answer_buffer.stop(SessionLocal)
+    sqlite_writer = get_sqlite_writer()
+    if sqlite_writer:
+        sqlite_writer.stop()
+    if get_forecast_jobs.cache_info().currsize:
+        get_forecast_jobs().stop()
+        # A stopped executor takes no new work; the next lifespan builds a fresh one.
+        get_forecast_jobs.cache_clear()
     logger.info("Application shutdown")
 
 
@@ -61,6 +88,7 @@ app = FastAPI(
     title="step2ck API",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=DEFAULT_RESPONSE_CLASS,
 )
 
 app.state.limiter = limiter
@@ -73,7 +101,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(SecurityHeadersMiddleware, environment=get_settings().ENVIRONMENT)
+if get_settings().COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=get_settings().COMPRESSION_MIN_SIZE)
+
+if get_settings().SQL_INSTRUMENTATION_ENABLED:
+    instrumentation.install()
+    app.add_middleware(
+        QueryStatsMiddleware,
+        n_plus_one_threshold=get_settings().SQL_N_PLUS_ONE_THRESHOLD,
+        slow_request_ms=get_settings().SQL_SLOW_REQUEST_MS,
+    )
+app.add_middleware(MetricsMiddleware)
+if get_settings().PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=get_settings().PROFILING_OUTPUT_DIR,
+        sample_rate=get_settings().PROFILING_SAMPLE_RATE,
+        interval_ms=get_settings().PROFILING_INTERVAL_MS,
+        secret=get_settings().PROFILING_SECRET,
+        max_files=get_settings().PROFILING_MAX_FILES,
+    )
 
 
 @app.exception_handler(Exception)
@@ -91,6 +139,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 
 app.include_router(health.router, prefix="/health", tags=["health"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(questions.router, prefix="/questions", tags=["questions"])
 app.include_router(progress.router, prefix="/progress", tags=["progress"])
@@ -103,3 +152,4 @@ app.include_router(bookmarks.router, prefix="/bookmarks", tags=["bookmarks"])
 app.include_router(study_profile.router, prefix="/study-profile", tags=["study-profile"])
 app.include_router(study_plan.router, prefix="/study-plan", tags=["study-plan"])
 app.include_router(billing.router, prefix="/billing", tags=["billing"])
+app.include_router(profiles.router, prefix="/admin/profiles", tags=["admin"])
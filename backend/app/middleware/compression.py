@@ -0,0 +1,84 @@
+"""Negotiated response compression above a size threshold."""
+from __future__ import annotations
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.compression import compress, is_compressible, negotiate, stream_compressor
+
+
+class CompressionMiddleware:
+    """Pure ASGI gzip/br/zstd compression.
+
+    Single-message bodies are compressed in one shot when at least
+    minimum_size bytes. Streamed bodies (more_body=True) are compressed
+    chunk by chunk with a flush after each, so nothing is held back.
+    Responses that already carry a Content-Encoding (e.g. precompressed
+    payloads) or a non-text media type pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                passthrough = (
+                    "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message  # held until the first body chunk decides
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                    compressor = stream_compressor(encoding)
+                else:
+                    body = compress(encoding, body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    start = None
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+                start = None
+
+            data = compressor.compress(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,37 @@
+"""Record per-route request latency and status counts."""
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import HTTP_LATENCY, HTTP_REQUESTS, route_label
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding http_requests_total and http_request_duration_seconds."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_label(scope) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
@@ -0,0 +1,78 @@
+"""Sample-profile a fraction of requests (or admin-signed ones) to .collapsed files."""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+
+from anyio import to_thread
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.metrics import route_label
+from app.services.profiler import SamplingProfiler, verify_profile_token, write_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-request"
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; only installed when PROFILING_ENABLED is set.
+
+    A request is profiled when random() < sample_rate or when it carries a
+    valid X-Profile-Request token signed with secret. One request is
+    profiled at a time; others pass through untouched while it runs.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: str,
+        sample_rate: float = 0.0,
+        interval_ms: float = 5.0,
+        secret: str = "",
+        max_files: int = 200,
+    ):
+        self.app = app
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.secret = secret
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if self.secret:
+            return verify_profile_token(self.secret, Headers(scope=scope).get(PROFILE_HEADER, ""))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(self.interval)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stacks = await to_thread.run_sync(profiler.stop)  # joins the sampler thread
+            self._busy.release()
+            duration_ms = (time.perf_counter() - start) * 1000
+            route = route_label(scope) or "unmatched"
+            if stacks:
+                try:
+                    await to_thread.run_sync(
+                        write_profile,
+                        self.output_dir, scope.get("method", ""), route, duration_ms, stacks, self.max_files,
+                    )
+                except OSError as exc:
+                    logger.warning("Could not write profile for %s: %s", route, exc)
@@ -0,0 +1,87 @@
+"""Expose per-request SQL stats as Server-Timing headers and structured logs."""
+from __future__ import annotations
+
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import QueryStats, _current
+from app.services.metrics import route_label
+
+logger = logging.getLogger("app.sql")
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware that binds a QueryStats to each HTTP request.
+
+    Adds ``Server-Timing: db;dur=..;desc="N queries", pool;dur=.., app;dur=..``
+    to the response (pool = time spent waiting for connection checkouts) and
+    logs one line per request. Requests that repeat a statement
+    at least n_plus_one_threshold times are logged as WARNING.
+    """
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 10, slow_request_ms: float = 500.0):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+                    f"pool;dur={stats.pool_wait_ms:.1f}, app;dur={elapsed_ms:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._log(scope, stats, (time.perf_counter() - start) * 1000)
+
+    def _log(self, scope: Scope, stats: QueryStats, elapsed_ms: float) -> None:
+        path = route_label(scope) or scope.get("path", "")
+        fields = {
+            "method": scope.get("method"),
+            "route": path,
+            "queries": stats.count,
+            "db_ms": round(stats.total_ms, 1),
+            "pool_wait_ms": round(stats.pool_wait_ms, 1),
+            "duration_ms": round(elapsed_ms, 1),
+            "slowest_ms": round(stats.slowest_ms, 1),
+            "slowest_statement": stats.slowest_statement,
+        }
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated:
+            stmt, n = repeated[0]
+            logger.warning(
+                "Possible N+1 on %s %s: statement ran %dx (%d queries total): %s",
+                fields["method"], path, n, stats.count, " ".join(stmt.split())[:200],
+                extra={"sql": fields},
+            )
+        elif elapsed_ms >= self.slow_request_ms:
+            logger.info(
+                "%s %s queries=%d db_ms=%.1f duration_ms=%.1f",
+                fields["method"], path, stats.count, stats.total_ms, elapsed_ms,
+                extra={"sql": fields},
+            )
+        else:
+            logger.debug(
+                "%s %s queries=%d db_ms=%.1f duration_ms=%.1f",
+                fields["method"], path, stats.count, stats.total_ms, elapsed_ms,
+                extra={"sql": fields},
+            )
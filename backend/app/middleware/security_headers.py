@@ -0,0 +1,51 @@
+"""Standard security headers on every HTTP response."""
+from __future__ import annotations
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_BASE_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ("Permissions-Policy", "camera=(), microphone=(), geolocation=(), payment=()"),
+)
+_HSTS = ("Strict-Transport-Security", "max-age=63072000; includeSubDomains; preload")
+
+
+def build_security_headers(environment: str) -> list[tuple[bytes, bytes]]:
+    headers = list(_BASE_HEADERS)
+    if environment == "production":
+        headers.append(_HSTS)
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware appending a precomputed header list in http.response.start.
+
+    Unlike BaseHTTPMiddleware it adds no task or body wrapping, so streaming
+    responses pass through chunk by chunk. Headers the app already set win.
+    """
+
+    def __init__(self, app: ASGIApp, environment: str = "development"):
+        self.app = app
+        self.headers = build_security_headers(environment)
+        self._names = frozenset(k for k, _ in self.headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                raw = list(message.get("headers", ()))
+                if any(k.lower() in self._names for k, _ in raw):
+                    present = {k.lower() for k, _ in raw}
+                    raw.extend(h for h in self.headers if h[0] not in present)
+                else:
+                    raw.extend(self.headers)
+                message["headers"] = raw
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -6,6 +6,8 @@ from app.models.exam_session import ExamSession, ExamSessionAnswer
 from app.models.note import Note
 from app.models.flashcard import FlashcardDeck, Flashcard
 from app.models.flashcard_settings import FlashcardSettings
+from app.models.flashcard_review_log import FlashcardReviewLog
+from app.models.tag import FlashcardTag, NoteTag
 from app.models.bookmark import Bookmark
 from app.models.study_profile import UserStudyProfile
 from app.models.study_plan import StudyPlan
@@ -21,6 +23,9 @@ __all__ = [
     "FlashcardDeck",
     "Flashcard",
     "FlashcardSettings",
+    "FlashcardReviewLog",
+    "FlashcardTag",
+    "NoteTag",
     "Bookmark",
     "UserStudyProfile",
     "StudyPlan",
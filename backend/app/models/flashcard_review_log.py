@@ -0,0 +1,35 @@
+"""FlashcardReviewLog model - one row per flashcard review."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class FlashcardReviewLog(Base):
+    __tablename__ = "flashcard_review_logs"
+    __table_args__ = (
+        Index("ix_flashcard_review_logs_user_reviewed", "user_id", "reviewed_at"),
+        # Undo's log fallback: the latest review of a (user, session).
+        Index("ix_flashcard_review_logs_user_session", "user_id", "session_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    card_id: Mapped[int] = mapped_column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False, index=True)
+    rating: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Card state before the review ("new" rows count against daily_new_cards).
+    state: Mapped[str] = mapped_column(String(16), nullable=False)
+    reviewed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Client study session, for stacked undo within a session.
+    session_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # FSRS fields before the review (app.services.review_undo.snapshot); undo writes them back.
+    snapshot: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<FlashcardReviewLog card={self.card_id} rating={self.rating}>"
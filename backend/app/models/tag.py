@@ -0,0 +1,36 @@
+"""Tag index models - one row per (item, tag), kept in sync with the items' tags strings."""
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class FlashcardTag(Base):
+    __tablename__ = "flashcard_tags"
+    __table_args__ = (
+        # Tag filters and facets: (user_id, tag) -> card ids.
+        Index("ix_flashcard_tags_user_tag", "user_id", "tag", "card_id"),
+    )
+
+    card_id: Mapped[int] = mapped_column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), primary_key=True)
+    tag: Mapped[str] = mapped_column(String(100), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(36), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<FlashcardTag card={self.card_id} tag={self.tag!r}>"
+
+
+class NoteTag(Base):
+    __tablename__ = "note_tags"
+    __table_args__ = (
+        Index("ix_note_tags_user_tag", "user_id", "tag", "note_id"),
+    )
+
+    note_id: Mapped[int] = mapped_column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    tag: Mapped[str] = mapped_column(String(100), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(36), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<NoteTag note={self.note_id} tag={self.tag!r}>"
@@ -33,6 +33,10 @@ class ExamSessionUpdate(BaseModel):
     completed_at: Optional[datetime] = None
 
 
+class ExamSessionComplete(BaseModel):
+    record_progress: bool = False
+
+
 class ExamSessionResponse(BaseModel):
     id: int
     user_id: str
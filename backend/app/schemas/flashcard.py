@@ -1,8 +1,8 @@
 """Schemas for flashcards and decks."""
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 
 class FlashcardDeckCreate(BaseModel):
@@ -51,6 +51,8 @@ class FlashcardUpdate(BaseModel):
 
 class FlashcardReview(BaseModel):
     rating: int  # 1=Again, 2=Hard, 3=Good, 4=Easy (FSRS scale)
+    duration_ms: Optional[int] = None
+    session_id: Optional[str] = Field(None, max_length=64)  # study session, for undo
 
 
 class FlashcardResponse(BaseModel):
@@ -81,6 +83,47 @@ class FlashcardResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class FlashcardReviewBatchItem(BaseModel):
+    card_id: int
+    rating: int = Field(ge=1, le=4)
+    reviewed_at: datetime
+    duration_ms: Optional[int] = None
+
+
+class FlashcardReviewBatch(BaseModel):
+    reviews: list[FlashcardReviewBatchItem] = Field(max_length=1000)
+    session_id: Optional[str] = Field(None, max_length=64)
+
+
+class FlashcardReviewBatchResponse(BaseModel):
+    """Final state of every reviewed card; skipped holds indexes into the request's reviews."""
+    cards: list[FlashcardResponse]
+    applied: int
+    skipped: list[int] = []
+
+
+class ReviewQueueCounts(BaseModel):
+    learning: int
+    review: int
+    new: int
+
+
+class ReviewQueueResponse(BaseModel):
+    """Session order as card ids; cards holds the first page, next_cursor fetches the rest."""
+    ids: list[int]
+    counts: ReviewQueueCounts
+    cards: list[FlashcardResponse]
+    intervals: dict[int, "IntervalPreview"] = {}
+    next_cursor: Optional[str] = None
+
+
+class ReviewQueuePage(BaseModel):
+    """A page of queue cards with each card's per-rating interval preview."""
+    cards: list[FlashcardResponse]
+    intervals: dict[int, "IntervalPreview"] = {}
+    next_cursor: Optional[str] = None
+
+
 class ScheduleInfo(BaseModel):
     days: int
     minutes: int
@@ -101,6 +144,87 @@ class IntervalPreview(BaseModel):
     easy: ScheduleInfo
 
 
+ReviewQueueResponse.model_rebuild()
+ReviewQueuePage.model_rebuild()
+
+
+# ── Bulk Card Operations ──
+
+BulkAction = Literal["move", "tag", "untag", "suspend", "unsuspend", "reset", "delete"]
+
+
+class FlashcardFilter(BaseModel):
+    """Cards matching every given condition; due_after/due_before bound next_review."""
+    deck_id: Optional[int] = None
+    tag: Optional[str] = None
+    state: Optional[Literal["new", "learning", "review", "relearning"]] = None
+    flagged: Optional[bool] = None
+    suspended: Optional[bool] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def _not_empty(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("filter needs at least one condition")
+        return self
+
+
+class FlashcardBulkOperation(BaseModel):
+    """Apply action to card_ids or to every card matching filter (exactly one)."""
+    action: BulkAction
+    card_ids: Optional[list[int]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[FlashcardFilter] = None
+    deck_id: Optional[int] = None  # target deck for move
+    tag: Optional[str] = Field(None, min_length=1, max_length=100)  # for tag/untag
+
+    @model_validator(mode="after")
+    def _check(self):
+        if (self.card_ids is None) == (self.filter is None):
+            raise ValueError("pass exactly one of card_ids or filter")
+        if self.action == "move" and self.deck_id is None:
+            raise ValueError("move needs deck_id")
+        if self.action in ("tag", "untag"):
+            if self.tag is None or "," in self.tag or not self.tag.strip():
+                raise ValueError("tag and untag need a tag without commas")
+            self.tag = self.tag.strip()
+        return self
+
+
+class FlashcardBulkResponse(BaseModel):
+    action: BulkAction
+    affected: int
+
+
+# ── Workload Forecast ──
+
+class ForecastDay(BaseModel):
+    day: int  # days from today
+    reviews: float
+    reviews_p90: float
+    new_cards: float
+    retention: float
+
+
+class ForecastResult(BaseModel):
+    retention: float
+    days: list[ForecastDay]
+    average_daily_reviews: float
+    total_reviews: float
+    average_retention: float
+    memorized: float  # expected number of cards recalled on the last day
+    runs: int
+
+
+class ForecastResponse(BaseModel):
+    """Finished forecasts; retention targets still being simulated are listed in pending,
+    targets whose simulation failed (recently) in failed."""
+    status: Literal["ready", "pending", "failed"]
+    forecasts: list[ForecastResult]
+    pending: list[float] = []
+    failed: list[float] = []
+
+
 # ── Generation Sources ──
 
 class GenerationSessionSource(BaseModel):
@@ -0,0 +1,10 @@
+"""Schemas for request profiles."""
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class ProfileFileResponse(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
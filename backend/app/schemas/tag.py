@@ -0,0 +1,7 @@
+"""Schemas for tag facets."""
+from pydantic import BaseModel
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
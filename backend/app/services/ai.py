@@ -2,16 +2,35 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Optional
 
 import httpx
 
 from app.config import get_settings
 from app.models import Question
+from app.services.metrics import AI_LATENCY, AI_REQUESTS
 
 logger = logging.getLogger(__name__)
 
 
+def _post_chat(operation: str, url: str, headers: dict, payload: dict, timeout: float) -> httpx.Response:
+    """POST a chat completion, recording upstream latency and outcome metrics."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            res = client.post(url, headers=headers, json=payload)
+            if res.is_error:
+                outcome = "http_error"
+            res.raise_for_status()
+        outcome = "ok"
+        return res
+    finally:
+        AI_LATENCY.observe(time.perf_counter() - start, operation)
+        AI_REQUESTS.inc(operation, outcome)
+
+
 def _format_choices(choices: dict[str, str]) -> str:
     out: list[str] = []
     for key in sorted(choices.keys()):
@@ -161,9 +180,7 @@ def generate_ai_flashcards(
     url = f"{settings.AI_BASE_URL.rstrip('/')}/chat/completions"
 
     try:
-        with httpx.Client(timeout=settings.AI_TIMEOUT_SECONDS) as client:
-            res = client.post(url, headers=headers, json=payload)
-            res.raise_for_status()
+        res = _post_chat("flashcards", url, headers, payload, settings.AI_TIMEOUT_SECONDS)
     except httpx.HTTPStatusError as exc:
         logger.warning("AI flashcard API error %s: %s", exc.response.status_code, exc)
         raise AIFlashcardError(
@@ -275,9 +292,7 @@ def generate_ai_explanation(
     url = f"{settings.AI_BASE_URL.rstrip('/')}/chat/completions"
 
     try:
-        with httpx.Client(timeout=settings.AI_TIMEOUT_SECONDS) as client:
-            res = client.post(url, headers=headers, json=payload)
-            res.raise_for_status()
+        res = _post_chat("explain", url, headers, payload, settings.AI_TIMEOUT_SECONDS)
         data = res.json()
         content = (
             data.get("choices", [{}])[0]
@@ -0,0 +1,239 @@
+"""Write-coalescing autosave buffer for in-progress exam answers.
+
+Answer and flag toggles are merged into a per-session in-memory snapshot and
+written back as one bulk UPDATE by primary key, either by the background
+flusher every EXAM_AUTOSAVE_FLUSH_SECONDS or synchronously when a session is
+read, completed, or accumulates EXAM_AUTOSAVE_MAX_PENDING dirty answers.
+
+Completing a session closes its buffer: pending deltas are written under the
+same lock that marks it closed, and later writes raise SessionClosedError
+instead of being buffered behind the final score.
+
+The buffer is per process. Deployments running several workers must pin a
+session to one worker (or keep autosave off) so reads see buffered writes.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.exam_session import ExamSession, ExamSessionAnswer
+
+logger = logging.getLogger(__name__)
+
+ANSWER_FIELDS = ("answer_selected", "correct", "time_spent_seconds", "flagged")
+_IDLE_EVICT_SECONDS = 3600
+
+
+class SessionClosedError(Exception):
+    """Raised when answers are written to a session that is completed or completing."""
+
+
+@dataclass
+class _SessionBuffer:
+    user_id: str
+    answers: dict[str, dict[str, Any]]  # question_id -> row snapshot
+    dirty: dict[int, dict[str, Any]] = field(default_factory=dict)  # answer id -> pending delta
+    touched: float = field(default_factory=time.monotonic)
+    closed: bool = False
+
+
+def _snapshot(answer: ExamSessionAnswer) -> dict[str, Any]:
+    return {
+        "id": answer.id,
+        "question_id": answer.question_id,
+        "answer_selected": answer.answer_selected,
+        "correct": answer.correct,
+        "time_spent_seconds": answer.time_spent_seconds,
+        "flagged": answer.flagged,
+        "order_index": answer.order_index,
+    }
+
+
+class AnswerBuffer:
+    """Per-process buffer of answer deltas keyed by exam session."""
+
+    def __init__(self, max_pending: int = 50):
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()
+        self._sessions: dict[int, _SessionBuffer] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self, db: Session, session_id: int, user_id: str) -> Optional[_SessionBuffer]:
+        owned = db.query(ExamSession.status).filter(
+            ExamSession.id == session_id, ExamSession.user_id == user_id
+        ).first()
+        if not owned:
+            return None
+        if owned.status == "completed":
+            raise SessionClosedError(session_id)
+        rows = db.query(ExamSessionAnswer).filter(ExamSessionAnswer.session_id == session_id).all()
+        return _SessionBuffer(user_id=user_id, answers={r.question_id: _snapshot(r) for r in rows})
+
+    def apply(
+        self,
+        db: Session,
+        session_id: int,
+        user_id: str,
+        updates: list[tuple[str, dict[str, Any]]],
+    ) -> Optional[list[dict[str, Any]]]:
+        """Merge (question_id, delta) pairs into the session buffer.
+
+        Returns the resulting row snapshots for the questions that exist in
+        the session, or None if the session does not exist or belongs to
+        another user. Only the first touch of a session hits the database.
+        Raises SessionClosedError once the session is completed or completing.
+        """
+        with self._lock:
+            buf = self._sessions.get(session_id)
+        if buf is None:
+            loaded = self._load(db, session_id, user_id)
+            if loaded is None:
+                return None
+            with self._lock:
+                buf = self._sessions.setdefault(session_id, loaded)
+        if buf.user_id != user_id:
+            return None
+
+        result: list[dict[str, Any]] = []
+        with self._lock:
+            if buf.closed:
+                raise SessionClosedError(session_id)
+            for question_id, delta in updates:
+                row = buf.answers.get(question_id)
+                if row is None:
+                    continue
+                delta = {k: v for k, v in delta.items() if k in ANSWER_FIELDS}
+                row.update(delta)
+                buf.dirty.setdefault(row["id"], {}).update(delta)
+                result.append(dict(row))
+            buf.touched = time.monotonic()
+            should_flush = len(buf.dirty) >= self.max_pending
+
+        if should_flush:
+            self.flush(db, session_id)
+        return result
+
+    def pending(self, session_id: int) -> int:
+        with self._lock:
+            buf = self._sessions.get(session_id)
+            return len(buf.dirty) if buf else 0
+
+    def flush(self, db: Session, session_id: int) -> int:
+        """Write one session's pending deltas in a single bulk UPDATE and commit."""
+        with self._lock:
+            buf = self._sessions.get(session_id)
+            if not buf or not buf.dirty:
+                return 0
+            pending, buf.dirty = buf.dirty, {}
+
+        try:
+            db.execute(
+                update(ExamSessionAnswer),
+                [{"id": answer_id, **delta} for answer_id, delta in pending.items()],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                # Newer deltas that arrived during the failed write win.
+                for answer_id, delta in pending.items():
+                    buf.dirty[answer_id] = {**delta, **buf.dirty.get(answer_id, {})}
+            raise
+        return len(pending)
+
+    def flush_all(self, session_factory: Callable[[], Session]) -> int:
+        """Flush every dirty session and evict idle clean ones."""
+        now = time.monotonic()
+        with self._lock:
+            dirty_ids = [sid for sid, b in self._sessions.items() if b.dirty]
+            for sid in [sid for sid, b in self._sessions.items()
+                        if not b.dirty and now - b.touched > _IDLE_EVICT_SECONDS]:
+                del self._sessions[sid]
+        if not dirty_ids:
+            return 0
+
+        written = 0
+        db = session_factory()
+        try:
+            for sid in dirty_ids:
+                try:
+                    written += self.flush(db, sid)
+                except Exception:
+                    logger.exception("Autosave flush failed for exam session %s", sid)
+        finally:
+            db.close()
+        return written
+
+    def close(self, db: Session, session_id: int, user_id: str) -> int:
+        """Stop buffering a session and write out what is pending.
+
+        Marking the buffer closed and taking its deltas happen under one lock,
+        so no delta can slip in between the final flush and completion. Follow
+        with discard() once the session is committed as completed, or reopen()
+        if completing it failed.
+        """
+        with self._lock:
+            buf = self._sessions.get(session_id)
+            if buf is None:
+                buf = self._sessions[session_id] = _SessionBuffer(user_id=user_id, answers={})
+            buf.closed = True
+        return self.flush(db, session_id)
+
+    def reopen(self, session_id: int) -> None:
+        """Undo close() after a failed completion; the next write reloads from the database."""
+        with self._lock:
+            buf = self._sessions.get(session_id)
+            if buf is None:
+                return
+            if buf.dirty:
+                buf.closed = False
+            else:
+                del self._sessions[session_id]
+
+    def discard(self, session_id: int) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def start(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """Start the background flusher thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def _run() -> None:
+            while not self._stop.wait(interval):
+                self.flush_all(session_factory)
+
+        self._thread = threading.Thread(target=_run, name="exam-autosave", daemon=True)
+        self._thread.start()
+
+    def stop(self, session_factory: Callable[[], Session]) -> None:
+        """Stop the flusher and write out anything still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush_all(session_factory)
+
+
+_buffer: Optional[AnswerBuffer] = None
+
+
+def get_answer_buffer() -> Optional[AnswerBuffer]:
+    """Return the process-wide buffer when autosave is enabled, else None."""
+    global _buffer
+    settings = get_settings()
+    if not settings.EXAM_AUTOSAVE_ENABLED:
+        return None
+    if _buffer is None:
+        _buffer = AnswerBuffer(max_pending=settings.EXAM_AUTOSAVE_MAX_PENDING)
+    return _buffer
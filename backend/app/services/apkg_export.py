@@ -0,0 +1,255 @@
+"""Export a flashcard deck as an Anki .apkg file.
+
+The collection (Anki's SQLite schema 11, as read by parse_apkg) is built
+in a temp file: cards are read from our database in batches with
+yield_per and written with one executemany per batch, so memory stays
+bounded whatever the deck size. The collection is then zipped to a
+second temp file, which the route streams from disk.
+
+Scheduling is carried over: card type/queue/due/ivl from our FSRS state,
+and the FSRS memory state in the card's data field as Anki 23.10+ stores
+it ({"s": stability, "d": difficulty}).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.flashcard import Flashcard, FlashcardDeck
+from app.services.apkg_parser import FLD_SEP
+from app.services.fsrs import STATE_LEARNING, STATE_NEW, STATE_RELEARNING, STATE_REVIEW
+from app.services.tags import parse_tags
+
+BATCH_SIZE = 500
+
+MODEL_ID = 1342697561419
+DECK_ID = 1700000000000
+
+# Anki card.type and card.queue values.
+CARD_TYPES = {STATE_NEW: 0, STATE_LEARNING: 1, STATE_REVIEW: 2, STATE_RELEARNING: 3}
+QUEUE_SUSPENDED = -1
+QUEUE_BURIED = -3
+
+_COLUMNS = (
+    Flashcard.id,
+    Flashcard.front,
+    Flashcard.back,
+    Flashcard.tags,
+    Flashcard.state,
+    Flashcard.stability,
+    Flashcard.difficulty,
+    Flashcard.interval_days,
+    Flashcard.repetitions,
+    Flashcard.lapses,
+    Flashcard.ease_factor,
+    Flashcard.next_review,
+    Flashcard.last_review,
+    Flashcard.flagged,
+    Flashcard.suspended,
+    Flashcard.buried,
+)
+
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+
+def _basic_model(now: int) -> dict:
+    return {
+        str(MODEL_ID): {
+            "id": MODEL_ID, "name": "Basic", "type": 0, "mod": now, "usn": -1, "sortf": 0, "did": DECK_ID,
+            "flds": [
+                {"name": "Front", "ord": 0, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []},
+                {"name": "Back", "ord": 1, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []},
+            ],
+            "tmpls": [{
+                "name": "Card 1", "ord": 0, "qfmt": "{{Front}}", "afmt": "{{FrontSide}}<hr id=answer>{{Back}}",
+                "did": None, "bqfmt": "", "bafmt": "",
+            }],
+            "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+            "latexPre": "", "latexPost": "", "tags": [], "vers": [], "req": [[0, "any", [0]]],
+        }
+    }
+
+
+def _deck(deck_id: int, name: str, description: str, now: int) -> dict:
+    return {
+        "id": deck_id, "name": name, "desc": description, "mod": now, "usn": -1, "conf": 1, "dyn": 0,
+        "collapsed": False, "extendNew": 0, "extendRev": 0,
+        "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+    }
+
+
+def _dconf(desired_retention: float) -> dict:
+    return {"1": {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+        "replayq": True, "dyn": False, "desiredRetention": desired_retention,
+        "new": {"delays": [1, 10], "ints": [1, 4, 0], "initialFactor": 2500, "order": 1, "perDay": 20},
+        "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 1},
+        "rev": {"perDay": 200, "ease4": 1.3, "ivlFct": 1, "maxIvl": 36500, "hardFactor": 1.2},
+    }}
+
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _card_row(row, card_id: int, crt: int, now: int, position: int) -> tuple:
+    """The cards-table values for one of our cards (see CARD_TYPES)."""
+    card_type = CARD_TYPES.get(row.state, 0)
+    due_at = _epoch(row.next_review)
+    if card_type == 0 or due_at is None:
+        card_type, queue, due = 0, 0, position
+    elif card_type == 2:
+        queue, due = 2, max(0, (due_at - crt) // 86400)
+    else:
+        # Learning/relearning steps are due at a timestamp.
+        queue, due = 1, due_at
+    if row.suspended:
+        queue = QUEUE_SUSPENDED
+    elif row.buried:
+        queue = QUEUE_BURIED
+
+    data = {}
+    if row.stability > 0:
+        data = {"s": round(row.stability, 4), "d": round(row.difficulty, 4)}
+        last = _epoch(row.last_review)
+        if last is not None:
+            data["lrt"] = last
+    return (
+        card_id, card_id, DECK_ID, 0, now, -1, card_type, queue, due, row.interval_days,
+        int(round(row.ease_factor * 1000)), row.repetitions, row.lapses, 0, 0, 0,
+        1 if row.flagged else 0, json.dumps(data, separators=(",", ":")) if data else "",
+    )
+
+
+def _note_row(row, note_id: int, now: int) -> tuple:
+    tags = " ".join(tag.replace(" ", "_") for tag in parse_tags(row.tags))
+    checksum = int(hashlib.sha1(row.front.encode("utf-8")).hexdigest()[:8], 16)
+    return (
+        note_id, f"step2ck-{row.id}", MODEL_ID, now, -1, f" {tags} " if tags else "",
+        f"{row.front}{FLD_SEP}{row.back}", row.front, checksum, 0, "",
+    )
+
+
+def _batches(rows: Iterable, size: int):
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def write_collection(
+    path: str,
+    deck: FlashcardDeck,
+    rows: Iterable,
+    desired_retention: float = 0.9,
+    now: Optional[datetime] = None,
+) -> int:
+    """Write an Anki collection for deck's card rows to path; returns the number of cards."""
+    now = now or datetime.now(timezone.utc)
+    now_s = int(now.timestamp())
+    crt = int(now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+    base_id = now_s * 1000
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(_SCHEMA)
+        decks = {
+            "1": _deck(1, "Default", "", now_s),
+            str(DECK_ID): _deck(DECK_ID, deck.name, deck.description or "", now_s),
+        }
+        conf = {"activeDecks": [DECK_ID], "curDeck": DECK_ID, "curModel": MODEL_ID, "nextPos": 1}
+        conn.execute(
+            "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+            (crt, now_s * 1000, now_s * 1000, json.dumps(conf), json.dumps(_basic_model(now_s)),
+             json.dumps(decks), json.dumps(_dconf(desired_retention))),
+        )
+        count = 0
+        for batch in _batches(rows, BATCH_SIZE):
+            notes, cards = [], []
+            for row in batch:
+                item_id = base_id + count
+                count += 1
+                notes.append(_note_row(row, item_id, now_s))
+                cards.append(_card_row(row, item_id, crt, now_s, count))
+            conn.executemany("INSERT INTO notes VALUES (?,?,?,?,?,?,?,?,?,?,?)", notes)
+            conn.executemany("INSERT INTO cards VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", cards)
+        conf["nextPos"] = count + 1
+        conn.execute("UPDATE col SET conf = ?", (json.dumps(conf),))
+        conn.commit()
+    finally:
+        conn.close()
+    return count
+
+
+def export_deck(db: Session, deck: FlashcardDeck, desired_retention: float = 0.9) -> str:
+    """Build deck's .apkg in a temp file and return its path; the caller deletes it."""
+    stmt = (
+        select(*_COLUMNS)
+        .where(Flashcard.deck_id == deck.id, Flashcard.user_id == deck.user_id)
+        .order_by(Flashcard.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    fd, collection = tempfile.mkstemp(suffix=".anki2")
+    os.close(fd)
+    fd, archive = tempfile.mkstemp(suffix=".apkg")
+    os.close(fd)
+    try:
+        write_collection(collection, deck, db.execute(stmt), desired_retention)
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.write(collection, "collection.anki2")
+            zf.writestr("media", "{}")
+    except BaseException:
+        os.unlink(archive)
+        raise
+    finally:
+        os.unlink(collection)
+    return archive
+
+
+def export_filename(deck: FlashcardDeck) -> str:
+    safe = "".join(c if c.isalnum() or c in " -_" else "_" for c in deck.name).strip() or "deck"
+    return f"{safe}.apkg"
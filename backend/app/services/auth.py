@@ -1,6 +1,5 @@
 """Auth service: JWT, Supabase Auth, Google OAuth, and user resolution."""
 import logging
-import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
@@ -11,42 +10,14 @@ from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.models import User
+from app.services.jwks import get_jwks_manager
+from app.services.token_cache import get_verified_token_cache
 
 logger = logging.getLogger(__name__)
 
-# ---------------------------------------------------------------------------
-# JWKS cache for Supabase ES256 token verification
-# ---------------------------------------------------------------------------
-_jwks_cache: dict[str, Any] = {}
-_JWKS_CACHE_TTL = 3600  # 1 hour
-
-
-def _fetch_jwks(supabase_url: str) -> list[dict[str, Any]]:
-    """Fetch (and cache) the JWKS from Supabase's well-known endpoint."""
-    now = time.time()
-    cached = _jwks_cache.get(supabase_url)
-    if cached and now - cached["ts"] < _JWKS_CACHE_TTL:
-        return cached["keys"]
-
-    jwks_url = f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.get(jwks_url)
-        r.raise_for_status()
-        keys = r.json().get("keys", [])
-
-    _jwks_cache[supabase_url] = {"keys": keys, "ts": now}
-    return keys
-
-
 _JWKS_ALGORITHMS = {"ES256", "RS256", "EdDSA"}
 
 
-def _find_key_by_kid(keys: list[dict], kid: str) -> Optional[dict]:
-    for k in keys:
-        if k.get("kid") == kid:
-            return k
-    return None
-
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 GOOGLE_TOKENINFO = "https://oauth2.googleapis.com/tokeninfo"
@@ -163,6 +134,7 @@ def _extract_claims(payload: dict[str, Any]) -> Optional[dict[str, Any]]:
     return {
         "sub": sub,
         "email": email,
+        "exp": payload.get("exp"),
         "full_name": user_metadata.get("full_name") or user_metadata.get("name"),
         "avatar_url": user_metadata.get("avatar_url") or user_metadata.get("picture"),
     }
@@ -172,19 +144,33 @@ def verify_supabase_token(token: str) -> Optional[dict[str, Any]]:
     """Verify a Supabase-issued JWT and extract user claims.
 
     Supports ES256 (JWKS, newer Supabase projects) and HS256 (JWT secret, legacy).
-    Returns dict with sub, email, full_name, avatar_url on success, None on failure.
+    Returns dict with sub, email, exp, full_name, avatar_url on success, None on failure.
+    Verified claims are cached by token digest until exp, so a token presented
+    again skips header parsing and signature verification.
     """
+    cache = get_verified_token_cache()
+    cached = cache.get(token)
+    if cached is not None:
+        return cached
+
+    claims = _verify_supabase_token_uncached(token)
+    if claims:
+        cache.put(token, claims, claims.get("exp"))
+    return claims
+
+
+def _verify_supabase_token_uncached(token: str) -> Optional[dict[str, Any]]:
     settings = get_settings()
 
     # --- JWKS verification (preferred for newer Supabase signing keys) ---
     if settings.SUPABASE_URL:
+        alg = None
         try:
             header = jwt.get_unverified_header(token)
             kid = header.get("kid")
             alg = header.get("alg")
             if kid and alg in _JWKS_ALGORITHMS:
-                keys = _fetch_jwks(settings.SUPABASE_URL)
-                key = _find_key_by_kid(keys, kid)
+                key = get_jwks_manager(settings.SUPABASE_URL).get_key(kid)
                 if key:
                     payload = jwt.decode(
                         token,
@@ -196,7 +182,7 @@ def verify_supabase_token(token: str) -> Optional[dict[str, Any]]:
                     return _extract_claims(payload)
         except JWTError as exc:
             logger.debug("Supabase JWKS (%s) verification failed: %s", alg, exc)
-        except httpx.HTTPError as exc:
+        except (httpx.HTTPError, ValueError) as exc:
             logger.warning("Failed to fetch Supabase JWKS: %s", exc)
 
     # --- HS256 fallback (legacy Supabase projects using JWT secret) ---
@@ -215,6 +201,16 @@ def verify_supabase_token(token: str) -> Optional[dict[str, Any]]:
     return None
 
 
+def _sync_profile(user: User, **fields: Optional[str]) -> bool:
+    """Assign only the fields that actually changed. Returns True if any did."""
+    changed = False
+    for name, value in fields.items():
+        if getattr(user, name) != value:
+            setattr(user, name, value)
+            changed = True
+    return changed
+
+
 def get_or_create_user_from_supabase(
     db: Session,
     supabase_id: str,
@@ -222,13 +218,19 @@ def get_or_create_user_from_supabase(
     name: Optional[str] = None,
     avatar_url: Optional[str] = None,
 ) -> User:
-    """Find user by supabase_id or email; create or update with Supabase/Google profile."""
+    """Find user by supabase_id or email; create or update with Supabase/Google profile.
+
+    Existing users are only written (and flushed) when a profile field differs.
+    """
     user = db.query(User).filter(User.supabase_id == supabase_id).first()
     if user:
-        user.display_name = name or user.display_name
-        user.avatar_url = avatar_url or user.avatar_url
-        user.email = email
-        db.flush()
+        if _sync_profile(
+            user,
+            display_name=name or user.display_name,
+            avatar_url=avatar_url or user.avatar_url,
+            email=email,
+        ):
+            db.flush()
         return user
     user = db.query(User).filter(User.email == email).first()
     if user:
@@ -0,0 +1,168 @@
+"""Bulk flashcard operations as set-based SQL.
+
+Each action is one UPDATE or DELETE over the selected cards (a list of ids
+or a FlashcardFilter; move issues one per source deck), never a
+load/modify/flush per card. Actions that
+change which deck a card counts towards take the per-deck counts from
+the rows the statement actually changed, not from an earlier read that a
+concurrent request could invalidate: delete uses DELETE ... RETURNING
+deck_id, and move runs one UPDATE per source deck and uses its rowcount.
+FlashcardDeck.card_count is then adjusted relatively
+(card_count = card_count - :n) in one executemany, inside the same
+transaction as the card statements.
+
+Tag and untag rewrite the card's canonical tags string ("a, b") in SQL,
+on a comma-padded copy (",a,b,") so a tag only matches whole entries,
+and update the flashcard_tags index with one INSERT ... SELECT or DELETE.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import String, bindparam, case, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.flashcard import Flashcard, FlashcardDeck
+from app.schemas.flashcard import FlashcardBulkOperation, FlashcardFilter
+from app.services.fsrs import STATE_NEW
+from app.services.tags import CARD_TAGS
+
+_NO_SYNC = {"synchronize_session": False}
+
+# Column values of a card that has never been reviewed.
+RESET_FIELDS = {
+    "stability": 0.0,
+    "difficulty": 0.0,
+    "interval_days": 0,
+    "repetitions": 0,
+    "lapses": 0,
+    "state": STATE_NEW,
+    "learning_step": 0,
+    "next_review": None,
+    "last_review": None,
+}
+
+
+def _padded_tags():
+    return "," + func.replace(func.coalesce(Flashcard.tags, ""), ", ", ",", type_=String) + ","
+
+
+def filter_conditions(user_id: str, f: FlashcardFilter) -> list:
+    conditions = []
+    if f.deck_id is not None:
+        conditions.append(Flashcard.deck_id == f.deck_id)
+    if f.tag is not None:
+        conditions.append(CARD_TAGS.has(user_id, f.tag.strip()))
+    if f.state is not None:
+        conditions.append(Flashcard.state == f.state)
+    if f.flagged is not None:
+        conditions.append(Flashcard.flagged == f.flagged)
+    if f.suspended is not None:
+        conditions.append(Flashcard.suspended == f.suspended)
+    if f.due_after is not None:
+        conditions.append(Flashcard.next_review >= f.due_after)
+    if f.due_before is not None:
+        conditions.append(Flashcard.next_review < f.due_before)
+    return conditions
+
+
+def selection(user_id: str, op: FlashcardBulkOperation) -> list:
+    """WHERE conditions for the cards an operation applies to."""
+    conditions = [Flashcard.user_id == user_id]
+    if op.card_ids is not None:
+        conditions.append(Flashcard.id.in_(op.card_ids))
+    else:
+        conditions.extend(filter_conditions(user_id, op.filter))
+    return conditions
+
+
+def deck_counts(db: Session, where: list) -> Counter:
+    """Selected cards per deck id, in one GROUP BY."""
+    rows = db.execute(
+        select(Flashcard.deck_id, func.count()).where(*where).group_by(Flashcard.deck_id)
+    ).all()
+    return Counter(dict(rows))
+
+
+def move_counts(db: Session, user_id: str, op: FlashcardBulkOperation) -> Counter:
+    """Per source deck, the cards a move would take out of it."""
+    return deck_counts(db, selection(user_id, op) + [Flashcard.deck_id != op.deck_id])
+
+
+def _adjust_card_counts(db: Session, user_id: str, deltas: dict[int, int]) -> None:
+    deltas = {deck_id: n for deck_id, n in deltas.items() if n}
+    if not deltas:
+        return
+    decks = FlashcardDeck.__table__
+    db.connection().execute(
+        update(decks)
+        .where(decks.c.id == bindparam("deck"), decks.c.user_id == user_id)
+        .values(card_count=decks.c.card_count + bindparam("delta")),
+        [{"deck": deck_id, "delta": n} for deck_id, n in deltas.items()],
+    )
+
+
+def _update(db: Session, where: list, values: dict) -> int:
+    return db.execute(update(Flashcard).where(*where).values(**values), execution_options=_NO_SYNC).rowcount
+
+
+def _deleted_from(db: Session, where: list) -> Counter:
+    """DELETE the selected cards; how many went from each deck, from RETURNING deck_id."""
+    rows = db.execute(delete(Flashcard).where(*where).returning(Flashcard.deck_id), execution_options=_NO_SYNC)
+    return Counter(rows.scalars())
+
+
+def apply_bulk_operation(db: Session, user_id: str, op: FlashcardBulkOperation, moving: Optional[Counter] = None) -> int:
+    """Run op over the selected cards; returns how many cards changed. Does not commit.
+
+    For move, pass move_counts() as moving if the caller already read them
+    (e.g. for a plan-limit check); it only says which source decks to
+    visit; the card_count deltas come from the rows each UPDATE changed.
+    """
+    where = selection(user_id, op)
+
+    if op.action == "delete":
+        CARD_TAGS.discard(db, user_id, None, select(Flashcard.id).where(*where))
+        counts = _deleted_from(db, where)
+        _adjust_card_counts(db, user_id, {deck_id: -n for deck_id, n in counts.items()})
+        return sum(counts.values())
+
+    if op.action == "move":
+        where.append(Flashcard.deck_id != op.deck_id)
+        sources = moving if moving is not None else move_counts(db, user_id, op)
+        # RETURNING only sees the new deck_id (SQLite has no OLD), so move
+        # one source deck at a time and count what each UPDATE changed.
+        deltas = {
+            deck_id: -_update(db, where + [Flashcard.deck_id == deck_id], {"deck_id": op.deck_id})
+            for deck_id in sources
+        }
+        deltas[op.deck_id] = -sum(deltas.values())
+        _adjust_card_counts(db, user_id, deltas)
+        return deltas[op.deck_id]
+
+    if op.action == "tag":
+        where.append(~CARD_TAGS.has(user_id, op.tag))
+        values = {"tags": case(
+            (func.coalesce(Flashcard.tags, "") == "", op.tag),
+            else_=Flashcard.tags + ", " + op.tag,
+        )}
+        affected = _update(db, where, values)
+        CARD_TAGS.add(db, user_id, op.tag, where)
+        return affected
+
+    if op.action == "untag":
+        where.append(CARD_TAGS.has(user_id, op.tag))
+        remaining = func.trim(func.replace(_padded_tags(), f",{op.tag},", ",", type_=String), ",", type_=String)
+        affected = _update(db, where, {"tags": func.nullif(func.replace(remaining, ",", ", ", type_=String), "")})
+        CARD_TAGS.discard(db, user_id, op.tag, select(Flashcard.id).where(*where))
+        return affected
+
+    if op.action in ("suspend", "unsuspend"):
+        suspended = op.action == "suspend"
+        where.append(Flashcard.suspended != suspended)
+        values = {"suspended": suspended}
+    else:  # reset
+        where.append(or_(Flashcard.state != STATE_NEW, Flashcard.repetitions > 0))
+        values = RESET_FIELDS
+    return _update(db, where, values)
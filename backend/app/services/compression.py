@@ -0,0 +1,197 @@
+"""Content-Encoding negotiation and codecs shared by the compression middleware
+and the precompressed payload cache.
+
+gzip is always available; br and zstd are used when the optional ``brotli``
+and ``zstandard`` packages are installed. Stream compressors flush after
+every chunk so streamed responses reach the client without buffering.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional, Protocol
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # high ratio without the latency of quality 11
+ZSTD_LEVEL = 3
+
+# Media types worth compressing; images, archives and the like are already compressed.
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+
+class StreamCompressor(Protocol):
+    def compress(self, chunk: bytes) -> bytes: ...
+    def finish(self) -> bytes: ...
+
+
+class _GzipStream:
+    def __init__(self):
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.process(chunk) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.compress(chunk) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _gzip(data: bytes) -> bytes:
+    obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return obj.compress(data) + obj.flush()
+
+
+# Server preference order when the client weighs encodings equally.
+CODECS: dict[str, tuple[Callable[[bytes], bytes], Callable[[], StreamCompressor]]] = {}
+if zstandard is not None:
+    CODECS["zstd"] = (lambda d: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(d), _ZstdStream)
+if brotli is not None:
+    CODECS["br"] = (lambda d: brotli.compress(d, quality=BROTLI_QUALITY), _BrotliStream)
+CODECS["gzip"] = (_gzip, _GzipStream)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding for an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in CODECS:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    return CODECS[encoding][0](data)
+
+
+def stream_compressor(encoding: str) -> StreamCompressor:
+    return CODECS[encoding][1]()
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class PrecompressedPayload:
+    """JSON bytes for an immutable response, with each encoding compressed once.
+
+    Cache the payload instead of the raw value; ``response()`` picks the
+    client's encoding and returns bytes that CompressionMiddleware passes
+    through as-is.
+    """
+
+    def __init__(self, body: bytes, minimum_size: int = 0):
+        self.body = body
+        self.minimum_size = minimum_size
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(encoding, self.body)
+        return data
+
+    def response(self, accept_encoding: str):
+        from starlette.responses import Response
+
+        encoding = negotiate(accept_encoding) if len(self.body) >= self.minimum_size else None
+        if encoding is None:
+            return Response(self.body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+        return Response(
+            self.encoded(encoding),
+            media_type="application/json",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+
+class PayloadCache:
+    """LRU of key -> PrecompressedPayload, bounded by size and TTL.
+
+    Each payload holds its raw body plus every encoding compressed so far,
+    so the bound caps memory per worker whatever the size of the catalog.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[PrecompressedPayload, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[PrecompressedPayload]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, payload: PrecompressedPayload) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (payload, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
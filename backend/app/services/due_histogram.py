@@ -0,0 +1,122 @@
+"""Per-user due-date histograms for FSRS load balancing.
+
+Load balancing picks the least-loaded day in a card's fuzz range, which
+needs "how many cards are due on day X" for every candidate day. Rather
+than a COUNT per day, each user's histogram (UTC date -> scheduled cards)
+is built with one GROUP BY on first use and then kept current in memory:
+reviews move a card from its old due day to its new one. Undo and other
+bulk rescheduling call invalidate() instead.
+
+Histograms are per process; entries are rebuilt after ttl_seconds so
+changes made on other workers are picked up, and the cache is an LRU
+bounded by max_users.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.flashcard import Flashcard
+from app.services.fsrs import STATE_NEW
+
+
+def _day(value: datetime) -> date:
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(timezone.utc).date()
+
+
+class DueHistogram:
+    def __init__(self, counts: dict[date, int]):
+        self.counts = counts
+
+    def count(self, day: date) -> int:
+        return self.counts.get(day, 0)
+
+    def load_from(self, today: date) -> Callable[[int], int]:
+        """due_load for fsrs.review(): days from today -> cards due that day."""
+        return lambda days: self.counts.get(today + timedelta(days=days), 0)
+
+    def move(self, old_due: Optional[datetime], new_due: Optional[datetime]) -> None:
+        if old_due is not None:
+            day = _day(old_due)
+            remaining = self.counts.get(day, 0) - 1
+            if remaining > 0:
+                self.counts[day] = remaining
+            else:
+                self.counts.pop(day, None)
+        if new_due is not None:
+            day = _day(new_due)
+            self.counts[day] = self.counts.get(day, 0) + 1
+
+
+def load_histogram(db: Session, user_id: str) -> DueHistogram:
+    """Scheduled (not new, not suspended) cards per due date, in one query."""
+    due_day = func.date(Flashcard.next_review)
+    rows = db.execute(
+        select(due_day, func.count())
+        .where(
+            Flashcard.user_id == user_id,
+            Flashcard.state != STATE_NEW,
+            Flashcard.suspended == False,  # noqa: E712
+            Flashcard.next_review.isnot(None),
+        )
+        .group_by(due_day)
+    ).all()
+    # SQLite's date() returns an ISO string, PostgreSQL a date.
+    return DueHistogram({
+        (date.fromisoformat(day) if isinstance(day, str) else day): count for day, count in rows
+    })
+
+
+class DueHistograms:
+    """LRU of user id -> DueHistogram, each rebuilt after ttl_seconds."""
+
+    def __init__(self, max_users: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[DueHistogram, float]] = OrderedDict()
+        self.builds = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, user_id: str) -> DueHistogram:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                self._entries.move_to_end(user_id)
+                return entry[0]
+            self.misses += 1
+        histogram = load_histogram(db, user_id)
+        with self._lock:
+            self.builds += 1
+            self._entries[user_id] = (histogram, now + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return histogram
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache
+def get_due_histograms() -> DueHistograms:
+    settings = get_settings()
+    return DueHistograms(settings.FSRS_HISTOGRAM_USERS, settings.FSRS_HISTOGRAM_TTL_SECONDS)
@@ -0,0 +1,271 @@
+"""Workload forecast: Monte Carlo simulation of FSRS scheduling.
+
+simulate() projects a user's daily reviews, new-card intake and expected
+retention over the coming days for a given desired_retention, starting
+from their actual card states. It runs all cards and all simulation runs
+at once as (runs, cards) numpy arrays, one step per day:
+
+- due cards are reviewed (at most review_limit per day, in card order);
+  each is recalled with probability R(t, S) and rescheduled with the FSRS
+  recall or forget stability update;
+- up to new_per_day new cards are introduced, rated Good;
+- intervals come from the target retention, as in fsrs.Scheduler.next_interval.
+
+Learning steps within a day are not modelled, and every recall is rated
+Good, so absolute numbers are estimates; comparing retention targets
+against each other is what the forecast is for.
+
+Simulations take a while for large collections, so the route runs them
+on ForecastJobs' worker threads and serves results from its TTL cache.
+A simulation that raises is remembered for failure_ttl_seconds, so polls
+report it instead of resubmitting it over and over.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Hashable, Optional
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.fsrs import AGAIN, DECAY, EXP_W8, FACTOR, GOOD, STATE_NEW, W
+
+logger = logging.getLogger(__name__)
+
+# Keep runs x cards under this many cells per array (about 32 MB of float64).
+MAX_CELLS = 4_000_000
+
+
+class CardArrays:
+    """Per-card columns for simulate(); days are relative to today (day 0)."""
+
+    def __init__(self, stability, difficulty, due_day, last_day, is_new):
+        self.stability = np.asarray(stability, dtype=float)
+        self.difficulty = np.asarray(difficulty, dtype=float)
+        self.due_day = np.asarray(due_day, dtype=float)
+        self.last_day = np.asarray(last_day, dtype=float)
+        self.is_new = np.asarray(is_new, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.stability)
+
+    @classmethod
+    def from_rows(cls, rows, now: Optional[datetime] = None) -> "CardArrays":
+        """Rows of (stability, difficulty, state, next_review, last_review)."""
+        now = now or datetime.now(timezone.utc)
+
+        def days_from_now(value: Optional[datetime]) -> float:
+            if value is None:
+                return 0.0
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return (value - now).total_seconds() / 86400
+
+        columns = ([], [], [], [], [])
+        for stability, difficulty, state, next_review, last_review in rows:
+            is_new = state == STATE_NEW or stability <= 0
+            columns[0].append(stability)
+            columns[1].append(difficulty)
+            columns[2].append(max(0.0, math.floor(days_from_now(next_review))))
+            columns[3].append(days_from_now(last_review) if last_review else 0.0)
+            columns[4].append(is_new)
+        return cls(*columns)
+
+
+def _next_difficulty(d, rating: int):
+    d0_good = W[4] - (GOOD - 3) * W[5]
+    return np.clip(W[7] * d0_good + (1 - W[7]) * (d - W[6] * (rating - 3)), 1.0, 10.0)
+
+
+def _retrievability(elapsed, stability):
+    return (1 + FACTOR * np.maximum(elapsed, 0.0) / np.maximum(stability, 0.01)) ** DECAY
+
+
+def simulate(
+    cards: CardArrays,
+    *,
+    retention: float,
+    days: int,
+    new_per_day: int,
+    review_limit: int,
+    max_interval: int,
+    runs: int,
+    seed: int = 0,
+) -> dict:
+    """Project daily workload and retention; returns per-day means and a summary."""
+    rng = np.random.default_rng(seed)
+    runs = max(1, min(runs, MAX_CELLS // max(1, len(cards))))
+    shape = (runs, len(cards))
+    s = np.broadcast_to(cards.stability, shape).copy()
+    d = np.clip(np.broadcast_to(cards.difficulty, shape), 1.0, 10.0)
+    due = np.broadcast_to(cards.due_day, shape).copy()
+    last = np.broadcast_to(cards.last_day, shape).copy()
+    new = np.broadcast_to(cards.is_new, shape).copy()
+
+    interval_factor = (retention ** (1 / DECAY) - 1) / FACTOR
+    d0_good = min(10.0, max(1.0, W[4] - (GOOD - 3) * W[5]))
+
+    reviews = np.zeros((runs, days))
+    intake = np.zeros((runs, days))
+    kept = np.zeros((runs, days))
+    for day in range(days):
+        reviewing = ~new & (due <= day)
+        reviewing &= np.cumsum(reviewing, axis=1) <= review_limit
+        introduced = new & (np.cumsum(new, axis=1) <= new_per_day)
+
+        r = _retrievability(day - last, s)
+        recalled = reviewing & (rng.random(shape) < r)
+        forgot = reviewing & ~recalled
+        safe_s = np.maximum(s, 0.01)
+        s_recall = safe_s * (EXP_W8 * (11 - d) * safe_s ** (-W[9]) * (np.exp(W[10] * (1 - r)) - 1) + 1)
+        s_forget = W[11] * d ** (-W[12]) * ((safe_s + 1) ** W[13] - 1) * np.exp(W[14] * (1 - r))
+        s = np.where(recalled, s_recall, np.where(forgot, np.maximum(s_forget, 0.01), s))
+        d = np.where(recalled, _next_difficulty(d, GOOD), np.where(forgot, _next_difficulty(d, AGAIN), d))
+        s = np.where(introduced, W[GOOD - 1], s)
+        d = np.where(introduced, d0_good, d)
+        new &= ~introduced
+
+        touched = reviewing | introduced
+        interval = np.clip(np.rint(s * interval_factor), 1, max_interval)
+        due = np.where(touched, day + interval, due)
+        last = np.where(touched, day, last)
+
+        reviews[:, day] = reviewing.sum(axis=1)
+        intake[:, day] = introduced.sum(axis=1)
+        # Expected retention at the end of the day over cards studied so far.
+        studied = ~new
+        count = np.maximum(studied.sum(axis=1), 1)
+        kept[:, day] = np.where(studied, _retrievability(day + 1 - last, s), 0.0).sum(axis=1) / count
+
+    memorized = np.where(~new, _retrievability(days - last, s), 0.0).sum(axis=1)
+    daily = [
+        {
+            "day": day,
+            "reviews": round(float(reviews[:, day].mean()), 1),
+            "reviews_p90": round(float(np.percentile(reviews[:, day], 90)), 1),
+            "new_cards": round(float(intake[:, day].mean()), 1),
+            "retention": round(float(kept[:, day].mean()), 4),
+        }
+        for day in range(days)
+    ]
+    return {
+        "retention": retention,
+        "days": daily,
+        "average_daily_reviews": round(float(reviews.mean()), 1),
+        "total_reviews": round(float(reviews.sum(axis=1).mean()), 1),
+        "average_retention": round(float(kept.mean()), 4) if days else 0.0,
+        "memorized": round(float(memorized.mean()), 1),
+        "runs": runs,
+    }
+
+
+class ForecastJobs:
+    """Run forecasts on worker threads; keep finished results for ttl_seconds (LRU-bounded).
+
+    Failures are kept for failure_ttl_seconds in a second LRU of the same
+    bound; once one expires the next poll submits the forecast again.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        ttl_seconds: float,
+        max_entries: int,
+        failure_ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="forecast")
+        self._lock = threading.Lock()
+        self._results: OrderedDict[Hashable, tuple[dict, float]] = OrderedDict()
+        self._errors: OrderedDict[Hashable, tuple[str, float]] = OrderedDict()
+        self._pending: dict[Hashable, Future] = {}
+        self.runs = 0
+        self.failures = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _lookup(entries: OrderedDict, key: Hashable, now: float):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            result = self._lookup(self._results, key, self._clock())
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def error(self, key: Hashable) -> Optional[str]:
+        """Why key's last run failed, while that failure is remembered."""
+        with self._lock:
+            return self._lookup(self._errors, key, self._clock())
+
+    def is_pending(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, key: Hashable, fn: Callable[[], dict]) -> Future:
+        """Start fn for key unless it is already running; returns its future."""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(fn)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return future
+
+    def _finish(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled():
+                return
+            exc = future.exception()
+            if exc is not None:
+                self.failures += 1
+                logger.error("Forecast failed for %s", key, exc_info=exc)
+                self._store(self._errors, key, type(exc).__name__, self.failure_ttl_seconds)
+                return
+            self.runs += 1
+            self._errors.pop(key, None)
+            self._store(self._results, key, future.result(), self.ttl_seconds)
+
+    def _store(self, entries: OrderedDict, key: Hashable, value, ttl: float) -> None:
+        entries[key] = (value, self._clock() + ttl)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def stop(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache
+def get_forecast_jobs() -> ForecastJobs:
+    settings = get_settings()
+    return ForecastJobs(
+        workers=settings.FORECAST_WORKERS,
+        ttl_seconds=settings.FORECAST_CACHE_TTL_SECONDS,
+        max_entries=settings.FORECAST_CACHE_SIZE,
+        failure_ttl_seconds=settings.FORECAST_FAILURE_TTL_SECONDS,
+    )
@@ -9,9 +9,11 @@ Reference: https://github.com/open-spaced-repetition/fsrs4anki/wiki/The-Algorith
 from __future__ import annotations
 
 import math
+import random
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
 
 # Rating constants (Anki-style: 1-4)
 AGAIN = 1
@@ -50,10 +52,15 @@ W = [
 
 DECAY = -0.5
 FACTOR = 19.0 / 81.0
+EXP_W8 = math.exp(W[8])
 
 REQUEST_RETENTION = 0.9
 MAX_INTERVAL = 3650
 
+# Interval fuzz (as in FSRS/Anki): for the part of the interval in [start, end)
+# days, add +/- factor * that many days to the range a due date may land in.
+FUZZ_RANGES = ((2.5, 7.0, 0.15), (7.0, 20.0, 0.1), (20.0, math.inf, 0.05))
+
 
 @dataclass
 class CardState:
@@ -117,35 +124,39 @@ def _next_interval(stability: float, retention: float = REQUEST_RETENTION, max_i
     return _clamp(round(interval), 1, max_ivl)
 
 
-def _stability_after_recall(
-    d: float, s: float, r: float, rating: int
-) -> float:
-    """
-    S'_r(D,S,R,G) = S * (e^w8 * (11-D) * S^(-w9) * (e^(w10*(1-R))-1)
-                      * w15(if G=2) * w16(if G=4) + 1)
+def fuzz_range(interval: int, max_ivl: int = MAX_INTERVAL) -> tuple[int, int]:
+    """Days an interval may be moved to; intervals under 2.5 days are not fuzzed."""
+    if interval < 2.5:
+        return interval, interval
+    delta = 1.0
+    for start, end, factor in FUZZ_RANGES:
+        delta += factor * max(min(interval, end) - start, 0.0)
+    hi = min(round(interval + delta), max_ivl)
+    lo = min(max(2, round(interval - delta)), hi)
+    return lo, hi
+
+
+def fuzz_interval(
+    interval: int,
+    max_ivl: int = MAX_INTERVAL,
+    rng: Optional[random.Random] = None,
+    due_load: Optional[Callable[[int], int]] = None,
+) -> int:
+    """Spread an interval over its fuzz range so cards reviewed together don't come due together.
+
+    With due_load (days from now -> cards already due that day) the least
+    loaded day in the range wins, ties broken at random; otherwise the day
+    is uniform random.
     """
-    hard_penalty = W[15] if rating == HARD else 1.0
-    easy_bonus = W[16] if rating == EASY else 1.0
-    sinc = (
-        math.exp(W[8])
-        * (11 - d)
-        * s ** (-W[9])
-        * (math.exp(W[10] * (1 - r)) - 1)
-        * hard_penalty
-        * easy_bonus
-    )
-    return max(0.01, s * (sinc + 1))
-
-
-def _stability_after_forgetting(d: float, s: float, r: float) -> float:
-    """S'_f(D,S,R) = w11 * D^(-w12) * ((S+1)^w13 - 1) * e^(w14*(1-R))"""
-    return max(
-        0.01,
-        W[11]
-        * d ** (-W[12])
-        * ((s + 1) ** W[13] - 1)
-        * math.exp(W[14] * (1 - r)),
-    )
+    lo, hi = fuzz_range(interval, max_ivl)
+    if lo == hi:
+        return lo
+    rng = rng or random
+    if due_load is None:
+        return rng.randint(lo, hi)
+    loads = [due_load(day) for day in range(lo, hi + 1)]
+    least = min(loads)
+    return rng.choice([lo + i for i, load in enumerate(loads) if load == least])
 
 
 def _learning_step_minutes(step_index: int, steps: list[int]) -> int:
@@ -155,60 +166,106 @@ def _learning_step_minutes(step_index: int, steps: list[int]) -> int:
     return steps[min(step_index, len(steps) - 1)]
 
 
-def review(
-    card: CardState,
-    rating: int,
-    now: Optional[datetime] = None,
-    *,
-    learning_steps: Optional[list[int]] = None,
-    relearning_steps: Optional[list[int]] = None,
-    desired_retention: Optional[float] = None,
-    max_interval: Optional[int] = None,
-) -> ReviewResult:
-    """Process a review and return the new card state.
+@dataclass
+class _Memory:
+    """Per-card quantities shared by every rating of one review (or preview)."""
+    r: float
+    recall_base: float = 0.0  # S'_r without the Hard/Easy factor, before "+ 1"
+    s_forget: float = 0.0
 
-    Optional overrides allow per-user settings for learning steps,
-    desired retention, and max interval to be applied.
 
-    For learning/relearning cards, scheduling works via steps:
-      - Again -> back to step 0
-      - Hard -> repeat current step (average of Again and Good timing)
-      - Good -> advance to next step; if past the last step, graduate
-      - Easy -> immediately graduate
+class Scheduler:
+    """FSRS scheduling for one set of settings; get one from get_scheduler().
 
-    For review cards, standard FSRS scheduling applies.
+    Per-settings constants (step lists, the interval factor for the target
+    retention) are computed once here, and per-card quantities
+    (retrievability, the shared part of the recall/forget stability) once
+    per card in _memory(), so preview() costs one card setup plus four
+    cheap branches instead of four full reviews.
     """
-    now = now or datetime.now(timezone.utc)
-    rating = _clamp(rating, AGAIN, EASY)
 
-    l_steps = learning_steps if learning_steps is not None else LEARNING_STEPS
-    r_steps = relearning_steps if relearning_steps is not None else RELEARNING_STEPS
-    retention = desired_retention if desired_retention is not None else REQUEST_RETENTION
-    max_ivl = max_interval if max_interval is not None else MAX_INTERVAL
-
-    def _ivl(s: float) -> int:
-        return _next_interval(s, retention, max_ivl)
-
-    # ── NEW cards or cards with no stability (first time ever) ──
-    if card.state == STATE_NEW or card.stability <= 0:
-        s = _initial_stability(rating)
-        d = _initial_difficulty(rating)
-        lapses = card.lapses + (1 if rating == AGAIN else 0)
-
-        if rating == EASY:
-            interval = _ivl(s)
-            return ReviewResult(
-                stability=s, difficulty=d, interval_days=interval,
-                repetitions=card.repetitions + 1, lapses=lapses,
-                state=STATE_REVIEW,
-                next_review=now + timedelta(days=interval),
-                last_review=now,
-                learning_step=0, again_in_minutes=0, graduated=True,
-            )
+    def __init__(
+        self,
+        learning_steps: tuple[int, ...] = tuple(LEARNING_STEPS),
+        relearning_steps: tuple[int, ...] = tuple(RELEARNING_STEPS),
+        desired_retention: float = REQUEST_RETENTION,
+        max_interval: int = MAX_INTERVAL,
+    ):
+        self.learning_steps = list(learning_steps)
+        self.relearning_steps = list(relearning_steps)
+        self.desired_retention = desired_retention
+        self.max_interval = max_interval
+        # I(r,S) = S * interval_factor
+        self.interval_factor = (desired_retention ** (1 / DECAY) - 1) / FACTOR
+
+    def next_interval(self, stability: float) -> int:
+        return _clamp(round(stability * self.interval_factor), 1, self.max_interval)
+
+    def _memory(self, card: CardState, now: datetime) -> _Memory:
+        """
+        S'_r(D,S,R,G) = S * (e^w8 * (11-D) * S^(-w9) * (e^(w10*(1-R))-1)
+                          * w15(if G=2) * w16(if G=4) + 1)
+        S'_f(D,S,R) = w11 * D^(-w12) * ((S+1)^w13 - 1) * e^(w14*(1-R))
+        """
+        if card.stability <= 0:
+            return _Memory(r=0.0)
+        elapsed = 0.0
+        if card.last_review:
+            lr = card.last_review if card.last_review.tzinfo else card.last_review.replace(tzinfo=timezone.utc)
+            elapsed = max(0, (now - lr).total_seconds() / 86400)
+        s, d = card.stability, card.difficulty
+        r = retrievability(elapsed, s)
+        return _Memory(
+            r=r,
+            recall_base=EXP_W8 * (11 - d) * s ** (-W[9]) * (math.exp(W[10] * (1 - r)) - 1),
+            s_forget=max(0.01, W[11] * d ** (-W[12]) * ((s + 1) ** W[13] - 1) * math.exp(W[14] * (1 - r))),
+        )
 
-        if rating == GOOD:
-            step = 1
-            if step >= len(l_steps):
+    def _recall(self, card: CardState, memory: _Memory, rating: int) -> float:
+        hard_penalty = W[15] if rating == HARD else 1.0
+        easy_bonus = W[16] if rating == EASY else 1.0
+        return max(0.01, card.stability * (memory.recall_base * hard_penalty * easy_bonus + 1))
+
+    def review(
+        self,
+        card: CardState,
+        rating: int,
+        now: Optional[datetime] = None,
+        *,
+        fuzz: bool = False,
+        rng: Optional[random.Random] = None,
+        due_load: Optional[Callable[[int], int]] = None,
+    ) -> ReviewResult:
+        now = now or datetime.now(timezone.utc)
+        memory = None if card.state == STATE_NEW else self._memory(card, now)
+        return self._review(card, _clamp(rating, AGAIN, EASY), now, memory, fuzz, rng, due_load)
+
+    def _review(
+        self,
+        card: CardState,
+        rating: int,
+        now: datetime,
+        memory: Optional[_Memory],
+        fuzz: bool = False,
+        rng: Optional[random.Random] = None,
+        due_load: Optional[Callable[[int], int]] = None,
+    ) -> ReviewResult:
+        l_steps = self.learning_steps
+        r_steps = self.relearning_steps
+
+        def _ivl(s: float) -> int:
+            interval = self.next_interval(s)
+            if fuzz:
+                interval = fuzz_interval(interval, self.max_interval, rng, due_load)
+            return interval
+
+        # ── NEW cards or cards with no stability (first time ever) ──
+        if card.state == STATE_NEW or card.stability <= 0:
+            s = _initial_stability(rating)
+            d = _initial_difficulty(rating)
+            lapses = card.lapses + (1 if rating == AGAIN else 0)
+
+            if rating == EASY:
                 interval = _ivl(s)
                 return ReviewResult(
                     stability=s, difficulty=d, interval_days=interval,
@@ -218,7 +275,34 @@ def review(
                     last_review=now,
                     learning_step=0, again_in_minutes=0, graduated=True,
                 )
+
+            if rating == GOOD:
+                step = 1
+                if step >= len(l_steps):
+                    interval = _ivl(s)
+                    return ReviewResult(
+                        stability=s, difficulty=d, interval_days=interval,
+                        repetitions=card.repetitions + 1, lapses=lapses,
+                        state=STATE_REVIEW,
+                        next_review=now + timedelta(days=interval),
+                        last_review=now,
+                        learning_step=0, again_in_minutes=0, graduated=True,
+                    )
+                delay = _learning_step_minutes(step, l_steps)
+                return ReviewResult(
+                    stability=s, difficulty=d, interval_days=0,
+                    repetitions=card.repetitions + 1, lapses=lapses,
+                    state=STATE_LEARNING,
+                    next_review=now + timedelta(minutes=delay),
+                    last_review=now,
+                    learning_step=step, again_in_minutes=delay, graduated=False,
+                )
+
+            # Again or Hard -> stay at step 0
+            step = 0
             delay = _learning_step_minutes(step, l_steps)
+            if rating == HARD and len(l_steps) >= 2:
+                delay = (l_steps[0] + _learning_step_minutes(1, l_steps)) // 2
             return ReviewResult(
                 stability=s, difficulty=d, interval_days=0,
                 repetitions=card.repetitions + 1, lapses=lapses,
@@ -228,136 +312,197 @@ def review(
                 learning_step=step, again_in_minutes=delay, graduated=False,
             )
 
-        # Again or Hard -> stay at step 0
-        step = 0
-        delay = _learning_step_minutes(step, l_steps)
-        if rating == HARD and len(l_steps) >= 2:
-            delay = (l_steps[0] + _learning_step_minutes(1, l_steps)) // 2
-        return ReviewResult(
-            stability=s, difficulty=d, interval_days=0,
-            repetitions=card.repetitions + 1, lapses=lapses,
-            state=STATE_LEARNING,
-            next_review=now + timedelta(minutes=delay),
-            last_review=now,
-            learning_step=step, again_in_minutes=delay, graduated=False,
-        )
+        memory = memory or self._memory(card, now)
 
-    # ── LEARNING / RELEARNING cards (in-session steps) ──
-    if card.state in (STATE_LEARNING, STATE_RELEARNING):
-        steps = r_steps if card.state == STATE_RELEARNING else l_steps
-        current_step = card.learning_step
+        # ── LEARNING / RELEARNING cards (in-session steps) ──
+        if card.state in (STATE_LEARNING, STATE_RELEARNING):
+            steps = r_steps if card.state == STATE_RELEARNING else l_steps
+            current_step = card.learning_step
 
-        elapsed = 0.0
-        if card.last_review:
-            lr = card.last_review if card.last_review.tzinfo else card.last_review.replace(tzinfo=timezone.utc)
-            elapsed = max(0, (now - lr).total_seconds() / 86400)
-        r = retrievability(elapsed, card.stability) if card.stability > 0 else 0.0
-        d = _next_difficulty(card.difficulty, rating) if card.difficulty > 0 else _initial_difficulty(rating)
-        s = card.stability
+            r = memory.r
+            d = _next_difficulty(card.difficulty, rating) if card.difficulty > 0 else _initial_difficulty(rating)
+            s = card.stability
 
-        if rating == AGAIN:
-            if s > 0 and r > 0:
-                s = _stability_after_forgetting(card.difficulty, s, r)
-            step = 0
-            delay = _learning_step_minutes(step, steps)
-            lapses = card.lapses + (1 if card.state == STATE_RELEARNING else 0)
-            return ReviewResult(
-                stability=s, difficulty=d, interval_days=0,
-                repetitions=card.repetitions + 1, lapses=lapses,
-                state=card.state,
-                next_review=now + timedelta(minutes=delay),
-                last_review=now,
-                learning_step=step, again_in_minutes=delay, graduated=False,
-            )
+            if rating == AGAIN:
+                if s > 0 and r > 0:
+                    s = memory.s_forget
+                step = 0
+                delay = _learning_step_minutes(step, steps)
+                lapses = card.lapses + (1 if card.state == STATE_RELEARNING else 0)
+                return ReviewResult(
+                    stability=s, difficulty=d, interval_days=0,
+                    repetitions=card.repetitions + 1, lapses=lapses,
+                    state=card.state,
+                    next_review=now + timedelta(minutes=delay),
+                    last_review=now,
+                    learning_step=step, again_in_minutes=delay, graduated=False,
+                )
 
-        if rating == HARD:
-            step = current_step
-            delay = _learning_step_minutes(step, steps)
-            if len(steps) >= 2:
-                delay = (steps[0] + _learning_step_minutes(min(current_step + 1, len(steps) - 1), steps)) // 2
+            if rating == HARD:
+                step = current_step
+                delay = _learning_step_minutes(step, steps)
+                if len(steps) >= 2:
+                    delay = (steps[0] + _learning_step_minutes(min(current_step + 1, len(steps) - 1), steps)) // 2
+                return ReviewResult(
+                    stability=s, difficulty=d, interval_days=0,
+                    repetitions=card.repetitions + 1, lapses=card.lapses,
+                    state=card.state,
+                    next_review=now + timedelta(minutes=delay),
+                    last_review=now,
+                    learning_step=step, again_in_minutes=delay, graduated=False,
+                )
+
+            if rating == EASY:
+                if s > 0 and r > 0:
+                    s = self._recall(card, memory, EASY)
+                else:
+                    s = _initial_stability(EASY)
+                interval = _ivl(s)
+                return ReviewResult(
+                    stability=s, difficulty=d, interval_days=interval,
+                    repetitions=card.repetitions + 1, lapses=card.lapses,
+                    state=STATE_REVIEW,
+                    next_review=now + timedelta(days=interval),
+                    last_review=now,
+                    learning_step=0, again_in_minutes=0, graduated=True,
+                )
+
+            # GOOD -> advance step
+            next_step = current_step + 1
+            if next_step >= len(steps):
+                if s > 0 and r > 0:
+                    s = self._recall(card, memory, GOOD)
+                else:
+                    s = _initial_stability(GOOD)
+                interval = _ivl(s)
+                return ReviewResult(
+                    stability=s, difficulty=d, interval_days=interval,
+                    repetitions=card.repetitions + 1, lapses=card.lapses,
+                    state=STATE_REVIEW,
+                    next_review=now + timedelta(days=interval),
+                    last_review=now,
+                    learning_step=0, again_in_minutes=0, graduated=True,
+                )
+            delay = _learning_step_minutes(next_step, steps)
             return ReviewResult(
                 stability=s, difficulty=d, interval_days=0,
                 repetitions=card.repetitions + 1, lapses=card.lapses,
                 state=card.state,
                 next_review=now + timedelta(minutes=delay),
                 last_review=now,
-                learning_step=step, again_in_minutes=delay, graduated=False,
+                learning_step=next_step, again_in_minutes=delay, graduated=False,
             )
 
-        if rating == EASY:
-            if s > 0 and r > 0:
-                s = _stability_after_recall(card.difficulty, s, r, EASY)
-            else:
-                s = _initial_stability(EASY)
-            interval = _ivl(s)
-            return ReviewResult(
-                stability=s, difficulty=d, interval_days=interval,
-                repetitions=card.repetitions + 1, lapses=card.lapses,
-                state=STATE_REVIEW,
-                next_review=now + timedelta(days=interval),
-                last_review=now,
-                learning_step=0, again_in_minutes=0, graduated=True,
-            )
+        # ── REVIEW cards ──
+        d = _next_difficulty(card.difficulty, rating)
 
-        # GOOD -> advance step
-        next_step = current_step + 1
-        if next_step >= len(steps):
-            if s > 0 and r > 0:
-                s = _stability_after_recall(card.difficulty, s, r, GOOD)
-            else:
-                s = _initial_stability(GOOD)
-            interval = _ivl(s)
+        if rating == AGAIN:
+            delay = _learning_step_minutes(0, r_steps)
             return ReviewResult(
-                stability=s, difficulty=d, interval_days=interval,
-                repetitions=card.repetitions + 1, lapses=card.lapses,
-                state=STATE_REVIEW,
-                next_review=now + timedelta(days=interval),
+                stability=memory.s_forget, difficulty=d, interval_days=0,
+                repetitions=card.repetitions + 1, lapses=card.lapses + 1,
+                state=STATE_RELEARNING,
+                next_review=now + timedelta(minutes=delay) if delay > 0 else now + timedelta(days=1),
                 last_review=now,
-                learning_step=0, again_in_minutes=0, graduated=True,
+                learning_step=0, again_in_minutes=delay, graduated=False,
             )
-        delay = _learning_step_minutes(next_step, steps)
+
+        s = self._recall(card, memory, rating)
+        interval = _ivl(s)
         return ReviewResult(
-            stability=s, difficulty=d, interval_days=0,
+            stability=s, difficulty=d, interval_days=interval,
             repetitions=card.repetitions + 1, lapses=card.lapses,
-            state=card.state,
-            next_review=now + timedelta(minutes=delay),
+            state=STATE_REVIEW,
+            next_review=now + timedelta(days=interval),
             last_review=now,
-            learning_step=next_step, again_in_minutes=delay, graduated=False,
+            learning_step=0, again_in_minutes=0, graduated=True,
         )
 
-    # ── REVIEW cards ──
-    elapsed = 0.0
-    if card.last_review:
-        lr = card.last_review if card.last_review.tzinfo else card.last_review.replace(tzinfo=timezone.utc)
-        elapsed = max(0, (now - lr).total_seconds() / 86400)
+    def preview(self, card: CardState, now: Optional[datetime] = None) -> dict[int, dict]:
+        """Projected scheduling for each rating; see preview_intervals()."""
+        now = now or datetime.now(timezone.utc)
+        memory = None if card.state == STATE_NEW else self._memory(card, now)
+        if card.state == STATE_REVIEW and card.stability > 0:
+            # Closed form for graduated cards: Again starts relearning, the
+            # other ratings only differ in the recall stability factor.
+            again = _learning_step_minutes(0, self.relearning_steps)
+            result = {AGAIN: {"days": 0, "minutes": again, "graduated": False}}
+            for rating in (HARD, GOOD, EASY):
+                days = self.next_interval(self._recall(card, memory, rating))
+                result[rating] = {"days": days, "minutes": 0, "graduated": True}
+            return result
+        result = {}
+        for rating in RATINGS:
+            res = self._review(card, rating, now, memory)
+            if res.graduated:
+                result[rating] = {"days": res.interval_days, "minutes": 0, "graduated": True}
+            else:
+                result[rating] = {"days": 0, "minutes": res.again_in_minutes, "graduated": False}
+        return result
 
-    r = retrievability(elapsed, card.stability)
-    d = _next_difficulty(card.difficulty, rating)
+    def preview_many(self, cards: Iterable[CardState], now: Optional[datetime] = None) -> list[dict[int, dict]]:
+        """preview() for a page of cards at one instant."""
+        now = now or datetime.now(timezone.utc)
+        return [self.preview(card, now) for card in cards]
 
-    if rating == AGAIN:
-        s = _stability_after_forgetting(card.difficulty, card.stability, r)
-        delay = _learning_step_minutes(0, r_steps)
-        return ReviewResult(
-            stability=s, difficulty=d, interval_days=0,
-            repetitions=card.repetitions + 1, lapses=card.lapses + 1,
-            state=STATE_RELEARNING,
-            next_review=now + timedelta(minutes=delay) if delay > 0 else now + timedelta(days=1),
-            last_review=now,
-            learning_step=0, again_in_minutes=delay, graduated=False,
-        )
 
-    s = _stability_after_recall(card.difficulty, card.stability, r, rating)
-    interval = _ivl(s)
-    return ReviewResult(
-        stability=s, difficulty=d, interval_days=interval,
-        repetitions=card.repetitions + 1, lapses=card.lapses,
-        state=STATE_REVIEW,
-        next_review=now + timedelta(days=interval),
-        last_review=now,
-        learning_step=0, again_in_minutes=0, graduated=True,
+@lru_cache(maxsize=256)
+def get_scheduler(
+    learning_steps: Optional[tuple[int, ...]] = None,
+    relearning_steps: Optional[tuple[int, ...]] = None,
+    desired_retention: Optional[float] = None,
+    max_interval: Optional[int] = None,
+) -> Scheduler:
+    """Shared Scheduler per settings combination (None = the module default)."""
+    return Scheduler(
+        learning_steps if learning_steps is not None else tuple(LEARNING_STEPS),
+        relearning_steps if relearning_steps is not None else tuple(RELEARNING_STEPS),
+        desired_retention if desired_retention is not None else REQUEST_RETENTION,
+        max_interval if max_interval is not None else MAX_INTERVAL,
+    )
+
+
+def _scheduler_for(learning_steps, relearning_steps, desired_retention, max_interval) -> Scheduler:
+    return get_scheduler(
+        tuple(learning_steps) if learning_steps is not None else None,
+        tuple(relearning_steps) if relearning_steps is not None else None,
+        desired_retention,
+        max_interval,
     )
 
 
+def review(
+    card: CardState,
+    rating: int,
+    now: Optional[datetime] = None,
+    *,
+    learning_steps: Optional[list[int]] = None,
+    relearning_steps: Optional[list[int]] = None,
+    desired_retention: Optional[float] = None,
+    max_interval: Optional[int] = None,
+    fuzz: bool = False,
+    rng: Optional[random.Random] = None,
+    due_load: Optional[Callable[[int], int]] = None,
+) -> ReviewResult:
+    """Process a review and return the new card state.
+
+    Optional overrides allow per-user settings for learning steps,
+    desired retention, and max interval to be applied. With fuzz, day
+    intervals go through fuzz_interval (load-balanced when due_load is
+    given).
+
+    For learning/relearning cards, scheduling works via steps:
+      - Again -> back to step 0
+      - Hard -> repeat current step (average of Again and Good timing)
+      - Good -> advance to next step; if past the last step, graduate
+      - Easy -> immediately graduate
+
+    For review cards, standard FSRS scheduling applies.
+    """
+    scheduler = _scheduler_for(learning_steps, relearning_steps, desired_retention, max_interval)
+    return scheduler.review(card, rating, now, fuzz=fuzz, rng=rng, due_load=due_load)
+
+
 def preview_intervals(
     card: CardState,
     now: Optional[datetime] = None,
@@ -373,17 +518,5 @@ def preview_intervals(
     For learning/relearning cards, minutes > 0 means the card repeats in-session.
     For review cards, days > 0 means the card is scheduled for a future date.
     """
-    result = {}
-    for r in RATINGS:
-        res = review(
-            card, r, now,
-            learning_steps=learning_steps,
-            relearning_steps=relearning_steps,
-            desired_retention=desired_retention,
-            max_interval=max_interval,
-        )
-        if res.graduated:
-            result[r] = {"days": res.interval_days, "minutes": 0, "graduated": True}
-        else:
-            result[r] = {"days": 0, "minutes": res.again_in_minutes, "graduated": False}
-    return result
+    scheduler = _scheduler_for(learning_steps, relearning_steps, desired_retention, max_interval)
+    return scheduler.preview(card, now)
@@ -0,0 +1,214 @@
+"""JWKS manager for Supabase token verification.
+
+Keeps parsed key objects keyed by kid and refreshes them off the request
+path: a background thread prefetches shortly before the TTL runs out, and
+requests that find the set stale keep using it while one refresh runs.
+Only a cold start (no keys yet) or an unknown kid blocks on the network,
+and unknown kids trigger at most one refresh per cooldown window.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import httpx
+from jose import jwk
+from jose.backends.base import Key
+from jose.exceptions import JWKError
+
+logger = logging.getLogger(__name__)
+
+JWKS_TTL = 3600  # 1 hour
+JWKS_PREFETCH_MARGIN = 300  # refresh this long before the TTL runs out
+UNKNOWN_KID_COOLDOWN = 30  # min seconds between kid-miss refreshes
+RETRY_INTERVAL = 30  # background retry delay after a failed refresh
+
+_DEFAULT_ALG_BY_KTY = {"EC": "ES256", "RSA": "RS256", "OKP": "EdDSA"}
+
+
+def _parse_keys(raw_keys: list[dict[str, Any]]) -> dict[str, Key]:
+    """Construct key objects once per fetch; skip keys jose cannot load."""
+    parsed: dict[str, Key] = {}
+    for k in raw_keys:
+        kid = k.get("kid")
+        alg = k.get("alg") or _DEFAULT_ALG_BY_KTY.get(k.get("kty", ""))
+        if not kid or not alg:
+            continue
+        try:
+            parsed[kid] = jwk.construct(k, alg)
+        except (JWKError, ValueError, TypeError) as exc:
+            logger.warning("Skipping unusable JWKS key %s (%s): %s", kid, alg, exc)
+    return parsed
+
+
+class JWKSManager:
+    """Thread-safe, stale-while-revalidate cache of one JWKS endpoint."""
+
+    def __init__(
+        self,
+        jwks_url: str,
+        *,
+        ttl: float = JWKS_TTL,
+        prefetch_margin: float = JWKS_PREFETCH_MARGIN,
+        unknown_kid_cooldown: float = UNKNOWN_KID_COOLDOWN,
+        timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.prefetch_margin = min(prefetch_margin, ttl)
+        self.unknown_kid_cooldown = unknown_kid_cooldown
+        self._clock = clock
+        self._client = httpx.Client(timeout=timeout)
+
+        self._keys: dict[str, Key] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_kid_refresh = float("-inf")
+        self._refresh_lock = threading.Lock()  # single-flight for network fetches
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.unknown_kid_refreshes = 0
+        self.stale_served = 0
+        self.last_refresh_seconds = 0.0
+        self.key_hits = 0  # served from the cached set without a blocking fetch
+        self.key_misses = 0
+
+    # ── Public API ──
+
+    def get_key(self, kid: str) -> Optional[Key]:
+        """Return the parsed key for kid, or None if the issuer does not publish it."""
+        cold = self._fetched_at is None
+        if cold:
+            self._refresh_blocking()
+        elif self._is_due():
+            if self._clock() - self._fetched_at >= self.ttl:
+                self.stale_served += 1
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None or cold:
+            self.key_misses += 1
+        else:
+            self.key_hits += 1
+        if key is None:
+            now = self._clock()
+            if now - self._last_kid_refresh >= self.unknown_kid_cooldown:
+                self._last_kid_refresh = now
+                self.unknown_kid_refreshes += 1
+                self._refresh_blocking()
+                key = self._keys.get(kid)
+        return key
+
+    def refresh(self) -> None:
+        """Fetch the key set now. Raises httpx.HTTPError on failure; old keys are kept."""
+        start = time.perf_counter()
+        try:
+            r = self._client.get(self.jwks_url)
+            r.raise_for_status()
+            keys = _parse_keys(r.json().get("keys", []))
+        except (httpx.HTTPError, ValueError):
+            self.refresh_failures += 1
+            raise
+        finally:
+            self.last_refresh_seconds = time.perf_counter() - start
+        self._keys = keys
+        self._fetched_at = self._clock()
+        self.refreshes += 1
+
+    def start(self) -> None:
+        """Start the background prefetch thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="jwks-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict[str, float]:
+        age = self._clock() - self._fetched_at if self._fetched_at is not None else -1.0
+        return {
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "unknown_kid_refreshes": self.unknown_kid_refreshes,
+            "stale_served": self.stale_served,
+            "key_hits": self.key_hits,
+            "key_misses": self.key_misses,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "age_seconds": age,
+            "keys": len(self._keys),
+        }
+
+    # ── Internals ──
+
+    def _is_due(self) -> bool:
+        return self._clock() - self._fetched_at >= self.ttl - self.prefetch_margin
+
+    def _refresh_blocking(self) -> None:
+        """Refresh, or wait for an in-flight refresh to finish instead of starting another."""
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+        else:
+            with self._refresh_lock:
+                pass
+
+    def _refresh_in_background(self) -> None:
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def _run() -> None:
+            try:
+                self.refresh()
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.warning("Background JWKS refresh failed; serving stale keys: %s", exc)
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=_run, name="jwks-refresh", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            if self._fetched_at is None:
+                delay = 0.0
+            else:
+                delay = max(0.0, self._fetched_at + self.ttl - self.prefetch_margin - self._clock())
+            if self._stop.wait(delay):
+                return
+            try:
+                self._refresh_blocking()
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.warning("JWKS prefetch failed: %s", exc)
+                if self._stop.wait(RETRY_INTERVAL):
+                    return
+
+
+_managers: dict[str, JWKSManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_jwks_manager(supabase_url: str) -> JWKSManager:
+    """Return the process-wide manager for a Supabase project URL."""
+    manager = _managers.get(supabase_url)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(supabase_url)
+            if manager is None:
+                jwks_url = f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+                manager = _managers[supabase_url] = JWKSManager(jwks_url)
+    return manager
+
+
+def all_jwks_managers() -> dict[str, JWKSManager]:
+    return dict(_managers)
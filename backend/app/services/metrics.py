@@ -0,0 +1,188 @@
+"""Minimal Prometheus-compatible metrics registry.
+
+Counters and histograms keep plain dicts keyed by label tuples, guarded by
+one small lock per metric, so recording on hot paths costs a dict lookup and
+an uncontended lock. Values owned by other components (pool sizes, cache
+hit counters) are read at scrape time through registered collectors instead
+of being pushed on every operation.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Callable, Iterable, Optional, Sequence
+
+# (name, type, help, [(labels, value), ...])
+Sample = tuple[dict[str, str], float]
+Family = tuple[str, str, str, list[Sample]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def collect(self) -> Iterable[Family]:
+        with self._lock:
+            items = list(self._values.items())
+        yield self.name, "counter", self.help, [
+            (dict(zip(self.labelnames, lv)), v) for lv, v in items
+        ]
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labelvalues)
+            if row is None:
+                row = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        row = self._values.get(labelvalues)
+        return int(sum(row[:-1])) if row else 0
+
+    def collect(self) -> Iterable[Family]:
+        with self._lock:
+            items = [(lv, list(row)) for lv, row in self._values.items()]
+        samples: list[tuple[str, dict[str, str], float]] = []
+        for lv, row in items:
+            labels = dict(zip(self.labelnames, lv))
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += n
+                samples.append(("_bucket", {**labels, "le": _fmt_value(bound)}, cumulative))
+            samples.append(("_sum", labels, row[-1]))
+            samples.append(("_count", labels, cumulative))
+        yield self.name, "histogram", self.help, samples  # type: ignore[misc]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, fn: Callable[[], Iterable[Family]]) -> None:
+        """Add a scrape-time callback yielding (name, type, help, samples) families."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for source in [m.collect for m in self._metrics] + self._collectors:
+            for name, mtype, help_text, samples in source():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {mtype}")
+                for sample in samples:
+                    if len(sample) == 3:  # histogram series: (suffix, labels, value)
+                        suffix, labels, value = sample
+                    else:
+                        suffix, (labels, value) = "", sample
+                    lines.append(f"{name}{suffix}{_fmt_labels(labels)} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+DB_POOL_WAIT = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled DB connection.", (),
+    (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+AI_REQUESTS = REGISTRY.counter(
+    "ai_upstream_requests_total", "AI upstream calls by operation and outcome.", ("operation", "outcome")
+)
+AI_LATENCY = REGISTRY.histogram(
+    "ai_upstream_duration_seconds", "AI upstream call latency.", ("operation",)
+)
+
+
+def cache_family(stats: dict[str, tuple[float, float]]) -> Iterable[Family]:
+    """Families for {cache_name: (hits, misses)} including a hit ratio gauge."""
+    hits = [({"cache": name}, h) for name, (h, _) in stats.items()]
+    misses = [({"cache": name}, m) for name, (_, m) in stats.items()]
+    ratios = [
+        ({"cache": name}, (h / (h + m)) if (h + m) else 0.0)
+        for name, (h, m) in stats.items()
+    ]
+    yield "cache_hits_total", "counter", "Cache hits by cache.", hits
+    yield "cache_misses_total", "counter", "Cache misses by cache.", misses
+    yield "cache_hit_ratio", "gauge", "Cache hit ratio since process start.", ratios
+
+
+def gauge_family(name: str, help: str, samples: list[Sample], mtype: str = "gauge") -> Family:
+    return name, mtype, help, samples
+
+
+def route_label(scope: dict) -> Optional[str]:
+    """Route template (e.g. /flashcards/cards/{card_id}) to keep label cardinality bounded."""
+    # Newer FastAPI keeps the router-relative route in scope["route"] and the
+    # prefixed template on the effective route context.
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path_format", None)
+    if path is None:
+        path = getattr(scope.get("route"), "path_format", None)
+    return path or None
@@ -0,0 +1,139 @@
+"""Opt-in statistical profiler for individual requests.
+
+A sampler thread reads ``sys._current_frames()`` every interval while a
+profiled request is in flight and counts collapsed stacks (the
+``frame;frame;frame count`` format read by flamegraph.pl and speedscope).
+Idle threads (parked in threading/selectors/queue waits) are skipped, so
+the event loop and threadpool workers only show up while running code.
+Only one request is profiled at a time per process; concurrent requests
+still appear in its samples, so profiles are clearest under low load.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+_SAFE_NAME = re.compile(r"^[\w.\-]+\.collapsed$")
+
+
+def _frame_label(code) -> str:
+    parts = Path(code.co_filename).parts[-2:]
+    return f"{code.co_name} ({'/'.join(parts)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Collect collapsed stacks from all other threads until stop()."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+
+# ── Admin-signed opt-in header ──
+
+
+def sign_profile_token(secret: str, expires_at: int) -> str:
+    """Token for the X-Profile-Request header: '<unix expiry>.<hex HMAC-SHA256>'."""
+    sig = hmac.new(secret.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{sig}"
+
+
+def verify_profile_token(secret: str, token: str, now: Optional[float] = None) -> bool:
+    if not secret or not token:
+        return False
+    expires, _, _ = token.partition(".")
+    if not expires.isdigit() or int(expires) < (now if now is not None else time.time()):
+        return False
+    return hmac.compare_digest(token, sign_profile_token(secret, int(expires)))
+
+
+# ── Profile files ──
+
+
+@dataclass
+class ProfileFile:
+    name: str
+    size: int
+    created_at: datetime
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", value).strip("_") or "root"
+
+
+def write_profile(
+    output_dir: str, method: str, route: str, duration_ms: float, stacks: Counter, max_files: int = 200
+) -> Path:
+    """Write stacks as a .collapsed file named after the route, pruning the oldest beyond max_files."""
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    path = directory / f"{method}_{_slug(route)}_{stamp}_{int(duration_ms)}ms.collapsed"
+    path.write_text("".join(f"{stack} {n}\n" for stack, n in stacks.most_common()))
+
+    existing = sorted(directory.glob("*.collapsed"), key=lambda p: p.stat().st_mtime)
+    for old in existing[: max(0, len(existing) - max_files)]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def list_profiles(output_dir: str) -> list[ProfileFile]:
+    directory = Path(output_dir)
+    if not directory.is_dir():
+        return []
+    files = []
+    for p in directory.glob("*.collapsed"):
+        st = p.stat()
+        files.append(ProfileFile(p.name, st.st_size, datetime.fromtimestamp(st.st_mtime, timezone.utc)))
+    return sorted(files, key=lambda f: f.created_at, reverse=True)
+
+
+def resolve_profile(output_dir: str, name: str) -> Optional[Path]:
+    """Path for a listed profile name, or None (rejects anything that is not a plain file name)."""
+    if not _SAFE_NAME.match(name):
+        return None
+    path = Path(output_dir) / name
+    return path if path.is_file() else None
@@ -0,0 +1,235 @@
+"""Server-side review queue for a study session.
+
+The queue is built in the order a session should show cards:
+
+1. learning/relearning cards due now, by due time;
+2. review cards due now, most overdue first (or lowest retrievability
+   first with ``review_order="retrievability"``), capped by what is left
+   of ``daily_review_limit`` today;
+3. new cards in ``new_card_order`` (sequential by id, or a shuffle that is
+   stable for the day), capped by what is left of ``daily_new_cards``.
+
+"Today" is the UTC day; what has been used is counted from
+flashcard_review_logs. Each step is one query on ix_flashcards_user_state_due
+that selects ids only, so the queue stays small; card bodies are fetched a
+page at a time with fetch_cards(). The query plan is a generator of
+statements shared by build_queue() and build_queue_async(). Callers that
+already hold the user's SchedulerConfig pass it in to skip the settings
+query.
+
+Cursors are stateless: the remaining ids, zlib-compressed and base64url
+encoded, so any worker can serve the next page.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Generator, Literal, Optional
+
+from sqlalchemy import BigInteger, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.flashcard import Flashcard
+from app.models.flashcard_review_log import FlashcardReviewLog
+from app.models.flashcard_settings import FlashcardSettings
+from app.services.fsrs import STATE_LEARNING, STATE_NEW, STATE_RELEARNING, STATE_REVIEW, retrievability
+from app.services.scheduler_config import DEFAULT_NEW_CARDS, DEFAULT_REVIEW_LIMIT, SchedulerConfig
+
+ReviewOrder = Literal["due", "retrievability"]
+
+# Day-seeded shuffle for new_card_order="random": order by id * m mod P with a
+# per-day multiplier m in [1, P); P is prime, so this permutes the ids.
+_SHUFFLE_K = 2654435761
+_SHUFFLE_P = 2147483647
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class ReviewQueue:
+    learning: list[int] = field(default_factory=list)
+    review: list[int] = field(default_factory=list)
+    new: list[int] = field(default_factory=list)
+
+    @property
+    def ids(self) -> list[int]:
+        return self.learning + self.review + self.new
+
+    def counts(self) -> dict[str, int]:
+        return {"learning": len(self.learning), "review": len(self.review), "new": len(self.new)}
+
+
+def day_start(now: datetime) -> datetime:
+    return now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes for DateTime(timezone=True) columns.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _base(columns, user_id: str, deck_id: Optional[int]):
+    stmt = select(*columns).where(
+        Flashcard.user_id == user_id,
+        Flashcard.suspended == False,  # noqa: E712
+        Flashcard.buried == False,  # noqa: E712
+    )
+    if deck_id is not None:
+        stmt = stmt.where(Flashcard.deck_id == deck_id)
+    return stmt
+
+
+def _plan(
+    user_id: str,
+    deck_id: Optional[int],
+    review_order: ReviewOrder,
+    now: datetime,
+    config: Optional[SchedulerConfig],
+) -> Generator:
+    """Yield statements, receive their rows, return the ReviewQueue."""
+    if config is not None:
+        new_limit, review_limit, new_order = config.daily_new_cards, config.daily_review_limit, config.new_card_order
+    else:
+        settings_rows = yield select(
+            FlashcardSettings.daily_new_cards,
+            FlashcardSettings.daily_review_limit,
+            FlashcardSettings.new_card_order,
+        ).where(FlashcardSettings.user_id == user_id)
+        if settings_rows:
+            new_limit, review_limit, new_order = settings_rows[0]
+        else:
+            new_limit, review_limit, new_order = DEFAULT_NEW_CARDS, DEFAULT_REVIEW_LIMIT, "sequential"
+
+    start = day_start(now)
+    used_rows = yield select(
+        func.coalesce(func.sum(case((FlashcardReviewLog.state == STATE_NEW, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((FlashcardReviewLog.state == STATE_REVIEW, 1), else_=0)), 0),
+    ).where(FlashcardReviewLog.user_id == user_id, FlashcardReviewLog.reviewed_at >= start)
+    new_today, reviews_today = used_rows[0]
+    new_left = max(0, new_limit - int(new_today))
+    reviews_left = max(0, review_limit - int(reviews_today))
+
+    queue = ReviewQueue()
+    rows = yield (
+        _base([Flashcard.id], user_id, deck_id)
+        .where(Flashcard.state.in_((STATE_LEARNING, STATE_RELEARNING)), Flashcard.next_review <= now)
+        .order_by(Flashcard.next_review, Flashcard.id)
+    )
+    queue.learning = [r[0] for r in rows]
+
+    if reviews_left:
+        due_reviews = _base(
+            [Flashcard.id, Flashcard.stability, Flashcard.last_review], user_id, deck_id
+        ).where(Flashcard.state == STATE_REVIEW, Flashcard.next_review <= now)
+        if review_order == "retrievability":
+            # R depends on elapsed time and stability, so rank due reviews in Python.
+            rows = yield due_reviews
+            rows = sorted(
+                rows,
+                key=lambda r: (
+                    retrievability((now - _as_utc(r[2])).total_seconds() / 86400, r[1]) if r[2] else 0.0,
+                    r[0],
+                ),
+            )
+            queue.review = [r[0] for r in rows[:reviews_left]]
+        else:
+            rows = yield due_reviews.order_by(Flashcard.next_review, Flashcard.id).limit(reviews_left)
+            queue.review = [r[0] for r in rows]
+
+    if new_left:
+        new_cards = _base([Flashcard.id], user_id, deck_id).where(
+            Flashcard.state == STATE_NEW,
+            (Flashcard.next_review == None) | (Flashcard.next_review <= now),  # noqa: E711
+        )
+        if new_order == "random":
+            multiplier = 1 + (start.toordinal() * _SHUFFLE_K) % (_SHUFFLE_P - 1)
+            new_cards = new_cards.order_by((cast(Flashcard.id, BigInteger) * multiplier) % _SHUFFLE_P, Flashcard.id)
+        else:
+            new_cards = new_cards.order_by(Flashcard.id)
+        rows = yield new_cards.limit(new_left)
+        queue.new = [r[0] for r in rows]
+
+    return queue
+
+
+def build_queue(
+    db: Session,
+    user_id: str,
+    deck_id: Optional[int] = None,
+    review_order: ReviewOrder = "due",
+    now: Optional[datetime] = None,
+    config: Optional[SchedulerConfig] = None,
+) -> ReviewQueue:
+    plan = _plan(user_id, deck_id, review_order, now or datetime.now(timezone.utc), config)
+    rows = None
+    try:
+        while True:
+            rows = db.execute(plan.send(rows)).all()
+    except StopIteration as done:
+        return done.value
+
+
+async def build_queue_async(
+    db: AsyncSession,
+    user_id: str,
+    deck_id: Optional[int] = None,
+    review_order: ReviewOrder = "due",
+    now: Optional[datetime] = None,
+    config: Optional[SchedulerConfig] = None,
+) -> ReviewQueue:
+    plan = _plan(user_id, deck_id, review_order, now or datetime.now(timezone.utc), config)
+    rows = None
+    try:
+        while True:
+            rows = (await db.execute(plan.send(rows))).all()
+    except StopIteration as done:
+        return done.value
+
+
+def _cards_stmt(user_id: str, ids: list[int]):
+    return select(Flashcard).where(Flashcard.user_id == user_id, Flashcard.id.in_(ids))
+
+
+def _in_order(cards, ids: list[int]) -> list[Flashcard]:
+    by_id = {c.id: c for c in cards}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def fetch_cards(db: Session, user_id: str, ids: list[int]) -> list[Flashcard]:
+    """The user's cards for ids, in the order of ids (missing ids are skipped)."""
+    if not ids:
+        return []
+    return _in_order(db.scalars(_cards_stmt(user_id, ids)), ids)
+
+
+async def fetch_cards_async(db: AsyncSession, user_id: str, ids: list[int]) -> list[Flashcard]:
+    if not ids:
+        return []
+    return _in_order(await db.scalars(_cards_stmt(user_id, ids)), ids)
+
+
+def encode_cursor(ids: list[int]) -> Optional[str]:
+    if not ids:
+        return None
+    raw = zlib.compress(",".join(map(str, ids)).encode("ascii"), 9)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list[int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        text = zlib.decompress(raw).decode("ascii")
+        return [int(part) for part in text.split(",")] if text else []
+    except (binascii.Error, zlib.error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def paginate(ids: list[int], page_size: int) -> tuple[list[int], Optional[str]]:
+    """Split ids into this page and the cursor for the rest."""
+    return ids[:page_size], encode_cursor(ids[page_size:])
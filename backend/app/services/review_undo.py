@@ -0,0 +1,106 @@
+"""Flashcard review undo.
+
+Every review log row stores a snapshot of the card's FSRS fields from
+before the review. Undo writes the snapshot back in one UPDATE and
+deletes the log row, which also gives back the day's new/review allowance
+counted by the review queue. The UPDATE only applies while the card's
+last_review is still the undone review's reviewed_at: once the card was
+reviewed again (another session or device), that later review has to be
+undone first.
+
+Recent reviews are also pushed onto an in-memory stack per (user, study
+session), so stacked undo does not have to query the log. The stack is
+per process and only a shortcut: an entry whose log row is already gone
+(undone on another worker) is dropped, and an empty stack falls back to
+the user's latest logged review.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from app.config import get_settings
+from app.services.fsrs import CardState
+
+_DATETIME_FIELDS = ("next_review", "last_review")
+
+SessionKey = tuple[str, Optional[str]]
+
+
+def snapshot(cs: CardState) -> dict:
+    """JSON-safe copy of a card's FSRS fields."""
+    data = asdict(cs)
+    for name in _DATETIME_FIELDS:
+        if data[name] is not None:
+            data[name] = data[name].isoformat()
+    return data
+
+
+def restore_fields(snap: dict) -> dict:
+    """Flashcard column values from a snapshot."""
+    data = dict(snap)
+    for name in _DATETIME_FIELDS:
+        if data.get(name) is not None:
+            data[name] = datetime.fromisoformat(data[name])
+    return data
+
+
+@dataclass(frozen=True)
+class UndoEntry:
+    log_id: int
+    card_id: int
+    snapshot: dict
+    reviewed_at: datetime
+
+
+class UndoBuffer:
+    """Ring buffer of the last ``depth`` reviews per session, LRU over ``max_sessions``."""
+
+    def __init__(self, depth: int, max_sessions: int):
+        self.depth = depth
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[SessionKey, deque[UndoEntry]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def push(self, key: SessionKey, entry: UndoEntry) -> None:
+        if self.depth <= 0 or self.max_sessions <= 0:
+            return
+        with self._lock:
+            stack = self._sessions.get(key)
+            if stack is None:
+                stack = self._sessions[key] = deque(maxlen=self.depth)
+            self._sessions.move_to_end(key)
+            stack.append(entry)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def pop(self, key: SessionKey) -> Optional[UndoEntry]:
+        with self._lock:
+            stack = self._sessions.get(key)
+            if not stack:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry = stack.pop()
+            if not stack:
+                del self._sessions[key]
+            return entry
+
+    def clear(self, key: SessionKey) -> None:
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+@lru_cache
+def get_undo_buffer() -> UndoBuffer:
+    settings = get_settings()
+    return UndoBuffer(settings.REVIEW_UNDO_DEPTH, settings.REVIEW_UNDO_SESSIONS)
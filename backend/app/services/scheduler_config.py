@@ -0,0 +1,134 @@
+"""Compiled per-user FSRS scheduler configuration.
+
+Reviews and interval previews need the user's step lists, desired
+retention and maximum interval. Rather than querying flashcard_settings
+and re-parsing the step strings on every request, each user's settings
+row is compiled once into a SchedulerConfig (the shared fsrs.Scheduler
+for those settings plus the daily queue limits) and kept in an LRU.
+
+PATCH /flashcards/settings replaces the user's entry via put(). The cache
+is per process, so entries are also reloaded after ttl_seconds to pick
+up changes made on other workers.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.flashcard_settings import FlashcardSettings
+from app.services.fsrs import Scheduler, get_scheduler
+
+DEFAULT_NEW_CARDS = 20
+DEFAULT_REVIEW_LIMIT = 200
+
+
+def parse_steps(s: str) -> tuple[int, ...]:
+    """Parse comma-separated step minutes like '1,10' -> (1, 10)."""
+    parts = [p.strip() for p in s.split(",") if p.strip()]
+    return tuple(int(p) for p in parts if p.isdigit())
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    scheduler: Scheduler
+    daily_new_cards: int = DEFAULT_NEW_CARDS
+    daily_review_limit: int = DEFAULT_REVIEW_LIMIT
+    new_card_order: str = "sequential"
+
+    @classmethod
+    def compile(cls, row: Optional[FlashcardSettings]) -> "SchedulerConfig":
+        if row is None:
+            return DEFAULT_CONFIG
+        return cls(
+            scheduler=get_scheduler(
+                parse_steps(row.learning_steps),
+                parse_steps(row.relearning_steps),
+                row.desired_retention,
+                row.max_interval_days,
+            ),
+            daily_new_cards=row.daily_new_cards,
+            daily_review_limit=row.daily_review_limit,
+            new_card_order=row.new_card_order,
+        )
+
+
+DEFAULT_CONFIG = SchedulerConfig(get_scheduler())
+
+
+def _settings_stmt(user_id: str):
+    return select(FlashcardSettings).where(FlashcardSettings.user_id == user_id)
+
+
+class SchedulerConfigs:
+    """LRU of user id -> SchedulerConfig, each reloaded after ttl_seconds."""
+
+    def __init__(self, max_users: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[SchedulerConfig, float]] = OrderedDict()
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, user_id: str) -> Optional[SchedulerConfig]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= self._clock():
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def put(self, user_id: str, row: Optional[FlashcardSettings]) -> SchedulerConfig:
+        config = SchedulerConfig.compile(row)
+        if self.max_users <= 0:
+            return config
+        with self._lock:
+            self.loads += 1
+            self._entries[user_id] = (config, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return config
+
+    def get(self, db: Session, user_id: str) -> SchedulerConfig:
+        config = self._cached(user_id)
+        if config is not None:
+            return config
+        try:
+            row = db.scalar(_settings_stmt(user_id))
+        except Exception:
+            # flashcard_settings not migrated yet: use defaults, don't cache.
+            return DEFAULT_CONFIG
+        return self.put(user_id, row)
+
+    async def get_async(self, db: AsyncSession, user_id: str) -> SchedulerConfig:
+        config = self._cached(user_id)
+        if config is not None:
+            return config
+        return self.put(user_id, await db.scalar(_settings_stmt(user_id)))
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache
+def get_scheduler_configs() -> SchedulerConfigs:
+    settings = get_settings()
+    return SchedulerConfigs(settings.SCHEDULER_CONFIG_USERS, settings.SCHEDULER_CONFIG_TTL_SECONDS)
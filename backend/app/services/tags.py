@@ -0,0 +1,97 @@
+"""Normalized tag index for flashcards and notes.
+
+Cards and notes keep their tags as a comma-separated string, which is
+what the API reads and writes, stored in the canonical form from
+format_tags() ("cardio, murmurs"). Each tag is also a row in
+flashcard_tags / note_tags, indexed on (user_id, tag), so tag filters are
+an indexed IN (...) instead of a LIKE scan and tag facets are one
+GROUP BY.
+
+Every write that changes a tags string must call TagIndex.set() (or, for
+set-based updates, add()/discard()) in the same transaction.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.flashcard import Flashcard
+from app.models.note import Note
+from app.models.tag import FlashcardTag, NoteTag
+
+MAX_TAG_LENGTH = 100
+
+
+def parse_tags(value: Optional[str]) -> list[str]:
+    """Tags of a comma-separated string: stripped, non-empty, de-duplicated, in order."""
+    seen: dict[str, None] = {}
+    for part in (value or "").split(","):
+        tag = part.strip()[:MAX_TAG_LENGTH]
+        if tag:
+            seen.setdefault(tag)
+    return list(seen)
+
+
+def format_tags(tags: Iterable[str]) -> Optional[str]:
+    """Canonical tags string ("a, b"), or None for no tags."""
+    return ", ".join(tags) or None
+
+
+class TagIndex:
+    """The tag rows of one item type (model.tags) in its association table."""
+
+    def __init__(self, model, tag_model, item_column):
+        self.model = model
+        self.tag_model = tag_model
+        self.item_column = item_column
+
+    def set(self, db: Session, user_id: str, item_id: int, value: Optional[str]) -> Optional[str]:
+        """Replace one item's tag rows with the tags in value; returns the canonical string."""
+        db.execute(delete(self.tag_model).where(self.item_column == item_id))
+        tags = parse_tags(value)
+        if tags:
+            db.execute(insert(self.tag_model), [
+                {self.item_column.key: item_id, "tag": tag, "user_id": user_id} for tag in tags
+            ])
+        return format_tags(tags)
+
+    def add(self, db: Session, user_id: str, tag: str, where: list) -> None:
+        """Tag every item matching where (which must exclude items that already have tag)."""
+        db.execute(insert(self.tag_model).from_select(
+            [self.item_column.key, "tag", "user_id"],
+            select(self.model.id, literal(tag), self.model.user_id).where(self.model.user_id == user_id, *where),
+        ))
+
+    def discard(self, db: Session, user_id: str, tag: Optional[str], item_ids) -> None:
+        """Drop tag (or every tag, if None) from the given items (ids or a select of ids)."""
+        stmt = delete(self.tag_model).where(self.tag_model.user_id == user_id, self.item_column.in_(item_ids))
+        if tag is not None:
+            stmt = stmt.where(self.tag_model.tag == tag)
+        db.execute(stmt)
+
+    def has(self, user_id: str, tag: str):
+        """Condition on the item model: it carries tag."""
+        return self.model.id.in_(
+            select(self.item_column).where(self.tag_model.user_id == user_id, self.tag_model.tag == tag)
+        )
+
+    def has_all(self, user_id: str, tags: Iterable[str]) -> list:
+        return [self.has(user_id, tag.strip()) for tag in tags if tag.strip()]
+
+    def counts(self, db: Session, user_id: str, *where) -> list[tuple[str, int]]:
+        """(tag, item count) for the user's items matching where, most used first."""
+        n = func.count()
+        stmt = (
+            select(self.tag_model.tag, n)
+            .join(self.model, self.model.id == self.item_column)
+            .where(self.tag_model.user_id == user_id, *where)
+            .group_by(self.tag_model.tag)
+            .order_by(n.desc(), self.tag_model.tag)
+        )
+        return [(tag, count) for tag, count in db.execute(stmt)]
+
+
+CARD_TAGS = TagIndex(Flashcard, FlashcardTag, FlashcardTag.card_id)
+NOTE_TAGS = TagIndex(Note, NoteTag, NoteTag.note_id)
@@ -0,0 +1,115 @@
+"""Bounded TTL caches keyed by bearer token digest.
+
+Two process-wide instances share the same LRU/TTL logic:
+
+- get_user_cache(): verified token -> user id. Lets authenticated requests
+  skip JWT verification and the Supabase profile sync when the same token
+  is presented again. Only the user id is cached: the User row itself is
+  re-read by primary key on every request, so plan changes written by the
+  billing webhook are always visible.
+- get_verified_token_cache(): Supabase token -> verified claims, held until
+  the token's exp. Serves callers of verify_supabase_token directly and
+  covers repeat tokens once the shorter user-id TTL has lapsed.
+
+Entries never outlive the token's own exp.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from app.config import get_settings
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenCache:
+    """LRU of token digest -> (value, expires_at), bounded by size and TTL.
+
+    With ttl_seconds=None entries live until the token exp passed to put();
+    values without an exp are then not cached. Values are deep-copied on the
+    way in and out so callers cannot mutate cached entries.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float],
+        max_entries: int,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and (self.ttl_seconds is None or self.ttl_seconds > 0)
+
+    def get(self, token: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        key = _token_key(token)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, token: str, value: Any, token_exp: Optional[float] = None) -> None:
+        """Cache value for token until the TTL or the token's own exp, whichever is first."""
+        if not self.enabled:
+            return
+        now = self._clock()
+        bounds = [float(token_exp)] if token_exp else []
+        if self.ttl_seconds is not None:
+            bounds.append(now + self.ttl_seconds)
+        if not bounds or min(bounds) <= now:
+            return
+        key = _token_key(token)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(value), min(bounds))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(_token_key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache
+def get_user_cache() -> TokenCache:
+    settings = get_settings()
+    return TokenCache(
+        ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+        max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    )
+
+
+@lru_cache
+def get_verified_token_cache() -> TokenCache:
+    return TokenCache(ttl_seconds=None, max_entries=get_settings().SUPABASE_VERIFIED_TOKEN_CACHE_SIZE)
@@ -1,24 +1,57 @@
 """Shared fixtures for backend tests."""
 import os
+from contextlib import contextmanager
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
 
 os.environ.setdefault("ENVIRONMENT", "development")
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
 os.environ.setdefault("SECRET_KEY", "test-secret-key")
+# Writes go through the test session; tests build their own SQLiteWriter when needed.
+os.environ.setdefault("SQLITE_SINGLE_WRITER", "false")
 
 from app.db.base import Base
+from app.db.instrumentation import count_queries
 from app.models.flashcard import Flashcard, FlashcardDeck
+from app.models.user import User
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="run tests marked benchmark")
+
 
+def pytest_collection_modifyitems(config, items):
+    """Skip wall-clock benchmarks unless asked for: their timings depend on machine load."""
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
 
-TEST_DB_URL = "sqlite://"
+
+@pytest.fixture()
+def db_path(tmp_path):
+    return tmp_path / "test.db"
 
 
 @pytest.fixture()
-def db():
-    """In-memory SQLite session for each test."""
-    engine = create_engine(TEST_DB_URL, connect_args={"check_same_thread": False})
+def db(db_path):
+    """Per-test SQLite session on a temp file.
+
+    StaticPool keeps a single connection so the TestClient's worker threads
+    share the test body's session; the file lets async_engine (aiosqlite)
+    see the same data.
+    """
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     Base.metadata.create_all(bind=engine)
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -29,6 +62,81 @@ def db():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture()
+def async_engine(db, db_path):
+    """AsyncEngine on the same database as db, for routes using get_async_db.
+
+    NullPool: each request opens and closes its own aiosqlite connection, so
+    nothing outlives the TestClient's event loop.
+    """
+    return create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+
+
+@pytest.fixture()
+def test_user(db):
+    """Create the user that API tests authenticate as."""
+    user = User(id="test-user", email="test@example.com", display_name="Test User")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture()
+def client(db, async_engine, test_user):
+    """FastAPI TestClient bound to the test session and authenticated as test_user."""
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_current_user
+    from app.api.questions import get_question_cache
+    from app.db import get_async_db, get_db
+    from app.main import app
+    from app.services.due_histogram import get_due_histograms
+    from app.services.scheduler_config import get_scheduler_configs
+
+    # Due histograms and scheduler configs are cached per user id, and question
+    # payloads per question id, which every test shares.
+    get_due_histograms.cache_clear()
+    get_scheduler_configs.cache_clear()
+    get_question_cache.cache_clear()
+
+    def _get_db():
+        yield db
+
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def _get_async_db():
+        async with async_session() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_async_db] = _get_async_db
+    app.dependency_overrides[get_current_user] = lambda: test_user
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def query_budget(db, async_engine):
+    """Fail the test if the block runs more SQL statements than declared.
+
+    Usage: ``with query_budget(3): client.get("/flashcards/decks")``
+    """
+    @contextmanager
+    def _budget(max_queries: int):
+        with count_queries(db.get_bind(), async_engine.sync_engine) as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"Query budget exceeded: {stats.count} > {max_queries}\n{stats.summary()}"
+        )
+
+    return _budget
+
+
 @pytest.fixture()
 def sample_deck(db):
     """Create a sample deck and return it."""
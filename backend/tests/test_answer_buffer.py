@@ -0,0 +1,121 @@
+"""Tests for the exam answer autosave buffer."""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.exam_session import ExamSession, ExamSessionAnswer
+from app.services.answer_buffer import AnswerBuffer, SessionClosedError
+
+
+def _make_session(db, user_id="test-user", n=3) -> ExamSession:
+    session = ExamSession(user_id=user_id, mode="all", total_questions=n, status="in_progress")
+    db.add(session)
+    db.flush()
+    for i in range(n):
+        db.add(ExamSessionAnswer(session_id=session.id, question_id=f"q-{i}", order_index=i))
+    db.commit()
+    return session
+
+
+def _count_statements(db):
+    statements: list[str] = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    return statements
+
+
+class TestAnswerBuffer:
+    def test_apply_returns_merged_snapshot_without_writing(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer()
+
+        rows = buf.apply(db, session.id, "test-user", [("q-1", {"answer_selected": "B", "correct": False})])
+        assert rows[0]["question_id"] == "q-1"
+        assert rows[0]["answer_selected"] == "B"
+        assert rows[0]["order_index"] == 1
+        assert buf.pending(session.id) == 1
+
+        stored = db.query(ExamSessionAnswer).filter_by(session_id=session.id, question_id="q-1").one()
+        assert stored.answer_selected is None
+
+    def test_repeat_updates_skip_database(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer()
+        buf.apply(db, session.id, "test-user", [("q-0", {"flagged": True})])
+
+        statements = _count_statements(db)
+        for _ in range(10):
+            buf.apply(db, session.id, "test-user", [("q-0", {"time_spent_seconds": 5})])
+        assert statements == []
+
+    def test_flush_writes_coalesced_deltas(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer()
+        buf.apply(db, session.id, "test-user", [("q-0", {"answer_selected": "A"})])
+        buf.apply(db, session.id, "test-user", [("q-0", {"correct": True}), ("q-2", {"flagged": True})])
+
+        assert buf.flush(db, session.id) == 2
+        assert buf.pending(session.id) == 0
+
+        db.expire_all()
+        rows = {a.question_id: a for a in db.query(ExamSessionAnswer).filter_by(session_id=session.id)}
+        assert rows["q-0"].answer_selected == "A"
+        assert rows["q-0"].correct is True
+        assert rows["q-2"].flagged is True
+        assert rows["q-1"].answer_selected is None
+
+    def test_max_pending_flushes_synchronously(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer(max_pending=1)
+        buf.apply(db, session.id, "test-user", [("q-0", {"answer_selected": "C"})])
+        assert buf.pending(session.id) == 0
+
+        db.expire_all()
+        stored = db.query(ExamSessionAnswer).filter_by(session_id=session.id, question_id="q-0").one()
+        assert stored.answer_selected == "C"
+
+    def test_other_users_session_rejected(self, db):
+        session = _make_session(db, user_id="someone-else")
+        assert AnswerBuffer().apply(db, session.id, "test-user", [("q-0", {"flagged": True})]) is None
+
+    def test_unknown_question_ignored(self, db):
+        session = _make_session(db)
+        assert AnswerBuffer().apply(db, session.id, "test-user", [("missing", {"flagged": True})]) == []
+
+    def test_flush_all_uses_own_session(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer()
+        buf.apply(db, session.id, "test-user", [("q-1", {"flagged": True})])
+
+        factory = sessionmaker(bind=db.get_bind())
+        assert buf.flush_all(factory) == 1
+
+        db.expire_all()
+        stored = db.query(ExamSessionAnswer).filter_by(session_id=session.id, question_id="q-1").one()
+        assert stored.flagged is True
+
+    def test_close_flushes_and_rejects_later_writes(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer()
+        buf.apply(db, session.id, "test-user", [("q-0", {"answer_selected": "A"})])
+
+        assert buf.close(db, session.id, "test-user") == 1
+        with pytest.raises(SessionClosedError):
+            buf.apply(db, session.id, "test-user", [("q-1", {"answer_selected": "B"})])
+
+        db.expire_all()
+        stored = db.query(ExamSessionAnswer).filter_by(session_id=session.id, question_id="q-0").one()
+        assert stored.answer_selected == "A"
+
+    def test_reopen_after_failed_completion(self, db):
+        session = _make_session(db)
+        buf = AnswerBuffer()
+        buf.close(db, session.id, "test-user")
+        buf.reopen(session.id)
+        assert buf.apply(db, session.id, "test-user", [("q-1", {"flagged": True})])[0]["flagged"] is True
+
+    def test_completed_session_not_buffered(self, db):
+        session = _make_session(db)
+        session.status = "completed"
+        db.commit()
+        with pytest.raises(SessionClosedError):
+            AnswerBuffer().apply(db, session.id, "test-user", [("q-0", {"flagged": True})])
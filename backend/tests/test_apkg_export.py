@@ -0,0 +1,83 @@
+"""Tests for GET /flashcards/decks/{id}/export.apkg."""
+import json
+import os
+import sqlite3
+import zipfile
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+from app.models.flashcard import Flashcard, FlashcardDeck
+from app.services import apkg_export
+from app.services.apkg_parser import parse_apkg
+
+
+def _export(client, deck_id):
+    return client.get(f"/flashcards/decks/{deck_id}/export.apkg")
+
+
+def _collection(body: bytes, tmp_path):
+    path = tmp_path / "collection.anki2"
+    with zipfile.ZipFile(BytesIO(body)) as zf:
+        path.write_bytes(zf.read("collection.anki2"))
+    return sqlite3.connect(path)
+
+
+class TestApkgExport:
+    def test_round_trips_through_parser(self, client, db, sample_deck):
+        db.add_all([
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front=f"Q{i}", back=f"A{i}")
+            for i in range(3)
+        ])
+        db.commit()
+        r = _export(client, sample_deck.id)
+        assert r.status_code == 200
+        assert r.headers["content-disposition"].endswith("Test%20Deck.apkg")
+        assert parse_apkg(r.content) == [("Test Deck", [("Q0", "A0"), ("Q1", "A1"), ("Q2", "A2")])]
+
+    def test_carries_fsrs_state(self, client, db, sample_deck, tmp_path):
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            Flashcard(
+                deck_id=sample_deck.id, user_id="test-user", front="review", back="b", state="review",
+                stability=12.5, difficulty=6.25, interval_days=12, repetitions=4, lapses=1,
+                next_review=now + timedelta(days=3), last_review=now - timedelta(days=9), tags="heart sounds, cardio",
+            ),
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front="new", back="b", suspended=True),
+        ])
+        db.commit()
+        conn = _collection(_export(client, sample_deck.id).content, tmp_path)
+        review, new = conn.execute("SELECT type, queue, due, ivl, reps, lapses, data FROM cards ORDER BY id").fetchall()
+        assert review[:2] == (2, 2) and review[2] in (3, 4) and review[3:6] == (12, 4, 1)
+        data = json.loads(review[6])
+        assert (data["s"], data["d"]) == (12.5, 6.25) and "lrt" in data
+        assert new[:2] == (0, apkg_export.QUEUE_SUSPENDED) and new[6] == ""
+        assert conn.execute("SELECT tags FROM notes ORDER BY id").fetchall()[0] == (" heart_sounds cardio ",)
+
+    def test_writes_in_batches(self, db, sample_deck, monkeypatch):
+        monkeypatch.setattr(apkg_export, "BATCH_SIZE", 4)
+        sizes = []
+        batches = apkg_export._batches
+
+        def spy(rows, size):
+            for batch in batches(rows, size):
+                sizes.append(len(batch))
+                yield batch
+
+        monkeypatch.setattr(apkg_export, "_batches", spy)
+        db.add_all([
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front=f"Q{i}", back="A") for i in range(10)
+        ])
+        db.commit()
+        path = apkg_export.export_deck(db, sample_deck)
+        try:
+            with open(path, "rb") as f:
+                assert len(parse_apkg(f.read())[0][1]) == 10
+        finally:
+            os.unlink(path)
+        assert sizes == [4, 4, 2]
+
+    def test_other_users_deck_is_404(self, client, db):
+        theirs = FlashcardDeck(user_id="someone-else", name="x", card_count=0)
+        db.add(theirs)
+        db.commit()
+        assert _export(client, theirs.id).status_code == 404
@@ -0,0 +1,146 @@
+"""Tests for the async engine, get_async_db and the routes migrated to it."""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from anyio import to_thread
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import session as db_session
+from app.db.session import async_database_url, get_async_db
+from app.models import UserProgress
+from app.models.flashcard import Flashcard, FlashcardDeck
+from app.models.question import Question
+
+
+class TestAsyncDatabaseUrl:
+    def test_sqlite_uses_aiosqlite(self):
+        assert async_database_url("sqlite:///./step2ck.db") == "sqlite+aiosqlite:///./step2ck.db"
+
+    def test_postgres_uses_asyncpg(self):
+        assert async_database_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+        assert async_database_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+    def test_sslmode_becomes_ssl(self):
+        assert async_database_url("postgresql://u:p@h/db?sslmode=require") == "postgresql+asyncpg://u:p@h/db?ssl=require"
+
+    def test_async_driver_kept(self):
+        assert async_database_url("postgresql+asyncpg://u@h/db") == "postgresql+asyncpg://u@h/db"
+
+
+class TestAsyncRoutes:
+    def test_due_cards(self, client, db, sample_deck):
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front="new", back="b"),
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front="due", back="b", next_review=now - timedelta(days=1)),
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front="later", back="b", next_review=now + timedelta(days=3)),
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front="buried", back="b", buried=True),
+        ])
+        db.commit()
+        r = client.get("/flashcards/due")
+        assert r.status_code == 200
+        assert sorted(c["front"] for c in r.json()) == ["due", "new"]
+
+    def test_progress_stats(self, client, db):
+        db.add(Question(id="q1", section="Cardiology", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.add_all([
+            UserProgress(user_id="test-user", question_id="q1", correct=i % 2 == 0, section="Cardiology")
+            for i in range(4)
+        ])
+        db.commit()
+        r = client.get("/progress/stats")
+        assert r.status_code == 200
+        body = r.json()
+        assert (body["total"], body["correct"], body["incorrect"]) == (4, 2, 2)
+        assert body["by_section"] == [{"name": "Cardiology", "total": 4, "correct": 2, "accuracy": 50}]
+
+    def test_questions_by_ids_keeps_order(self, client, db):
+        for qid in ("a", "b", "c"):
+            db.add(Question(id=qid, section="Renal", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.commit()
+        r = client.post("/questions/by-ids", json={"ids": ["c", "missing", "a"]})
+        assert [q["id"] for q in r.json()] == ["c", "a"]
+
+
+class TestGetAsyncDb:
+    def test_async_route_reads_through_dependency(self, sample_deck, async_engine, monkeypatch):
+        sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        monkeypatch.setattr(db_session, "get_async_sessionmaker", lambda: sessions)
+        app = FastAPI()
+
+        @app.get("/decks")
+        async def decks(db: AsyncSession = Depends(get_async_db)):
+            return {"names": list(await db.scalars(select(FlashcardDeck.name)))}
+
+        with TestClient(app) as client:
+            assert client.get("/decks").json() == {"names": ["Test Deck"]}
+
+
+def _install_sleep(engine):
+    """sleep_ms(n): a stand-in for a query that waits n ms on the database."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, _):
+        dbapi_conn.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+class TestAsyncThroughput:
+    @pytest.mark.benchmark
+    def test_benchmark_threadpool_vs_async(self, tmp_path):
+        """32 concurrent 20ms queries with 4 threadpool tokens: sync routes queue, async ones don't."""
+        url = f"sqlite:///{tmp_path / 'bench.db'}"
+        sync_engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=32)
+        async_engine = create_async_engine(url.replace("sqlite", "sqlite+aiosqlite"), pool_size=32)
+        _install_sleep(sync_engine)
+        _install_sleep(async_engine.sync_engine)
+        SyncSession = sessionmaker(sync_engine)
+        AsyncSessionLocal = async_sessionmaker(async_engine)
+
+        def sync_db():
+            with SyncSession() as s:
+                yield s
+
+        async def async_db():
+            async with AsyncSessionLocal() as s:
+                yield s
+
+        app = FastAPI()
+
+        @app.get("/sync")
+        def sync_route(db: Session = Depends(sync_db)):
+            return {"v": db.execute(text("SELECT sleep_ms(20)")).scalar()}
+
+        @app.get("/async")
+        async def async_route(db: AsyncSession = Depends(async_db)):
+            return {"v": (await db.execute(text("SELECT sleep_ms(20)"))).scalar()}
+
+        async def run(path: str) -> float:
+            to_thread.current_default_thread_limiter().total_tokens = 4
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                await asyncio.gather(*(c.get(path) for _ in range(32)))  # open pooled connections
+                start = time.perf_counter()
+                responses = await asyncio.gather(*(c.get(path) for _ in range(32)))
+                elapsed = time.perf_counter() - start
+            assert all(r.status_code == 200 for r in responses)
+            return elapsed
+
+        async def run_async() -> float:
+            try:
+                return await run("/async")
+            finally:
+                await async_engine.dispose()
+
+        try:
+            sync_s = asyncio.run(run("/sync"))
+            async_s = asyncio.run(run_async())
+        finally:
+            sync_engine.dispose()
+        print(f"\n32 concurrent 20ms queries: threadpool {sync_s * 1e3:.0f}ms, async {async_s * 1e3:.0f}ms")
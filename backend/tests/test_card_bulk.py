@@ -0,0 +1,120 @@
+"""Tests for POST /flashcards/cards/bulk."""
+from datetime import datetime, timedelta, timezone
+
+from collections import Counter
+
+from app.models.flashcard import Flashcard, FlashcardDeck
+from app.schemas.flashcard import FlashcardBulkOperation
+from app.services.card_bulk import apply_bulk_operation
+
+NOW = datetime.now(timezone.utc)
+
+
+def _cards(db, deck, n, **kw):
+    cards = [Flashcard(deck_id=deck.id, user_id="test-user", front=f"f{i}", back="b", **kw) for i in range(n)]
+    db.add_all(cards)
+    deck.card_count += n
+    db.commit()
+    return cards
+
+
+def _bulk(client, **body):
+    return client.post("/flashcards/cards/bulk", json=body)
+
+
+def _card_counts(db):
+    db.expire_all()
+    return {d.id: d.card_count for d in db.query(FlashcardDeck)}
+
+
+class TestBulkOperations:
+    def test_move_by_ids_adjusts_card_counts(self, client, db, sample_deck, query_budget):
+        other = FlashcardDeck(user_id="test-user", name="Other", card_count=0)
+        db.add(other)
+        db.commit()
+        cards = _cards(db, sample_deck, 5)
+        ids = [c.id for c in cards[:3]]
+        target = other.id
+        # Target deck, move counts, target count, UPDATE, card_count executemany (+ user refresh).
+        with query_budget(6):
+            r = _bulk(client, action="move", card_ids=ids, deck_id=target)
+        assert r.json() == {"action": "move", "affected": 3}
+        assert _card_counts(db) == {sample_deck.id: 2, other.id: 3}
+        assert {c.deck_id for c in db.query(Flashcard).filter(Flashcard.id.in_(ids))} == {other.id}
+
+    def test_move_respects_plan_limit(self, client, db, sample_deck):
+        other = FlashcardDeck(user_id="test-user", name="Other", card_count=0)
+        db.add(other)
+        db.commit()
+        cards = _cards(db, sample_deck, 51)
+        r = _bulk(client, action="move", card_ids=[c.id for c in cards], deck_id=other.id)
+        assert r.status_code == 403
+        assert _card_counts(db)[other.id] == 0
+
+    def test_move_counts_changed_rows_not_the_earlier_read(self, db, sample_deck):
+        """A card deleted after the plan-limit read must not be counted as moved."""
+        other = FlashcardDeck(user_id="test-user", name="Other", card_count=0)
+        db.add(other)
+        db.commit()
+        cards = _cards(db, sample_deck, 3)
+        op = FlashcardBulkOperation(action="move", card_ids=[c.id for c in cards], deck_id=other.id)
+        db.delete(cards[0])
+        sample_deck.card_count -= 1
+        db.commit()
+
+        assert apply_bulk_operation(db, "test-user", op, moving=Counter({sample_deck.id: 3})) == 2
+        db.commit()
+        assert _card_counts(db) == {sample_deck.id: 0, other.id: 2}
+
+    def test_delete_by_filter(self, client, db, sample_deck):
+        _cards(db, sample_deck, 3, flagged=True)
+        _cards(db, sample_deck, 2)
+        r = _bulk(client, action="delete", filter={"deck_id": sample_deck.id, "flagged": True})
+        assert r.json()["affected"] == 3
+        assert db.query(Flashcard).count() == 2
+        assert _card_counts(db)[sample_deck.id] == 2
+
+    def test_tag_and_untag_whole_entries(self, client, db, sample_deck):
+        a, b, c = _cards(db, sample_deck, 3)
+        client.patch(f"/flashcards/cards/{a.id}", json={"tags": "cardio,murmurs"})
+        client.patch(f"/flashcards/cards/{b.id}", json={"tags": "cardiology"})
+        ids = [a.id, b.id, c.id]
+        assert _bulk(client, action="tag", card_ids=ids, tag="cardio").json()["affected"] == 2
+        db.expire_all()
+        assert [x.tags for x in (a, b, c)] == ["cardio, murmurs", "cardiology, cardio", "cardio"]
+
+        r = _bulk(client, action="untag", filter={"tag": "cardio"}, tag="cardio")
+        assert r.json()["affected"] == 3
+        db.expire_all()
+        assert [x.tags for x in (a, b, c)] == ["murmurs", "cardiology", None]
+
+    def test_suspend_counts_only_changed_cards(self, client, db, sample_deck):
+        cards = _cards(db, sample_deck, 3)
+        cards[0].suspended = True
+        db.commit()
+        r = _bulk(client, action="suspend", card_ids=[c.id for c in cards])
+        assert r.json()["affected"] == 2
+        assert _bulk(client, action="unsuspend", filter={"suspended": True}).json()["affected"] == 3
+
+    def test_reset_by_state_and_due_range(self, client, db, sample_deck):
+        due = _cards(db, sample_deck, 2, state="review", stability=20.0, repetitions=4, next_review=NOW - timedelta(days=1))
+        later = _cards(db, sample_deck, 1, state="review", stability=20.0, repetitions=4, next_review=NOW + timedelta(days=9))
+        r = _bulk(client, action="reset", filter={"state": "review", "due_before": NOW.isoformat()})
+        assert r.json()["affected"] == 2
+        db.expire_all()
+        assert [(c.state, c.stability, c.next_review) for c in due] == [("new", 0.0, None)] * 2
+        assert later[0].state == "review"
+
+    def test_other_users_cards_untouched(self, client, db, sample_deck):
+        theirs = Flashcard(deck_id=sample_deck.id, user_id="someone-else", front="f", back="b")
+        db.add(theirs)
+        db.commit()
+        assert _bulk(client, action="delete", card_ids=[theirs.id]).json()["affected"] == 0
+        assert db.get(Flashcard, theirs.id) is not None
+
+    def test_validation(self, client, sample_deck):
+        assert _bulk(client, action="delete").status_code == 422
+        assert _bulk(client, action="delete", filter={}).status_code == 422
+        assert _bulk(client, action="move", card_ids=[1]).status_code == 422
+        assert _bulk(client, action="tag", card_ids=[1], tag="a,b").status_code == 422
+        assert _bulk(client, action="move", card_ids=[1], deck_id=999).status_code == 404
@@ -0,0 +1,150 @@
+"""Tests for negotiated response compression and precompressed payloads."""
+import asyncio
+import gzip
+import json
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api import questions
+from app.middleware.compression import CompressionMiddleware
+from app.models import Question
+from app.services.compression import PayloadCache, PrecompressedPayload, negotiate
+
+BIG = {"items": [{"stem": "A 54-year-old man presents with chest pain. " * 4, "i": i} for i in range(200)]}
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return BIG
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/png")
+    def png():
+        return Response(b"\x89PNG" + b"\0" * 4096, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i}\n" * 10
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/encoded")
+    def encoded():
+        return PlainTextResponse(gzip.compress(b"x" * 4096), headers={"Content-Encoding": "gzip"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return app
+
+
+class TestNegotiate:
+    def test_prefers_supported_encoding(self):
+        assert negotiate("gzip, deflate") == "gzip"
+        assert negotiate("deflate") is None
+        assert negotiate("") is None
+
+    def test_q_values_and_wildcard(self):
+        assert negotiate("gzip;q=0") is None
+        assert negotiate("*") == "gzip"
+        assert negotiate("*, gzip;q=0") is None
+
+
+class TestCompressionMiddleware:
+    def test_large_json_is_compressed(self):
+        client = TestClient(_make_app())
+        r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in r.headers["vary"]
+        assert int(r.headers["content-length"]) < len(json.dumps(BIG)) // 5
+        assert r.json() == BIG
+
+    def test_below_threshold_and_identity_untouched(self):
+        client = TestClient(_make_app())
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+    def test_incompressible_and_already_encoded_pass_through(self):
+        client = TestClient(_make_app())
+        assert "content-encoding" not in client.get("/png", headers={"Accept-Encoding": "gzip"}).headers
+        r = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.content == b"x" * 4096  # decoded exactly once
+
+    def test_streaming_is_compressed_per_chunk(self):
+        """Each streamed chunk is flushed on its own; nothing is buffered until the end."""
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        messages = [{"type": "http.disconnect"}, {"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            return messages.pop() if len(messages) > 1 else messages[0]
+
+        scope = {
+            "type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream",
+            "query_string": b"", "headers": [(b"accept-encoding", b"gzip")], "http_version": "1.1",
+            "scheme": "http", "server": ("test", 80), "client": ("test", 1), "root_path": "",
+        }
+        asyncio.run(_make_app()(scope, receive, send))
+
+        start = sent[0]
+        headers = dict(start["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        bodies = [m for m in sent[1:] if m["type"] == "http.response.body"]
+        data_chunks = [m["body"] for m in bodies if m.get("more_body")]
+        assert len(data_chunks) == 3 and all(data_chunks)
+        # A sync-flushed chunk decodes without the rest of the stream.
+        partial = zlib.decompressobj(31).decompress(data_chunks[0])
+        assert partial == b"chunk0\n" * 10
+        full = gzip.decompress(b"".join(m["body"] for m in bodies))
+        assert full == b"".join(f"chunk{i}\n".encode() * 10 for i in range(3))
+
+
+class TestPrecompressedPayload:
+    def test_encodes_each_variant_once(self):
+        payload = PrecompressedPayload(json.dumps(BIG).encode())
+        first = payload.response("gzip")
+        assert first.headers["content-encoding"] == "gzip"
+        assert payload.encoded("gzip") is payload.encoded("gzip")
+        assert json.loads(gzip.decompress(first.body)) == BIG
+        assert "content-encoding" not in payload.response("").headers
+
+    def test_question_route_serves_cached_compressed_bytes(self, client, db):
+        db.add(Question(id="q-gz", section="Cardiology", question_stem="Chest pain. " * 200, choices={"A": "MI", "B": "PE"},
+                        correct_answer="A", status="ready"))
+        db.commit()
+        r = client.get("/questions/q-gz", headers={"Accept-Encoding": "gzip"})
+        assert r.status_code == 200
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.json()["id"] == "q-gz"
+        assert isinstance(questions.get_question_cache().get("question:q-gz"), PrecompressedPayload)
+        again = client.get("/questions/q-gz", headers={"Accept-Encoding": "gzip"})
+        assert again.content == r.content
+
+
+class TestPayloadCache:
+    def test_evicts_least_recent_and_expired(self):
+        now = [0.0]
+        cache = PayloadCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+        a, b, c = (PrecompressedPayload(x) for x in (b"a", b"b", b"c"))
+        cache.put("a", a)
+        cache.put("b", b)
+        assert cache.get("a") is a
+        cache.put("c", c)
+        assert cache.get("b") is None and len(cache) == 2
+        now[0] = 10
+        assert cache.get("a") is None and len(cache) == 1
+        assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,96 @@
+"""Tests for per-user due histograms and load-balanced review scheduling."""
+from datetime import date, datetime, timedelta, timezone
+
+from app.config import get_settings
+from app.models.flashcard import Flashcard
+from app.services.due_histogram import DueHistogram, DueHistograms, get_due_histograms, load_histogram
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _scheduled(deck, due, state="review", **kw):
+    return Flashcard(
+        deck_id=deck.id, user_id="test-user", front="f", back="b", state=state,
+        stability=20.0, difficulty=5.0, next_review=due, last_review=due - timedelta(days=20), **kw,
+    )
+
+
+class TestDueHistogram:
+    def test_one_query_groups_by_day(self, db, sample_deck, query_budget):
+        db.add_all([
+            _scheduled(sample_deck, NOW),
+            _scheduled(sample_deck, NOW + timedelta(hours=3)),
+            _scheduled(sample_deck, NOW + timedelta(days=2)),
+            _scheduled(sample_deck, NOW + timedelta(days=2), suspended=True),
+            Flashcard(deck_id=sample_deck.id, user_id="test-user", front="new", back="b", next_review=NOW),
+        ])
+        db.commit()
+        with query_budget(1):
+            histogram = load_histogram(db, "test-user")
+        assert histogram.counts == {date(2026, 3, 10): 2, date(2026, 3, 12): 1}
+
+    def test_move_updates_counts(self, db):
+        histogram = load_histogram(db, "test-user")
+        histogram.move(None, NOW)
+        histogram.move(None, NOW)
+        histogram.move(NOW, NOW + timedelta(days=1))
+        assert histogram.load_from(NOW.date())(0) == 1
+        assert histogram.load_from(NOW.date())(1) == 1
+
+    def test_cache_ttl_and_lru(self, db):
+        clock = [0.0]
+        cache = DueHistograms(max_users=1, ttl_seconds=10, clock=lambda: clock[0])
+        first = cache.get(db, "u1")
+        assert cache.get(db, "u1") is first
+        clock[0] = 11
+        assert cache.get(db, "u1") is not first
+        cache.get(db, "u2")
+        assert len(cache) == 1 and cache.builds == 3
+
+
+class TestLoadBalancedReviews:
+    def test_burst_of_reviews_spreads_due_dates(self, client, db, sample_deck, monkeypatch):
+        """200 identical cards reviewed together land on several days, evenly."""
+        monkeypatch.setattr(get_settings(), "FSRS_LOAD_BALANCE", True)
+        now = datetime.now(timezone.utc)
+        cards = [_scheduled(sample_deck, now - timedelta(hours=1)) for _ in range(200)]
+        db.add_all(cards)
+        db.commit()
+        at = now.isoformat()
+        client.post("/flashcards/reviews/batch", json={"reviews": [
+            {"card_id": c.id, "rating": 3, "reviewed_at": at} for c in cards
+        ]})
+        db.expire_all()
+        days = [c.next_review.date() for c in db.query(Flashcard).all()]
+        counts = sorted({d: days.count(d) for d in days}.values())
+        assert len(counts) >= 3
+        assert counts[-1] - counts[0] <= 1
+
+        # The cached histogram was kept current while the batch was scheduled.
+        assert get_due_histograms().get(db, "test-user").counts == load_histogram(db, "test-user").counts
+
+    def test_fuzz_off_is_deterministic(self, client, db, sample_deck, monkeypatch):
+        monkeypatch.setattr(get_settings(), "FSRS_FUZZ_ENABLED", False)
+        now = datetime.now(timezone.utc)
+        cards = [_scheduled(sample_deck, now - timedelta(hours=1)) for _ in range(20)]
+        db.add_all(cards)
+        db.commit()
+        data = client.post("/flashcards/reviews/batch", json={"reviews": [
+            {"card_id": c.id, "rating": 3, "reviewed_at": now.isoformat()} for c in cards
+        ]}).json()
+        assert len({c["interval_days"] for c in data["cards"]}) == 1
+
+    def test_late_sync_balances_from_the_review_day(self, client, db, sample_deck, monkeypatch):
+        monkeypatch.setattr(get_settings(), "FSRS_LOAD_BALANCE", True)
+        days = []
+        load_from = DueHistogram.load_from
+        monkeypatch.setattr(DueHistogram, "load_from", lambda self, today: days.append(today) or load_from(self, today))
+        now = datetime.now(timezone.utc)
+        card = _scheduled(sample_deck, now - timedelta(days=10))
+        db.add(card)
+        db.commit()
+        reviewed_at = now - timedelta(days=4)
+        client.post("/flashcards/reviews/batch", json={"reviews": [
+            {"card_id": card.id, "rating": 3, "reviewed_at": reviewed_at.isoformat()},
+        ]})
+        assert days == [reviewed_at.date()]
@@ -0,0 +1,173 @@
+"""Tests for exam session creation and server-side completion."""
+from datetime import datetime, timezone
+
+from app.models import Question, UserProgress
+from app.models.exam_session import ExamSession, ExamSessionAnswer
+
+
+def _add_questions(db, n: int) -> list[str]:
+    ids = []
+    for i in range(n):
+        q = Question(
+            id=f"q-{i}",
+            section="Cardiology",
+            question_stem=f"Stem {i}",
+            choices={"A": "a", "B": "b"},
+            correct_answer="A",
+        )
+        db.add(q)
+        ids.append(q.id)
+    db.commit()
+    return ids
+
+
+class TestCreateSession:
+    def test_bulk_inserts_answers_in_order(self, client, db):
+        qids = ["q-3", "q-1", "q-2"]
+        res = client.post("/exam-sessions", json={"mode": "all", "total_questions": 3, "question_ids": qids})
+        assert res.status_code == 201
+        session_id = res.json()["id"]
+
+        rows = (
+            db.query(ExamSessionAnswer)
+            .filter(ExamSessionAnswer.session_id == session_id)
+            .order_by(ExamSessionAnswer.order_index)
+            .all()
+        )
+        assert [r.question_id for r in rows] == qids
+        assert all(r.flagged is False and r.correct is None for r in rows)
+
+    def test_empty_question_ids_rejected(self, client):
+        res = client.post("/exam-sessions", json={"mode": "all", "total_questions": 0, "question_ids": []})
+        assert res.status_code == 400
+
+
+class TestCompleteSession:
+    def _start(self, client, db, n=4):
+        qids = _add_questions(db, n)
+        res = client.post("/exam-sessions", json={"mode": "all", "total_questions": n, "question_ids": qids})
+        return res.json()["id"], qids
+
+    def test_scores_from_stored_answers(self, client, db):
+        session_id, qids = self._start(client, db)
+        client.patch(f"/exam-sessions/{session_id}/answers", json={"answers": [
+            {"question_id": qids[0], "answer_selected": "A", "correct": True},
+            {"question_id": qids[1], "answer_selected": "A", "correct": True},
+            {"question_id": qids[2], "answer_selected": "B", "correct": False},
+        ]})
+
+        res = client.post(f"/exam-sessions/{session_id}/complete")
+        assert res.status_code == 200
+        data = res.json()
+        assert data["status"] == "completed"
+        assert data["correct_count"] == 2
+        assert data["incorrect_count"] == 1
+        assert data["unanswered_count"] == 1
+        assert data["accuracy"] == 50.0
+        assert data["completed_at"] is not None
+        assert db.query(UserProgress).count() == 0
+
+    def test_record_progress_writes_answered_rows(self, client, db):
+        session_id, qids = self._start(client, db)
+        client.patch(f"/exam-sessions/{session_id}/answers", json={"answers": [
+            {"question_id": qids[0], "answer_selected": "A", "correct": True},
+            {"question_id": qids[1], "answer_selected": "B", "correct": False},
+        ]})
+
+        res = client.post(f"/exam-sessions/{session_id}/complete", json={"record_progress": True})
+        assert res.status_code == 200
+
+        rows = db.query(UserProgress).order_by(UserProgress.question_id).all()
+        assert [(r.question_id, r.correct, r.section, r.user_id) for r in rows] == [
+            (qids[0], True, "Cardiology", "test-user"),
+            (qids[1], False, "Cardiology", "test-user"),
+        ]
+
+    def test_complete_twice_records_progress_once(self, client, db):
+        session_id, qids = self._start(client, db)
+        client.patch(f"/exam-sessions/{session_id}/answers", json={"answers": [
+            {"question_id": qids[0], "answer_selected": "A", "correct": True},
+        ]})
+
+        first = client.post(f"/exam-sessions/{session_id}/complete", json={"record_progress": True})
+        second = client.post(f"/exam-sessions/{session_id}/complete", json={"record_progress": True})
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert db.query(UserProgress).count() == 1
+
+    def test_lost_claim_skips_scoring(self, client, db):
+        """A completion that commits between the status check and the claim wins the race."""
+        session_id, qids = self._start(client, db)
+        client.patch(f"/exam-sessions/{session_id}/answers", json={"answers": [
+            {"question_id": qids[0], "answer_selected": "A", "correct": True},
+        ]})
+        session = db.get(ExamSession, session_id)
+        session.completed_at = datetime.now(timezone.utc)
+        db.commit()
+
+        res = client.post(f"/exam-sessions/{session_id}/complete", json={"record_progress": True})
+        assert res.status_code == 200
+        assert res.json()["correct_count"] == 0
+        assert db.query(UserProgress).count() == 0
+
+    def test_unknown_session_404(self, client):
+        assert client.post("/exam-sessions/999/complete").status_code == 404
+
+    def test_autosaved_answers_flushed_before_scoring(self, client, db, monkeypatch):
+        from app.api import exam_sessions
+        from app.services.answer_buffer import AnswerBuffer
+
+        buf = AnswerBuffer()
+        monkeypatch.setattr(exam_sessions, "get_answer_buffer", lambda: buf)
+        session_id, qids = self._start(client, db)
+
+        res = client.patch(f"/exam-sessions/{session_id}/answers/{qids[0]}", json={"answer_selected": "A", "correct": True})
+        assert res.status_code == 200
+        assert res.json()["answer_selected"] == "A"
+        assert buf.pending(session_id) == 1
+
+        data = client.post(f"/exam-sessions/{session_id}/complete").json()
+        assert data["correct_count"] == 1
+        assert data["unanswered_count"] == 3
+        assert buf.pending(session_id) == 0
+
+
+class TestAutosaveRoutes:
+    def _start(self, client, db, monkeypatch, n=3):
+        from app.api import exam_sessions
+        from app.services.answer_buffer import AnswerBuffer
+
+        buf = AnswerBuffer()
+        monkeypatch.setattr(exam_sessions, "get_answer_buffer", lambda: buf)
+        qids = _add_questions(db, n)
+        res = client.post("/exam-sessions", json={"mode": "all", "total_questions": n, "question_ids": qids})
+        return buf, res.json()["id"], qids
+
+    def test_get_other_users_session_does_not_flush(self, client, db, monkeypatch):
+        buf, session_id, qids = self._start(client, db, monkeypatch)
+        client.patch(f"/exam-sessions/{session_id}/answers/{qids[0]}", json={"answer_selected": "A"})
+        db.query(ExamSession).filter_by(id=session_id).update({"user_id": "someone-else"})
+        db.commit()
+
+        assert client.get(f"/exam-sessions/{session_id}").status_code == 404
+        assert buf.pending(session_id) == 1
+
+    def test_patch_completed_flushes_and_closes_buffer(self, client, db, monkeypatch):
+        buf, session_id, qids = self._start(client, db, monkeypatch)
+        client.patch(f"/exam-sessions/{session_id}/answers/{qids[0]}", json={"answer_selected": "A", "correct": True})
+
+        res = client.patch(f"/exam-sessions/{session_id}", json={"status": "completed", "correct_count": 1})
+        assert res.status_code == 200
+        assert buf.pending(session_id) == 0
+
+        stored = db.query(ExamSessionAnswer).filter_by(session_id=session_id, question_id=qids[0]).one()
+        assert stored.answer_selected == "A"
+
+        late = client.patch(f"/exam-sessions/{session_id}/answers/{qids[1]}", json={"answer_selected": "B"})
+        assert late.status_code == 409
+
+    def test_patch_in_progress_flushes(self, client, db, monkeypatch):
+        buf, session_id, qids = self._start(client, db, monkeypatch)
+        client.patch(f"/exam-sessions/{session_id}/answers/{qids[0]}", json={"flagged": True})
+        client.patch(f"/exam-sessions/{session_id}", json={"status": "in_progress"})
+        assert buf.pending(session_id) == 0
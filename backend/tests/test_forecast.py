@@ -0,0 +1,179 @@
+"""Tests for the FSRS workload simulator and /flashcards/forecast."""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.models.flashcard import Flashcard
+from app.services.forecast import CardArrays, ForecastJobs, get_forecast_jobs, simulate
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _collection(reviewed: int, new: int) -> CardArrays:
+    rng = np.random.default_rng(7)
+    return CardArrays(
+        stability=np.concatenate([rng.uniform(1, 60, reviewed), np.zeros(new)]),
+        difficulty=np.concatenate([rng.uniform(3, 8, reviewed), np.zeros(new)]),
+        due_day=np.concatenate([rng.integers(0, 30, reviewed), np.zeros(new)]),
+        last_day=np.concatenate([-rng.uniform(1, 30, reviewed), np.zeros(new)]),
+        is_new=np.concatenate([np.zeros(reviewed, bool), np.ones(new, bool)]),
+    )
+
+
+def _run(cards, retention, **kw):
+    options = dict(days=60, new_per_day=10, review_limit=9999, max_interval=365, runs=16)
+    options.update(kw)
+    return simulate(cards, retention=retention, **options)
+
+
+class TestSimulate:
+    def test_higher_retention_costs_more_reviews(self):
+        cards = _collection(500, 200)
+        low, high = _run(cards, 0.80), _run(cards, 0.95)
+        assert high["total_reviews"] > low["total_reviews"] * 1.5
+        assert high["average_retention"] > low["average_retention"]
+
+    def test_new_cards_capped_per_day(self):
+        result = _run(_collection(0, 35), 0.9, days=5)
+        assert [d["new_cards"] for d in result["days"]] == [10, 10, 10, 5, 0]
+
+    def test_review_limit(self):
+        result = _run(_collection(300, 0), 0.9, days=3, review_limit=20)
+        assert max(d["reviews"] for d in result["days"]) <= 20
+
+    def test_seeded_runs_are_reproducible(self):
+        cards = _collection(100, 20)
+        assert _run(cards, 0.9, seed=3) == _run(cards, 0.9, seed=3)
+
+    def test_from_rows(self):
+        rows = [
+            (0.0, 0.0, "new", None, None),
+            (10.0, 5.0, "review", NOW + timedelta(days=2, hours=1), NOW - timedelta(days=8)),
+            (4.0, 6.0, "review", NOW - timedelta(days=3), NOW - timedelta(days=7)),
+        ]
+        cards = CardArrays.from_rows(rows, now=NOW)
+        assert cards.is_new.tolist() == [True, False, False]
+        assert cards.due_day.tolist() == [0, 2, 0]
+        assert cards.last_day[1] == pytest.approx(-8)
+
+    @pytest.mark.benchmark
+    def test_benchmark_vectorized(self):
+        """5k cards x 32 runs x 30 days."""
+        cards = _collection(4000, 1000)
+        start = time.perf_counter()
+        _run(cards, 0.9, days=30, runs=32)
+        print(f"\n5k cards x 32 runs x 30 days: {time.perf_counter() - start:.2f}s")
+
+
+class TestForecastJobs:
+    def test_caches_result_until_ttl(self):
+        clock = [0.0]
+        jobs = ForecastJobs(workers=1, ttl_seconds=10, max_entries=5, clock=lambda: clock[0])
+        jobs.submit("k", lambda: {"v": 1}).result(timeout=5)
+        assert jobs.get("k") == {"v": 1}
+        clock[0] = 11
+        assert jobs.get("k") is None
+        jobs.stop()
+
+    def test_failure_remembered_until_failure_ttl(self):
+        clock = [0.0]
+        jobs = ForecastJobs(workers=1, ttl_seconds=10, max_entries=5, failure_ttl_seconds=3, clock=lambda: clock[0])
+
+        def boom():
+            raise RuntimeError("x")
+
+        with pytest.raises(RuntimeError):
+            jobs.submit("k", boom).result(timeout=5)
+        assert jobs.get("k") is None and jobs.failures == 1
+        assert jobs.error("k") == "RuntimeError"
+        clock[0] = 4
+        assert jobs.error("k") is None
+        jobs.stop()
+
+
+class TestForecastRoute:
+    @pytest.fixture(autouse=True)
+    def _fresh_jobs(self):
+        get_forecast_jobs.cache_clear()
+        yield
+        get_forecast_jobs().stop()
+        get_forecast_jobs.cache_clear()
+
+    def _poll(self, client, params):
+        for _ in range(100):
+            r = client.get("/flashcards/forecast", params=params)
+            if r.status_code == 200:
+                return r.json()
+            time.sleep(0.05)
+        raise AssertionError("forecast never finished")
+
+    def test_compare_retention_targets(self, client, db, sample_deck):
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            Flashcard(
+                deck_id=sample_deck.id, user_id="test-user", front="f", back="b", state="review",
+                stability=5.0 + i, difficulty=5.0, next_review=now + timedelta(days=i % 10), last_review=now - timedelta(days=5),
+            )
+            for i in range(50)
+        ])
+        db.commit()
+        params = {"retention": [0.85, 0.95], "days": 30}
+        first = client.get("/flashcards/forecast", params=params)
+        assert first.status_code == 202
+        assert first.json()["pending"] == [0.85, 0.95]
+
+        body = self._poll(client, params)
+        assert body["status"] == "ready"
+        low, high = body["forecasts"]
+        assert (low["retention"], high["retention"]) == (0.85, 0.95)
+        assert len(low["days"]) == 30
+        assert high["total_reviews"] > low["total_reviews"]
+
+    def test_defaults_to_users_retention(self, client):
+        body = self._poll(client, {"days": 7})
+        assert [f["retention"] for f in body["forecasts"]] == [0.9]
+
+    def test_rejects_out_of_range(self, client):
+        assert client.get("/flashcards/forecast", params={"retention": 0.5}).status_code == 422
+
+    def test_failed_simulation_reported_not_resubmitted(self, client, monkeypatch):
+        from app.api import flashcards
+
+        calls = []
+
+        def boom(*args, **kwargs):
+            calls.append(1)
+            raise ValueError("bad collection")
+
+        monkeypatch.setattr(flashcards, "simulate", boom)
+        body = self._poll(client, {"days": 7})
+        assert (body["status"], body["failed"], body["forecasts"]) == ("failed", [0.9], [])
+        assert client.get("/flashcards/forecast", params={"days": 7}).json()["status"] == "failed"
+        assert len(calls) == 1
+
+    def test_poll_while_running_skips_loading_cards(self, client, monkeypatch, query_budget):
+        from app.api import flashcards
+
+        release = threading.Event()
+        monkeypatch.setattr(flashcards, "simulate", lambda *a, **kw: release.wait(5) and {})
+        assert client.get("/flashcards/forecast", params={"days": 7}).status_code == 202
+        try:
+            with query_budget(2):  # settings row + test user refresh; no card load
+                r = client.get("/flashcards/forecast", params={"days": 7})
+            assert r.json()["pending"] == [0.9]
+        finally:
+            release.set()
+
+    def test_restarted_lifespan_gets_fresh_jobs(self, client):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        first = get_forecast_jobs()
+        with TestClient(app):
+            pass
+        assert get_forecast_jobs() is not first
+        assert self._poll(client, {"days": 7})["status"] == "ready"
@@ -1,6 +1,9 @@
 """Tests for the FSRS v4.5 spaced repetition algorithm."""
 from datetime import datetime, timedelta, timezone
 
+import random
+import time
+
 import pytest
 
 from app.services.fsrs import (
@@ -21,6 +24,9 @@ from app.services.fsrs import (
     _initial_stability,
     _next_difficulty,
     _next_interval,
+    fuzz_interval,
+    fuzz_range,
+    get_scheduler,
     preview_intervals,
     retrievability,
     review,
@@ -525,3 +531,115 @@ class TestEdgeCases:
         )
         result = review(card, GOOD, NOW)
         assert result.interval_days >= 1
+
+
+class TestFuzz:
+    def test_short_intervals_not_fuzzed(self):
+        assert fuzz_range(1) == (1, 1)
+        assert fuzz_range(2) == (2, 2)
+
+    def test_range_grows_with_interval(self):
+        assert fuzz_range(5) == (4, 6)
+        assert fuzz_range(30) == (27, 33)
+        assert fuzz_range(300) == (283, 317)
+
+    def test_range_respects_max_interval(self):
+        assert fuzz_range(365, max_ivl=365)[1] == 365
+
+    def test_random_fuzz_stays_in_range_and_spreads(self):
+        rng = random.Random(1)
+        picks = {fuzz_interval(30, rng=rng) for _ in range(200)}
+        assert picks <= set(range(27, 34))
+        assert len(picks) > 3
+
+    def test_load_balance_picks_least_loaded_day(self):
+        load = {27: 5, 28: 4, 29: 9, 30: 9, 31: 1, 32: 7, 33: 3}
+        assert fuzz_interval(30, rng=random.Random(0), due_load=load.__getitem__) == 31
+
+    def test_review_applies_fuzz(self):
+        card = CardState(
+            stability=30.0, difficulty=5.0, interval_days=30,
+            repetitions=5, lapses=0, state=STATE_REVIEW,
+            next_review=NOW, last_review=NOW - timedelta(days=30),
+        )
+        plain = review(card, GOOD, NOW)
+        days = {review(card, GOOD, NOW, fuzz=True, rng=random.Random(i)).interval_days for i in range(50)}
+        lo, hi = fuzz_range(plain.interval_days)
+        assert days <= set(range(lo, hi + 1)) and len(days) > 1
+        fuzzed = review(card, GOOD, NOW, fuzz=True, rng=random.Random(3))
+        assert fuzzed.next_review == NOW + timedelta(days=fuzzed.interval_days)
+
+    def test_learning_steps_not_fuzzed(self):
+        result = review(_new_card(), AGAIN, NOW, fuzz=True, rng=random.Random(0))
+        assert result.next_review == NOW + timedelta(minutes=LEARNING_STEPS[0])
+
+
+class TestScheduler:
+    def _cards(self, n=500):
+        rng = random.Random(5)
+        cards = []
+        for i in range(n):
+            elapsed = rng.randint(1, 60)
+            cards.append(CardState(
+                stability=rng.uniform(1, 80), difficulty=rng.uniform(2, 9), interval_days=elapsed,
+                repetitions=5, lapses=i % 3, state=(STATE_REVIEW, STATE_RELEARNING, STATE_NEW)[i % 3],
+                next_review=NOW, last_review=NOW - timedelta(days=elapsed),
+            ))
+        return cards
+
+    def test_get_scheduler_is_cached_per_settings(self):
+        assert get_scheduler() is get_scheduler()
+        assert get_scheduler((1, 10), (10,), 0.85, 365) is get_scheduler((1, 10), (10,), 0.85, 365)
+        assert get_scheduler(desired_retention=0.85) is not get_scheduler()
+
+    def test_preview_matches_review_per_rating(self):
+        scheduler = get_scheduler((1, 10), (10,), 0.85, 200)
+        for card in self._cards(60):
+            preview = scheduler.preview(card, NOW)
+            for rating in (AGAIN, HARD, GOOD, EASY):
+                result = scheduler.review(card, rating, NOW)
+                assert preview[rating]["days"] == result.interval_days
+                assert preview[rating]["minutes"] == result.again_in_minutes
+                assert preview[rating]["graduated"] == result.graduated
+
+    def test_preview_many_matches_preview(self):
+        scheduler = get_scheduler()
+        cards = self._cards(30)
+        assert scheduler.preview_many(cards, NOW) == [scheduler.preview(c, NOW) for c in cards]
+
+    def test_module_preview_uses_settings(self):
+        card = self._cards(1)[0]
+        assert preview_intervals(card, NOW, desired_retention=0.8) == get_scheduler(desired_retention=0.8).preview(card, NOW)
+
+    @pytest.mark.benchmark
+    def test_benchmark_preview_vs_four_reviews(self):
+        """One shared memory computation vs four independent review() calls."""
+        cards = self._cards()
+        scheduler = get_scheduler()
+
+        def four_reviews():
+            for card in cards:
+                [review(card, rating, NOW) for rating in (AGAIN, HARD, GOOD, EASY)]
+
+        def previews():
+            for card in cards:
+                scheduler.preview(card, NOW)
+
+        print(f"\n500 cards: preview {_best_of(previews) * 1e3:.1f}ms, four reviews {_best_of(four_reviews) * 1e3:.1f}ms")
+
+    @pytest.mark.benchmark
+    def test_benchmark_preview_many_vs_per_card(self):
+        cards = self._cards()
+        scheduler = get_scheduler()
+        batch = _best_of(lambda: scheduler.preview_many(cards, NOW))
+        per_card = _best_of(lambda: [preview_intervals(c, NOW) for c in cards])
+        print(f"\n500 cards: preview_many {batch * 1e3:.1f}ms, per-card preview_intervals {per_card * 1e3:.1f}ms")
+
+
+def _best_of(fn, repeat=5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
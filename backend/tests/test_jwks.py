@@ -0,0 +1,267 @@
+"""Tests for the JWKS manager against a local stub JWKS server."""
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwk, jwt
+
+from app.services import auth
+from app.services.jwks import JWKSManager, get_jwks_manager
+from app.services.token_cache import get_verified_token_cache
+
+
+def _make_key(kid: str):
+    private = ec.generate_private_key(ec.SECP256R1())
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "ES256").to_dict()
+    public_jwk.update({"kid": kid, "alg": "ES256", "use": "sig"})
+    return private_pem, public_jwk
+
+
+class _StubJWKS:
+    def __init__(self):
+        self.keys: list[dict] = []
+        self.requests = 0
+        self.fail = False
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.fail:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                body = json.dumps({"keys": stub.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture()
+def stub():
+    s = _StubJWKS()
+    yield s
+    s.close()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestJWKSManager:
+    def test_cold_fetch_then_cached(self, stub):
+        _, k1 = _make_key("k1")
+        stub.keys = [k1]
+        mgr = JWKSManager(stub.url, clock=_Clock())
+
+        key = mgr.get_key("k1")
+        assert key is not None
+        assert mgr.get_key("k1") is key
+        assert stub.requests == 1
+        assert (mgr.stats()["key_hits"], mgr.stats()["key_misses"]) == (1, 1)
+
+    def test_stale_keys_served_while_refreshing(self, stub):
+        _, k1 = _make_key("k1")
+        stub.keys = [k1]
+        clock = _Clock()
+        mgr = JWKSManager(stub.url, ttl=100, prefetch_margin=10, clock=clock)
+        first = mgr.get_key("k1")
+
+        clock.t = 150
+        assert mgr.get_key("k1") is first
+        assert mgr.stats()["stale_served"] == 1
+        assert _wait_for(lambda: mgr.refreshes == 2)
+        assert stub.requests == 2
+
+    def test_prefetch_before_expiry(self, stub):
+        _, k1 = _make_key("k1")
+        stub.keys = [k1]
+        clock = _Clock()
+        mgr = JWKSManager(stub.url, ttl=100, prefetch_margin=10, clock=clock)
+        mgr.get_key("k1")
+
+        clock.t = 95
+        mgr.get_key("k1")
+        assert _wait_for(lambda: mgr.refreshes == 2)
+        assert mgr.stats()["stale_served"] == 0
+
+    def test_unknown_kid_refreshes_at_most_once_per_cooldown(self, stub):
+        _, k1 = _make_key("k1")
+        stub.keys = [k1]
+        clock = _Clock()
+        mgr = JWKSManager(stub.url, unknown_kid_cooldown=30, clock=clock)
+        mgr.get_key("k1")
+
+        assert mgr.get_key("rotated") is None
+        assert mgr.get_key("rotated") is None
+        assert stub.requests == 2
+
+        _, k2 = _make_key("rotated")
+        stub.keys = [k1, k2]
+        clock.t = 31
+        assert mgr.get_key("rotated") is not None
+        assert mgr.unknown_kid_refreshes == 2
+
+    def test_failed_refresh_keeps_keys(self, stub):
+        _, k1 = _make_key("k1")
+        stub.keys = [k1]
+        mgr = JWKSManager(stub.url, clock=_Clock())
+        mgr.get_key("k1")
+
+        stub.fail = True
+        with pytest.raises(Exception):
+            mgr.refresh()
+        assert mgr.get_key("k1") is not None
+        assert mgr.refresh_failures == 1
+
+    def test_background_thread_prefetches(self, stub):
+        _, k1 = _make_key("k1")
+        stub.keys = [k1]
+        mgr = JWKSManager(stub.url, ttl=0.2, prefetch_margin=0.1)
+        mgr.start()
+        try:
+            assert _wait_for(lambda: mgr.refreshes >= 2)
+        finally:
+            mgr.stop()
+
+
+class TestVerifySupabaseToken:
+    def test_es256_token_verified_with_stub(self, stub, monkeypatch):
+        private_pem, k1 = _make_key("k1")
+        stub.keys = [k1]
+        monkeypatch.setattr(
+            auth, "get_settings",
+            lambda: SimpleNamespace(SUPABASE_URL=stub.url, SUPABASE_JWT_SECRET=""),
+        )
+        exp = datetime.now(timezone.utc) + timedelta(hours=1)
+        token = jwt.encode(
+            {"sub": "sb-1", "email": "a@b.com", "aud": "authenticated", "exp": exp},
+            private_pem, algorithm="ES256", headers={"kid": "k1"},
+        )
+
+        claims = auth.verify_supabase_token(token)
+        assert claims["sub"] == "sb-1"
+        assert claims["email"] == "a@b.com"
+        assert get_jwks_manager(stub.url).refreshes == 1
+
+
+def _es256_token(private_pem, kid="k1", exp_delta=timedelta(hours=1)):
+    exp = datetime.now(timezone.utc) + exp_delta
+    return jwt.encode(
+        {"sub": "sb-1", "email": "a@b.com", "aud": "authenticated", "exp": exp},
+        private_pem, algorithm="ES256", headers={"kid": kid},
+    )
+
+
+@pytest.fixture()
+def supabase_stub(stub, monkeypatch):
+    private_pem, k1 = _make_key("k1")
+    stub.keys = [k1]
+    monkeypatch.setattr(
+        auth, "get_settings",
+        lambda: SimpleNamespace(SUPABASE_URL=stub.url, SUPABASE_JWT_SECRET=""),
+    )
+    get_verified_token_cache().clear()
+    yield private_pem
+    get_verified_token_cache().clear()
+
+
+class TestVerifiedTokenCache:
+    def test_repeat_token_served_from_cache(self, supabase_stub, monkeypatch):
+        token = _es256_token(supabase_stub)
+        first = auth.verify_supabase_token(token)
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("signature verification should be skipped")
+
+        monkeypatch.setattr(auth.jwt, "decode", _fail)
+        assert auth.verify_supabase_token(token) == first
+
+    def test_cached_claims_are_copies(self, supabase_stub):
+        token = _es256_token(supabase_stub)
+        auth.verify_supabase_token(token)["email"] = "mutated"
+        assert auth.verify_supabase_token(token)["email"] == "a@b.com"
+
+    def test_expired_entry_dropped(self, supabase_stub):
+        token = _es256_token(supabase_stub)
+        auth.verify_supabase_token(token)
+        cache = get_verified_token_cache()
+        digest, (claims, _) = next(iter(cache._entries.items()))
+        cache._entries[digest] = (claims, time.time() - 1)
+        assert cache.get(token) is None
+
+    def test_invalid_token_not_cached(self, supabase_stub):
+        assert auth.verify_supabase_token("not-a-jwt") is None
+        assert len(get_verified_token_cache()) == 0
+
+    def test_verifies_once_then_serves_same_claims(self, supabase_stub, monkeypatch):
+        token = _es256_token(supabase_stub)
+        decode = auth.jwt.decode
+        calls = []
+
+        def counting_decode(*args, **kwargs):
+            calls.append(1)
+            return decode(*args, **kwargs)
+
+        monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+        first = auth.verify_supabase_token(token)
+        assert all(auth.verify_supabase_token(token) == first for _ in range(5))
+        assert len(calls) == 1
+
+    @pytest.mark.benchmark
+    def test_benchmark_cached_vs_uncached(self, supabase_stub):
+        """Micro-benchmark: per-call auth overhead before and after the cache."""
+        token = _es256_token(supabase_stub)
+        auth.verify_supabase_token(token)  # warm JWKS
+        n = 200
+
+        start = time.perf_counter()
+        for _ in range(n):
+            get_verified_token_cache().clear()
+            auth.verify_supabase_token(token)
+        uncached = (time.perf_counter() - start) / n
+
+        start = time.perf_counter()
+        for _ in range(n):
+            auth.verify_supabase_token(token)
+        cached = (time.perf_counter() - start) / n
+
+        print(f"\nverify_supabase_token: uncached {uncached * 1e6:.0f}us, cached {cached * 1e6:.0f}us")
@@ -0,0 +1,73 @@
+"""Tests for the metrics registry and /metrics endpoint."""
+from app.config import get_settings
+from app.services.metrics import Registry, cache_family
+
+
+class TestRegistry:
+    def test_counter_renders_labels(self):
+        reg = Registry()
+        c = reg.counter("things_total", "Things.", ("kind",))
+        c.inc("a")
+        c.inc("a", amount=2)
+        c.inc('b"q')
+        text = reg.render()
+        assert "# TYPE things_total counter" in text
+        assert 'things_total{kind="a"} 3' in text
+        assert 'things_total{kind="b\\"q"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        reg = Registry()
+        h = reg.histogram("lat_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+        h.observe(0.05, "x")
+        h.observe(0.1, "x")
+        h.observe(0.5, "x")
+        h.observe(3.0, "x")
+        text = reg.render()
+        assert 'lat_seconds_bucket{op="x",le="0.1"} 2' in text
+        assert 'lat_seconds_bucket{op="x",le="1"} 3' in text
+        assert 'lat_seconds_bucket{op="x",le="+Inf"} 4' in text
+        assert 'lat_seconds_count{op="x"} 4' in text
+        assert h.count("x") == 4
+
+    def test_collectors_and_hit_ratio(self):
+        reg = Registry()
+        reg.register_collector(lambda: cache_family({"q": (3, 1), "empty": (0, 0)}))
+        text = reg.render()
+        assert 'cache_hit_ratio{cache="q"} 0.75' in text
+        assert 'cache_hit_ratio{cache="empty"} 0' in text
+
+
+class TestMetricsEndpoint:
+    def test_scrape_includes_route_templates_and_caches(self, client, sample_deck):
+        client.get(f"/flashcards/decks/{sample_deck.id}/cards")
+        res = client.get("/metrics")
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/plain")
+        body = res.text
+        assert 'route="/flashcards/decks/{deck_id}/cards"' in body
+        assert f"/flashcards/decks/{sample_deck.id}/cards" not in body
+        assert 'cache_hit_ratio{cache="questions"}' in body
+        assert 'cache_hit_ratio{cache="jwks"}' in body
+        assert "threadpool_max_threads" in body
+        assert "db_pool_checked_out" in body
+
+    def test_scheduler_config_hits_and_misses(self, client, sample_deck):
+        url = f"/flashcards/decks/{sample_deck.id}/review"
+        client.get(url)
+        client.get(url)
+        body = client.get("/metrics").text
+        assert 'cache_misses_total{cache="scheduler_config"} 1' in body
+        assert 'cache_hits_total{cache="scheduler_config"} 1' in body
+        for name in ("due_histogram", "forecast", "review_undo"):
+            assert f'cache_hit_ratio{{cache="{name}"}}' in body
+
+    def test_token_required_when_configured(self, client, monkeypatch):
+        monkeypatch.setattr(get_settings(), "METRICS_TOKEN", "s3cret")
+        assert client.get("/metrics").status_code == 401
+        res = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert res.status_code == 200
+
+    def test_hidden_in_production_without_token(self, client, monkeypatch):
+        monkeypatch.setattr(get_settings(), "ENVIRONMENT", "production")
+        monkeypatch.setattr(get_settings(), "METRICS_TOKEN", "")
+        assert client.get("/metrics").status_code == 404
@@ -0,0 +1,107 @@
+"""Tests for pool configuration, checkout wait telemetry and liveness pings."""
+import asyncio
+import sqlite3
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.config import get_settings
+from app.db import pool as db_pool
+from app.db.instrumentation import track_queries
+from app.db.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool, ping, pool_options, run_liveness
+from app.db.session import create_db_engine
+from app.middleware.query_stats import QueryStatsMiddleware
+
+PG_URL = "postgresql+psycopg2://u:p@localhost/step2ck"
+
+
+def _timed_sqlite_engine():
+    return create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+
+
+class TestPoolOptions:
+    def test_settings_drive_pool(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "DB_POOL_SIZE", 4)
+        monkeypatch.setattr(get_settings(), "DB_MAX_OVERFLOW", 2)
+        engine = create_db_engine(PG_URL)
+        assert isinstance(engine.pool, TimedQueuePool)
+        assert (engine.pool.size(), engine.pool._max_overflow) == (4, 2)
+        assert engine.pool._pre_ping is True
+
+    def test_async_uses_timed_async_pool(self):
+        assert pool_options("postgresql+asyncpg://u@h/db", is_async=True)["poolclass"] is TimedAsyncAdaptedQueuePool
+
+    def test_pgbouncer_mode(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "DB_PGBOUNCER_MODE", True)
+        assert isinstance(create_db_engine(PG_URL).pool, NullPool)
+        options = pool_options("postgresql+asyncpg://u@h/db", is_async=True)
+        assert options["poolclass"] is NullPool
+        args = options["connect_args"]
+        assert args["statement_cache_size"] == 0 and args["prepared_statement_cache_size"] == 0
+        assert args["prepared_statement_name_func"]() != args["prepared_statement_name_func"]()
+
+    def test_sqlite_keeps_defaults(self):
+        assert pool_options("sqlite:///./x.db") == {}
+
+
+class TestPoolWait:
+    def test_checkout_wait_recorded_per_request(self):
+        engine = _timed_sqlite_engine()
+        held = engine.connect()
+
+        def release():
+            time.sleep(0.05)
+            held.close()
+
+        threading.Thread(target=release).start()
+        with track_queries() as stats:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        assert stats.checkouts == 1
+        assert stats.pool_wait_ms >= 40
+
+    def test_server_timing_includes_pool(self):
+        engine = _timed_sqlite_engine()
+
+        async def handler(request):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return PlainTextResponse("ok")
+
+        app = QueryStatsMiddleware(Starlette(routes=[Route("/", handler)]))
+        timing = TestClient(app).get("/").headers["server-timing"]
+        assert "pool;dur=" in timing
+
+
+class TestLiveness:
+    def test_ping_reports_dead_database(self):
+        def creator():
+            raise sqlite3.OperationalError("server closed the connection unexpectedly")
+
+        assert ping(create_engine("sqlite://", creator=creator)) is False
+
+    def test_run_liveness_pings_each_interval(self, monkeypatch):
+        monkeypatch.setattr(db_pool, "_pooled_server", lambda engine: True)
+        engine = _timed_sqlite_engine()
+        pings = []
+        event.listen(engine, "before_cursor_execute", lambda *a: pings.append(a[2]))
+
+        async def run():
+            task = asyncio.create_task(run_liveness(lambda: [engine], lambda: [], 0.01))
+            await asyncio.sleep(0.08)
+            task.cancel()
+
+        asyncio.run(run())
+        assert len(pings) >= 3 and set(pings) == {"SELECT 1"}
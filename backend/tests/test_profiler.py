@@ -0,0 +1,113 @@
+"""Tests for the opt-in request profiler and admin profile endpoints."""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.profiler import (
+    SamplingProfiler,
+    list_profiles,
+    resolve_profile,
+    sign_profile_token,
+    verify_profile_token,
+    write_profile,
+)
+
+
+def _busy_loop(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+class TestSamplingProfiler:
+    def test_captures_running_thread(self):
+        worker = threading.Thread(target=_busy_loop, args=(0.2,), name="busy")
+        worker.start()
+        time.sleep(0.02)  # let the worker enter the loop
+        profiler = SamplingProfiler()
+        profiler.sample()
+        worker.join()
+
+        assert profiler.samples == 1
+        assert any(stack.startswith("busy;") and "_busy_loop" in stack for stack in profiler.stacks)
+        assert all(";" in stack for stack in profiler.stacks)
+
+    def test_background_sampler_stops(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        _busy_loop(0.02)
+        profiler.stop()
+        assert profiler._thread is None
+
+
+class TestProfileToken:
+    def test_round_trip_and_expiry(self):
+        token = sign_profile_token("s3cret", 2_000)
+        assert verify_profile_token("s3cret", token, now=1_000)
+        assert not verify_profile_token("s3cret", token, now=3_000)
+        assert not verify_profile_token("other", token, now=1_000)
+        assert not verify_profile_token("s3cret", "2000.deadbeef", now=1_000)
+        assert not verify_profile_token("", token, now=1_000)
+
+
+class TestProfileFiles:
+    def test_write_list_and_prune(self, tmp_path):
+        from collections import Counter
+
+        for i in range(3):
+            write_profile(str(tmp_path), "GET", "/flashcards/stats", 12.5, Counter({f"a;b{i}": 2}), max_files=2)
+        files = list_profiles(str(tmp_path))
+        assert len(files) == 2
+        assert files[0].name.startswith("GET_flashcards_stats_")
+        assert resolve_profile(str(tmp_path), files[0].name).read_text().endswith(" 2\n")
+        assert resolve_profile(str(tmp_path), "../secret.collapsed") is None
+
+
+async def _slow_app(scope, receive, send):
+    _busy_loop(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class TestProfilingMiddleware:
+    def test_only_signed_requests_are_profiled(self, tmp_path):
+        client = TestClient(ProfilingMiddleware(_slow_app, output_dir=str(tmp_path), secret="s3cret", interval_ms=1))
+        client.get("/slow")
+        client.get("/slow", headers={"X-Profile-Request": sign_profile_token("s3cret", int(time.time()) - 1)})
+        assert list_profiles(str(tmp_path)) == []
+
+        token = sign_profile_token("s3cret", int(time.time()) + 60)
+        assert client.get("/slow", headers={"X-Profile-Request": token}).status_code == 200
+        [profile] = list_profiles(str(tmp_path))
+        assert profile.name.startswith("GET_unmatched_")
+        assert "_busy_loop" in resolve_profile(str(tmp_path), profile.name).read_text()
+
+    def test_sample_rate(self, tmp_path):
+        client = TestClient(ProfilingMiddleware(_slow_app, output_dir=str(tmp_path), sample_rate=1.0, interval_ms=1))
+        client.get("/slow")
+        assert len(list_profiles(str(tmp_path))) == 1
+
+
+class TestAdminProfilesEndpoint:
+    def test_requires_admin(self, client, monkeypatch):
+        monkeypatch.setattr(get_settings(), "ADMIN_EMAILS", [])
+        assert client.get("/admin/profiles").status_code == 403
+
+    def test_list_and_download(self, client, monkeypatch, tmp_path, test_user):
+        from collections import Counter
+
+        monkeypatch.setattr(get_settings(), "ADMIN_EMAILS", [test_user.email.upper()])
+        monkeypatch.setattr(get_settings(), "PROFILING_OUTPUT_DIR", str(tmp_path))
+        path = write_profile(str(tmp_path), "GET", "/exams/generate", 800, Counter({"main;f": 3}))
+
+        listed = client.get("/admin/profiles").json()
+        assert [p["name"] for p in listed] == [path.name]
+        res = client.get(f"/admin/profiles/{path.name}")
+        assert res.status_code == 200
+        assert res.text == "main;f 3\n"
+        assert client.get("/admin/profiles/missing.collapsed").status_code == 404
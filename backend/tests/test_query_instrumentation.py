@@ -0,0 +1,109 @@
+"""Tests for per-request SQL instrumentation and query budgets."""
+import logging
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.db import instrumentation
+from app.db.instrumentation import QueryStats, track_queries
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models.exam_session import ExamSession, ExamSessionAnswer
+from app.models.flashcard import Flashcard, FlashcardDeck
+
+
+class TestQueryStats:
+    def test_track_queries_records_statements(self, db):
+        instrumentation.install()
+        with track_queries() as stats:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+        assert stats.count == 2
+        assert stats.slowest_statement in ("SELECT 1", "SELECT 2")
+        assert stats.total_ms >= stats.slowest_ms > 0
+
+    def test_nothing_recorded_outside_context(self, db):
+        instrumentation.install()
+        with track_queries() as stats:
+            pass
+        db.execute(text("SELECT 1"))
+        assert stats.count == 0
+
+    def test_repeated_statements(self):
+        stats = QueryStats()
+        for _ in range(3):
+            stats.record("SELECT a", 1.0)
+        stats.record("SELECT b", 1.0)
+        assert stats.repeated(3) == [("SELECT a", 3)]
+
+
+class TestMiddleware:
+    def _app(self, db, repeats: int):
+        def handler(request):
+            for _ in range(repeats):
+                db.execute(text("SELECT 1"))
+            return PlainTextResponse("ok")
+
+        instrumentation.install()
+        app = Starlette(routes=[Route("/", handler)])
+        return QueryStatsMiddleware(app, n_plus_one_threshold=5)
+
+    def test_server_timing_header(self, db):
+        res = TestClient(self._app(db, 2)).get("/")
+        timing = res.headers["server-timing"]
+        assert 'desc="2 queries"' in timing
+        assert "app;dur=" in timing
+
+    def test_n_plus_one_logged(self, db, caplog):
+        with caplog.at_level(logging.WARNING, logger="app.sql"):
+            TestClient(self._app(db, 6)).get("/")
+        assert any("Possible N+1" in r.message for r in caplog.records)
+
+    def test_api_responses_carry_server_timing(self, client):
+        res = client.get("/exam-sessions")
+        assert "server-timing" in res.headers
+
+
+class TestQueryBudgets:
+    def test_budget_exceeded_fails(self, db, query_budget):
+        with pytest.raises(AssertionError, match="Query budget exceeded"):
+            with query_budget(1):
+                db.execute(text("SELECT 1"))
+                db.execute(text("SELECT 2"))
+
+    def test_list_decks_constant_queries(self, client, db, query_budget):
+        now = datetime.now(timezone.utc)
+        for i in range(5):
+            deck = FlashcardDeck(user_id="test-user", name=f"Deck {i}")
+            db.add(deck)
+            db.flush()
+            db.add(Flashcard(deck_id=deck.id, user_id="test-user", front="Q", back="A"))
+            db.add(Flashcard(deck_id=deck.id, user_id="test-user", front="Q", back="A",
+                             state="review", next_review=now))
+        db.commit()
+
+        # user reload + decks + one grouped count query, independent of deck count
+        with query_budget(3):
+            res = client.get("/flashcards/decks")
+        decks = res.json()
+        assert len(decks) == 5
+        assert all(d["new_count"] == 1 and d["due_count"] == 1 for d in decks)
+
+    def test_generation_sources_constant_queries(self, client, db, query_budget):
+        for i in range(5):
+            s = ExamSession(user_id="test-user", mode="all", total_questions=1,
+                            incorrect_count=1, status="completed")
+            db.add(s)
+            db.flush()
+            db.add(ExamSessionAnswer(session_id=s.id, question_id=f"q-{i}", correct=False))
+        db.commit()
+
+        with query_budget(8):
+            res = client.get("/flashcards/generation-sources")
+        sessions = res.json()["sessions"]
+        assert len(sessions) == 5
+        assert all(s["incorrect_count"] == 1 for s in sessions)
@@ -0,0 +1,168 @@
+"""Tests for read-replica routing, health checks and read-your-writes pinning."""
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db import replicas
+from app.db.base import Base
+from app.db.replicas import ReplicaRouter
+from app.models import User, UserProgress
+from app.models.question import Question
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _flaky_factory(down: set):
+    """Engines whose connect fails while their url is in down."""
+    def factory(url):
+        def creator():
+            if url in down:
+                raise sqlite3.OperationalError("unable to open database file")
+            return sqlite3.connect(":memory:", check_same_thread=False)
+
+        return create_engine("sqlite://", creator=creator, poolclass=NullPool)
+
+    return factory
+
+
+def _replica_db(path, section: str, correct: int, total: int):
+    """A replica file holding one question and total progress rows for test-user."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(engine)() as s:
+        s.add(User(id="test-user", email="test@example.com"))
+        s.add(Question(id="rq", section=section, question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        s.add_all([
+            UserProgress(user_id="test-user", question_id="rq", section=section, correct=i < correct)
+            for i in range(total)
+        ])
+        s.commit()
+    engine.dispose()
+    return f"sqlite:///{path}"
+
+
+class TestReplicaRouter:
+    def test_round_robin(self):
+        router = ReplicaRouter(["r1", "r2"], engine_factory=_flaky_factory(set()))
+        assert [router.choose().url for _ in range(4)] == ["r1", "r2", "r1", "r2"]
+
+    def test_health_check_skips_and_restores_replicas(self):
+        down = {"r1"}
+        router = ReplicaRouter(["r1", "r2"], engine_factory=_flaky_factory(down))
+        router.check_health()
+        assert {router.choose().url for _ in range(4)} == {"r2"}
+        down.add("r2")
+        router.check_health()
+        assert router.choose() is None
+        assert router.stats()["primary_reads"] == 1
+        down.clear()
+        router.check_health()
+        assert {router.choose().url for _ in range(4)} == {"r1", "r2"}
+
+    def test_pinned_user_reads_primary_until_expiry(self):
+        clock = FakeClock()
+        router = ReplicaRouter(["r1"], pin_seconds=5, engine_factory=_flaky_factory(set()), clock=clock)
+        router.pin("u1")
+        assert router.choose("u1") is None
+        assert router.choose("u2") is not None
+        assert router.choose(None) is not None
+        clock.now += 6
+        assert router.choose("u1") is not None
+
+
+class TestWriteDetection:
+    @pytest.fixture()
+    def router(self, monkeypatch):
+        router = ReplicaRouter(["r1"], engine_factory=_flaky_factory(set()))
+        monkeypatch.setattr(replicas, "get_replica_router", lambda: router)
+        return router
+
+    def test_commit_with_writes_pins_session_user(self, db, test_user, router):
+        db.info["user_id"] = test_user.id
+        db.add(Question(id="w1", section="Renal", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.commit()
+        assert router.is_pinned(test_user.id)
+
+    def test_read_only_commit_does_not_pin(self, db, test_user, router):
+        db.info["user_id"] = test_user.id
+        db.query(Question).all()
+        db.commit()
+        assert not router.is_pinned(test_user.id)
+
+    def test_sqlite_writer_jobs_pin_the_session_user(self, db, test_user, router, monkeypatch):
+        from app.db import sqlite
+        from app.db.sqlite import SQLiteWriter, run_write
+
+        writer = SQLiteWriter(db.get_bind())
+        monkeypatch.setattr(sqlite, "get_sqlite_writer", lambda: writer)
+        db.info["user_id"] = test_user.id
+        try:
+            run_write(db, lambda w: w.add(
+                Question(id="w3", section="Renal", question_stem="s", choices={"A": "a"}, correct_answer="A")
+            ))
+        finally:
+            writer.stop()
+        assert router.is_pinned(test_user.id)
+
+    def test_rolled_back_write_does_not_pin(self, db, test_user, router):
+        db.info["user_id"] = test_user.id
+        db.add(Question(id="w2", section="Renal", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.flush()
+        db.rollback()
+        db.commit()
+        assert not router.is_pinned(test_user.id)
+
+
+class TestReplicaRoutes:
+    @pytest.fixture()
+    def router(self, tmp_path, monkeypatch):
+        url = _replica_db(tmp_path / "replica.db", section="Replica", correct=1, total=3)
+        router = ReplicaRouter(
+            [url],
+            async_engine_factory=lambda u: create_async_engine(u.replace("sqlite", "sqlite+aiosqlite"), poolclass=NullPool),
+        )
+        monkeypatch.setattr("app.api.deps.get_replica_router", lambda: router)
+        yield router
+        router.replicas[0].engine.dispose()
+
+    def test_catalog_and_analytics_read_replica(self, client, router):
+        assert client.get("/questions/sections").json() == {"sections": ["Replica"]}
+        stats = client.get("/progress/stats").json()
+        assert (stats["total"], stats["correct"]) == (3, 1)
+        assert client.get("/progress/time-stats").status_code == 200
+        assert client.get("/flashcards/stats").status_code == 200
+        assert router.stats()["replica_reads"] == 4
+
+    def test_pinned_user_reads_own_writes_from_primary(self, client, db, router):
+        db.add(Question(id="pq", section="Primary", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.add(UserProgress(user_id="test-user", question_id="pq", section="Primary", correct=True))
+        db.commit()
+        router.pin("test-user")
+        stats = client.get("/progress/stats").json()
+        assert (stats["total"], stats["correct"]) == (1, 1)
+        # Catalog reads are not per-user, so they still go to the replica.
+        assert client.get("/questions/sections").json() == {"sections": ["Replica"]}
+
+    def test_unreachable_replica_falls_back_to_primary(self, client, db, tmp_path, monkeypatch):
+        router = ReplicaRouter(
+            [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"],
+            async_engine_factory=lambda u: create_async_engine(u.replace("sqlite", "sqlite+aiosqlite"), poolclass=NullPool),
+        )
+        monkeypatch.setattr("app.api.deps.get_replica_router", lambda: router)
+        db.add(Question(id="pq", section="Primary", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.commit()
+        assert client.get("/questions/sections").json() == {"sections": ["Primary"]}  # async read
+        assert router.stats()["healthy"] == 0
+        router.replicas[0].healthy = True
+        assert client.get("/progress/time-stats").status_code == 200  # sync read
+        assert router.stats()["healthy"] == 0
@@ -0,0 +1,85 @@
+"""Tests for direct-to-bytes JSON responses."""
+import json
+import time
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.responses import FastJSONResponse, json_bytes_response
+from app.models.flashcard import Flashcard
+from app.models.question import Question
+from app.models.user_progress import UserProgress
+from app.schemas.flashcard import FlashcardResponse
+
+
+def _add_cards(db, deck, n):
+    db.add_all([
+        Flashcard(deck_id=deck.id, user_id="test-user", front=f"Front {i} é", back=f"Back {i}", tags="cardio")
+        for i in range(n)
+    ])
+    deck.card_count = n
+    db.commit()
+
+
+class TestFastJSONResponse:
+    def test_renders_compact_utf8(self):
+        body = FastJSONResponse({"a": [1, "é"], 2: None}).body
+        assert json.loads(body) == {"a": [1, "é"], "2": None}
+
+    def test_json_bytes_response_matches_default_encoding(self, db, sample_deck):
+        _add_cards(db, sample_deck, 3)
+        cards = db.query(Flashcard).all()
+        fast = json.loads(json_bytes_response(list[FlashcardResponse], cards).body)
+        default = jsonable_encoder([FlashcardResponse.model_validate(c) for c in cards])
+        assert fast == default
+
+
+class TestListEndpoints:
+    def test_list_cards(self, client, db, sample_deck):
+        _add_cards(db, sample_deck, 5)
+        res = client.get(f"/flashcards/decks/{sample_deck.id}/cards")
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "application/json"
+        data = res.json()
+        assert len(data) == 5
+        assert data[0]["front"] == "Front 0 é"
+        assert data[0]["state"] == "new"
+
+    def test_list_questions_and_progress(self, client, db):
+        db.add(Question(id="q1", section="Cardiology", question_stem="S", choices={"A": "a"}, correct_answer="A"))
+        db.add(UserProgress(user_id="test-user", question_id="q1", section="Cardiology", correct=True))
+        db.commit()
+
+        questions = client.get("/questions").json()
+        assert questions["total"] == 1
+        assert questions["items"][0]["choices"] == {"A": "a"}
+        assert client.get("/progress").json() == [{"question_id": "q1", "correct": True, "section": "Cardiology"}]
+
+    def test_1k_card_listing_bytes_match_default_encoder(self, db, sample_deck):
+        _add_cards(db, sample_deck, 1000)
+        cards = db.query(Flashcard).all()
+        default = JSONResponse(jsonable_encoder([FlashcardResponse.model_validate(c) for c in cards])).body
+        assert json_bytes_response(list[FlashcardResponse], cards).body == default
+
+    @pytest.mark.benchmark
+    def test_benchmark_1k_card_listing(self, db, sample_deck):
+        """Serialization cost of a 1k-card deck: dict + jsonable_encoder + json.dumps vs bytes."""
+        _add_cards(db, sample_deck, 1000)
+        cards = db.query(Flashcard).all()
+
+        def default_path():
+            models = [FlashcardResponse.model_validate(c) for c in cards]
+            return json.dumps(jsonable_encoder(models)).encode()
+
+        def fast_path():
+            return json_bytes_response(list[FlashcardResponse], cards).body
+
+        fast_path()
+        timings = {}
+        for name, fn in (("default", default_path), ("fast", fast_path)):
+            start = time.perf_counter()
+            for _ in range(5):
+                fn()
+            timings[name] = (time.perf_counter() - start) / 5
+        print(f"\n1k cards: default {timings['default'] * 1e3:.1f}ms, bytes {timings['fast'] * 1e3:.1f}ms")
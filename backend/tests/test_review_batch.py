@@ -0,0 +1,79 @@
+"""Tests for POST /flashcards/reviews/batch."""
+from datetime import datetime, timedelta, timezone
+
+from app.models.flashcard import Flashcard
+from app.models.flashcard_review_log import FlashcardReviewLog
+from app.services.fsrs import CardState
+from app.services.fsrs import review as fsrs_review
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+class TestReviewBatch:
+    def test_replays_in_time_order(self, client, db, sample_card):
+        t0 = datetime.now(timezone.utc) - timedelta(days=3)
+        times = [t0, t0 + timedelta(minutes=2), t0 + timedelta(days=2)]
+        # Sent out of order; the server sorts by reviewed_at.
+        body = {"reviews": [
+            {"card_id": sample_card.id, "rating": 3, "reviewed_at": _iso(times[2])},
+            {"card_id": sample_card.id, "rating": 1, "reviewed_at": _iso(times[0]), "duration_ms": 900},
+            {"card_id": sample_card.id, "rating": 3, "reviewed_at": _iso(times[1])},
+        ]}
+        r = client.post("/flashcards/reviews/batch", json=body)
+        assert r.status_code == 200
+        data = r.json()
+        assert (data["applied"], data["skipped"]) == (3, [])
+
+        expected = CardState(0.0, 0.0, 0, 0, 0, "new", None, None)
+        for rating, at in zip((1, 3, 3), times):
+            res = fsrs_review(expected, rating, at)
+            expected = CardState(
+                res.stability, res.difficulty, res.interval_days, res.repetitions, res.lapses,
+                res.state, res.next_review, res.last_review, res.learning_step,
+            )
+        card = data["cards"][0]
+        assert (card["state"], card["repetitions"]) == (expected.state, 3)
+        assert card["stability"] == expected.stability
+
+        db.expire_all()
+        stored = db.get(Flashcard, sample_card.id)
+        assert (stored.state, stored.repetitions, stored.stability) == (expected.state, 3, expected.stability)
+        logs = db.query(FlashcardReviewLog).order_by(FlashcardReviewLog.reviewed_at).all()
+        assert [(l.rating, l.state) for l in logs] == [(1, "new"), (3, "learning"), (3, "learning")]
+        assert logs[0].duration_ms == 900
+
+    def test_skips_unknown_and_stale_reviews(self, client, db, sample_card):
+        now = datetime.now(timezone.utc)
+        sample_card.state = "review"
+        sample_card.stability = 5.0
+        sample_card.difficulty = 5.0
+        sample_card.last_review = now - timedelta(days=1)
+        db.commit()
+        body = {"reviews": [
+            {"card_id": sample_card.id, "rating": 3, "reviewed_at": _iso(now - timedelta(days=2))},
+            {"card_id": 99999, "rating": 3, "reviewed_at": _iso(now)},
+            {"card_id": sample_card.id, "rating": 4, "reviewed_at": _iso(now + timedelta(days=5))},
+        ]}
+        data = client.post("/flashcards/reviews/batch", json=body).json()
+        assert (data["applied"], data["skipped"]) == (1, [0, 1])
+        # The future timestamp is clamped to now.
+        last = datetime.fromisoformat(data["cards"][0]["last_review"])
+        assert last <= datetime.now(timezone.utc)
+
+    def test_rejects_bad_rating(self, client, sample_card):
+        body = {"reviews": [{"card_id": sample_card.id, "rating": 7, "reviewed_at": _iso(datetime.now(timezone.utc))}]}
+        assert client.post("/flashcards/reviews/batch", json=body).status_code == 422
+
+    def test_constant_queries(self, client, db, sample_deck, query_budget):
+        cards = [Flashcard(deck_id=sample_deck.id, user_id="test-user", front=f"f{i}", back="b") for i in range(25)]
+        db.add_all(cards)
+        db.commit()
+        at = _iso(datetime.now(timezone.utc) - timedelta(minutes=5))
+        body = {"reviews": [{"card_id": c.id, "rating": 3, "reviewed_at": at} for c in cards]}
+        # test user refresh + cards + settings + due histogram + UPDATE + log INSERT, for any batch size
+        with query_budget(6):
+            data = client.post("/flashcards/reviews/batch", json=body).json()
+        assert data["applied"] == 25
+
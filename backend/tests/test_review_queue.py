@@ -0,0 +1,133 @@
+"""Tests for the server-side review queue and its routes."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.flashcard import Flashcard
+from app.models.flashcard_review_log import FlashcardReviewLog
+from app.models.flashcard_settings import FlashcardSettings
+from app.services.review_queue import InvalidCursor, build_queue, decode_cursor, encode_cursor
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _card(deck, front, state="new", due=None, **kw):
+    return Flashcard(deck_id=deck.id, user_id="test-user", front=front, back="b", state=state, next_review=due, **kw)
+
+
+@pytest.fixture()
+def mixed_deck(db, sample_deck):
+    cards = [
+        _card(sample_deck, "new-1"),
+        _card(sample_deck, "review-fresh", "review", NOW - timedelta(hours=1), stability=2.0, last_review=NOW - timedelta(days=10)),
+        _card(sample_deck, "learning-late", "learning", NOW - timedelta(minutes=1)),
+        _card(sample_deck, "review-overdue", "review", NOW - timedelta(days=5), stability=50.0, last_review=NOW - timedelta(days=55)),
+        _card(sample_deck, "relearning-early", "relearning", NOW - timedelta(minutes=30)),
+        _card(sample_deck, "new-2"),
+        _card(sample_deck, "review-later", "review", NOW + timedelta(days=2)),
+        _card(sample_deck, "learning-later", "learning", NOW + timedelta(minutes=10)),
+        _card(sample_deck, "new-suspended", suspended=True),
+    ]
+    db.add_all(cards)
+    db.commit()
+    return {c.front: c.id for c in cards}
+
+
+def _fronts(ids, by_front):
+    names = {v: k for k, v in by_front.items()}
+    return [names[i] for i in ids]
+
+
+class TestBuildQueue:
+    def test_order_learning_reviews_new(self, db, mixed_deck):
+        queue = build_queue(db, "test-user", now=NOW)
+        assert _fronts(queue.ids, mixed_deck) == [
+            "relearning-early", "learning-late", "review-overdue", "review-fresh", "new-1", "new-2",
+        ]
+        assert queue.counts() == {"learning": 2, "review": 2, "new": 2}
+
+    def test_review_order_by_retrievability(self, db, mixed_deck):
+        queue = build_queue(db, "test-user", review_order="retrievability", now=NOW)
+        # review-fresh: 10 days on S=2 is less retrievable than 55 days on S=50.
+        assert _fronts(queue.review, mixed_deck) == ["review-fresh", "review-overdue"]
+
+    def test_daily_limits_subtract_todays_reviews(self, db, mixed_deck):
+        db.add(FlashcardSettings(user_id="test-user", daily_new_cards=2, daily_review_limit=2))
+        db.add_all([
+            FlashcardReviewLog(user_id="test-user", card_id=mixed_deck["new-1"], rating=3, state="new", reviewed_at=NOW - timedelta(hours=2)),
+            FlashcardReviewLog(user_id="test-user", card_id=mixed_deck["review-later"], rating=3, state="review", reviewed_at=NOW - timedelta(hours=1)),
+            # Yesterday's reviews don't count.
+            FlashcardReviewLog(user_id="test-user", card_id=mixed_deck["new-2"], rating=3, state="new", reviewed_at=NOW - timedelta(days=1)),
+        ])
+        db.commit()
+        queue = build_queue(db, "test-user", now=NOW)
+        assert queue.counts() == {"learning": 2, "review": 1, "new": 1}
+        assert _fronts(queue.review + queue.new, mixed_deck) == ["review-overdue", "new-1"]
+
+    def test_random_new_order_is_stable_for_the_day(self, db, sample_deck):
+        db.add(FlashcardSettings(user_id="test-user", new_card_order="random", daily_new_cards=50))
+        db.add_all([_card(sample_deck, f"n{i}") for i in range(30)])
+        db.commit()
+        first = build_queue(db, "test-user", now=NOW).new
+        assert first == build_queue(db, "test-user", now=NOW + timedelta(hours=3)).new
+        assert len(first) == 30 and first != sorted(first)
+        assert build_queue(db, "test-user", now=NOW + timedelta(days=1)).new != first
+
+    def test_deck_filter(self, db, mixed_deck, sample_deck):
+        assert build_queue(db, "test-user", deck_id=sample_deck.id + 1, now=NOW).ids == []
+
+
+class TestCursor:
+    def test_round_trip(self):
+        ids = list(range(1000, 1500))
+        cursor = encode_cursor(ids)
+        assert decode_cursor(cursor) == ids
+        assert len(cursor) < len(",".join(map(str, ids)))
+
+    def test_garbage_rejected(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor")
+
+
+class TestQueueRoutes:
+    def test_queue_pages_through_cards(self, client, db, sample_deck):
+        now = datetime.now(timezone.utc)
+        db.add_all([_card(sample_deck, f"c{i}", "review", now - timedelta(days=30 - i)) for i in range(5)])
+        db.commit()
+        body = client.get("/flashcards/queue", params={"page_size": 2}).json()
+        assert body["counts"] == {"learning": 0, "review": 5, "new": 0}
+        assert [c["front"] for c in body["cards"]] == ["c0", "c1"]
+        first = body["cards"][0]
+        expected = client.get(f"/flashcards/cards/{first['id']}/intervals").json()
+        assert body["intervals"][str(first["id"])] == expected
+        fronts = []
+        cursor = body["next_cursor"]
+        while cursor:
+            page = client.get("/flashcards/queue/cards", params={"cursor": cursor, "limit": 2}).json()
+            fronts += [c["front"] for c in page["cards"]]
+            cursor = page["next_cursor"]
+        assert fronts == ["c2", "c3", "c4"]
+
+    def test_bad_cursor_is_400(self, client):
+        assert client.get("/flashcards/queue/cards", params={"cursor": "%%%"}).status_code == 400
+
+    def test_review_logs_and_consumes_new_allowance(self, client, db, sample_deck):
+        db.add(FlashcardSettings(user_id="test-user", daily_new_cards=1))
+        db.add_all([_card(sample_deck, "a"), _card(sample_deck, "b")])
+        db.commit()
+        queue = client.get("/flashcards/queue").json()
+        assert queue["counts"]["new"] == 1
+        client.post(f"/flashcards/cards/{queue['ids'][0]}/review", json={"rating": 3, "duration_ms": 4200})
+        log = db.query(FlashcardReviewLog).one()
+        assert (log.state, log.rating, log.duration_ms) == ("new", 3, 4200)
+        assert client.get("/flashcards/queue").json()["counts"]["new"] == 0
+
+    def test_deck_review_uses_queue(self, client, db, sample_deck):
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            _card(sample_deck, "new"),
+            _card(sample_deck, "learning", "learning", now - timedelta(minutes=1)),
+        ])
+        db.commit()
+        r = client.get(f"/flashcards/decks/{sample_deck.id}/review")
+        assert [c["front"] for c in r.json()] == ["learning", "new"]
@@ -0,0 +1,104 @@
+"""Tests for review undo: the per-session stack and the review-log fallback."""
+import pytest
+
+from app.models.flashcard import Flashcard
+from app.models.flashcard_review_log import FlashcardReviewLog
+from app.services.review_undo import UndoBuffer, UndoEntry, get_undo_buffer, restore_fields
+
+FSRS_FIELDS = ("state", "stability", "difficulty", "repetitions", "lapses", "learning_step", "next_review", "last_review")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_buffer():
+    get_undo_buffer.cache_clear()
+    yield
+    get_undo_buffer.cache_clear()
+
+
+def _fields(card: dict) -> tuple:
+    return tuple(card[f] for f in FSRS_FIELDS)
+
+
+def _review(client, card_id, rating, session_id="s1"):
+    return client.post(f"/flashcards/cards/{card_id}/review", json={"rating": rating, "session_id": session_id}).json()["card"]
+
+
+class TestUndoBuffer:
+    def test_ring_keeps_last_depth_entries(self):
+        buffer = UndoBuffer(depth=2, max_sessions=10)
+        for i in range(3):
+            buffer.push(("u", "s"), UndoEntry(i, i, {}, None))
+        assert [buffer.pop(("u", "s")).log_id for _ in range(2)] == [2, 1]
+        assert buffer.pop(("u", "s")) is None
+
+    def test_sessions_evicted_lru(self):
+        buffer = UndoBuffer(depth=5, max_sessions=2)
+        buffer.push(("u", "a"), UndoEntry(1, 1, {}, None))
+        buffer.push(("u", "b"), UndoEntry(2, 2, {}, None))
+        buffer.push(("u", "a"), UndoEntry(3, 3, {}, None))
+        buffer.push(("u", "c"), UndoEntry(4, 4, {}, None))
+        assert buffer.pop(("u", "b")) is None
+        assert buffer.pop(("u", "a")).log_id == 3
+
+
+class TestUndoRoute:
+    def test_stacked_undo_restores_each_prior_state(self, client, db, sample_card, query_budget):
+        original = client.get(f"/flashcards/decks/{sample_card.deck_id}/cards").json()[0]
+        after_first = _review(client, sample_card.id, 1)
+        _review(client, sample_card.id, 3)
+
+        # Served from the stack: DELETE the log row + UPDATE ... RETURNING (+ test user refresh).
+        with query_budget(3):
+            r = client.post("/flashcards/reviews/undo", params={"session_id": "s1"})
+        assert r.status_code == 200
+        assert _fields(r.json()) == _fields(after_first)
+        undone = client.post("/flashcards/reviews/undo", params={"session_id": "s1"}).json()
+        assert _fields(undone) == _fields(original)
+        assert db.query(FlashcardReviewLog).count() == 0
+        assert client.post("/flashcards/reviews/undo", params={"session_id": "s1"}).status_code == 404
+
+    def test_falls_back_to_review_log(self, client, db, sample_card):
+        original = client.get(f"/flashcards/decks/{sample_card.deck_id}/cards").json()[0]
+        _review(client, sample_card.id, 4)
+        get_undo_buffer.cache_clear()  # e.g. a restart, or another worker
+        undone = client.post("/flashcards/reviews/undo", params={"session_id": "s1"}).json()
+        assert _fields(undone) == _fields(original)
+        db.expire_all()
+        assert db.get(Flashcard, sample_card.id).state == "new"
+
+    def test_stale_stack_entry_skipped(self, client, db, sample_card):
+        _review(client, sample_card.id, 1)
+        _review(client, sample_card.id, 3)
+        # The latest review was already undone elsewhere; its entry is dropped.
+        latest = db.query(FlashcardReviewLog).order_by(FlashcardReviewLog.id.desc()).first()
+        db.query(Flashcard).filter_by(id=sample_card.id).update(restore_fields(latest.snapshot))
+        db.delete(latest)
+        db.commit()
+        undone = client.post("/flashcards/reviews/undo", params={"session_id": "s1"}).json()
+        assert (undone["state"], undone["repetitions"]) == ("new", 0)
+
+    def test_undo_after_batch_uses_log(self, client, db, sample_card):
+        _review(client, sample_card.id, 1)
+        client.post("/flashcards/reviews/batch", json={"session_id": "s1", "reviews": [
+            {"card_id": sample_card.id, "rating": 3, "reviewed_at": "2999-01-01T00:00:00Z"},
+        ]})
+        undone = client.post("/flashcards/reviews/undo", params={"session_id": "s1"}).json()
+        assert (undone["state"], undone["repetitions"]) == ("learning", 1)
+
+    def test_sessions_are_separate(self, client, sample_card):
+        _review(client, sample_card.id, 3, session_id="a")
+        assert client.post("/flashcards/reviews/undo", params={"session_id": "b"}).status_code == 404
+
+    def test_reviewed_again_elsewhere_conflicts(self, client, db, sample_card):
+        _review(client, sample_card.id, 3, session_id="a")
+        later = _review(client, sample_card.id, 4, session_id="b")
+        r = client.post("/flashcards/reviews/undo", params={"session_id": "a"})
+        assert r.status_code == 409
+        db.expire_all()
+        assert db.get(Flashcard, sample_card.id).repetitions == later["repetitions"]
+        assert db.query(FlashcardReviewLog).count() == 2
+
+        # Undoing b first makes a's review the card's latest again.
+        assert client.post("/flashcards/reviews/undo", params={"session_id": "b"}).status_code == 200
+        undone = client.post("/flashcards/reviews/undo", params={"session_id": "a"}).json()
+        assert (undone["state"], undone["repetitions"]) == ("new", 0)
@@ -0,0 +1,57 @@
+"""Tests for the compiled per-user scheduler config cache."""
+from app.models.flashcard_settings import FlashcardSettings
+from app.services.fsrs import get_scheduler
+from app.services.scheduler_config import (
+    DEFAULT_CONFIG,
+    SchedulerConfig,
+    SchedulerConfigs,
+    get_scheduler_configs,
+    parse_steps,
+)
+
+
+def _settings_queries(stats) -> int:
+    return sum(n for stmt, n in stats.statements.items() if "FROM flashcard_settings" in stmt)
+
+
+class TestSchedulerConfig:
+    def test_parse_steps(self):
+        assert parse_steps("1, 10,x,,30") == (1, 10, 30)
+
+    def test_compile_shares_schedulers(self):
+        row = FlashcardSettings(
+            user_id="u", learning_steps="2,20", relearning_steps="15", desired_retention=0.85,
+            max_interval_days=200, daily_new_cards=5, daily_review_limit=50, new_card_order="random",
+        )
+        config = SchedulerConfig.compile(row)
+        assert config.scheduler is get_scheduler((2, 20), (15,), 0.85, 200)
+        assert (config.daily_new_cards, config.daily_review_limit, config.new_card_order) == (5, 50, "random")
+        assert SchedulerConfig.compile(None) is DEFAULT_CONFIG
+
+    def test_cache_ttl_and_lru(self, db):
+        clock = [0.0]
+        cache = SchedulerConfigs(max_users=1, ttl_seconds=10, clock=lambda: clock[0])
+        first = cache.get(db, "u1")
+        assert cache.get(db, "u1") is first and cache.loads == 1
+        clock[0] = 11
+        cache.get(db, "u1")
+        cache.get(db, "u2")
+        assert len(cache) == 1 and cache.loads == 3
+
+
+class TestSchedulerConfigRoutes:
+    def test_reviews_skip_settings_query_once_cached(self, client, sample_card, query_budget):
+        client.get(f"/flashcards/cards/{sample_card.id}/intervals")
+        with query_budget(20) as stats:
+            client.post(f"/flashcards/cards/{sample_card.id}/review", json={"rating": 3})
+            client.get(f"/flashcards/cards/{sample_card.id}/intervals")
+            client.get("/flashcards/queue")
+        assert _settings_queries(stats) == 0
+
+    def test_patch_settings_replaces_cached_config(self, client, sample_card):
+        before = client.get(f"/flashcards/cards/{sample_card.id}/intervals").json()
+        assert before["good"]["minutes"] == 10
+        client.patch("/flashcards/settings", json={"learning_steps": "1,25"})
+        assert get_scheduler_configs().get(None, "test-user").scheduler.learning_steps == [1, 25]
+        after = client.get(f"/flashcards/cards/{sample_card.id}/intervals").json()
+        assert after["good"]["minutes"] == 25
@@ -0,0 +1,191 @@
+"""Tests for the SQLite performance profile and the single-writer queue."""
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.db import sqlite as sqlite_db
+from app.db.session import create_async_db_engine, create_db_engine
+from app.db.sqlite import SQLiteWriter
+from app.models import Question
+from app.models.exam_session import ExamSession
+
+
+def _pragmas(conn) -> dict:
+    names = ("journal_mode", "synchronous", "busy_timeout", "temp_store", "cache_size", "mmap_size")
+    return {n: conn.exec_driver_sql(f"PRAGMA {n}").scalar() for n in names}
+
+
+class TestSQLiteProfile:
+    def test_file_database_gets_profile(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+        with engine.connect() as conn:
+            pragmas = _pragmas(conn)
+        engine.dispose()
+        assert pragmas == {
+            "journal_mode": "wal",
+            "synchronous": 1,  # NORMAL
+            "busy_timeout": 5000,
+            "temp_store": 2,  # MEMORY
+            "cache_size": -65536,
+            "mmap_size": 256 * 1024 * 1024,
+        }
+
+    def test_memory_database_skips_wal(self):
+        engine = create_db_engine("sqlite://")
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "memory"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+
+    def test_async_engine_gets_profile(self, tmp_path):
+        async def read():
+            engine = create_async_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+            try:
+                async with engine.connect() as conn:
+                    return (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+            finally:
+                await engine.dispose()
+
+        assert asyncio.run(read()) == "wal"
+
+
+class TestSQLiteWriter:
+    @pytest.fixture()
+    def writer(self, db, db_path):
+        writer = SQLiteWriter(create_db_engine(f"sqlite:///{db_path}", pool_size=1, max_overflow=0))
+        yield writer
+        writer.stop()
+        writer.engine.dispose()
+
+    def test_runs_jobs_and_commits(self, writer, db):
+        def add(w):
+            w.add(Question(id="wq", section="Renal", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+            return "done"
+
+        assert writer.run(add) == "done"
+        assert db.get(Question, "wq") is not None
+        assert writer.stats()["jobs"] == 1
+
+    def test_failed_job_rolls_back_and_raises(self, writer, db):
+        def fail(w):
+            w.add(Question(id="bad", section="Renal", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+            w.flush()
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            writer.run(fail)
+        assert db.get(Question, "bad") is None
+        assert writer.stats()["failures"] == 1
+
+    def test_exam_routes_write_through_writer(self, client, db, writer, monkeypatch):
+        monkeypatch.setattr(sqlite_db, "get_sqlite_writer", lambda: writer)
+        db.add(Question(id="q-0", section="Cardiology", question_stem="s", choices={"A": "a"}, correct_answer="A"))
+        db.commit()
+        res = client.post("/exam-sessions", json={"mode": "all", "total_questions": 1, "question_ids": ["q-0"]})
+        assert res.status_code == 201
+        session_id = res.json()["id"]
+        client.patch(f"/exam-sessions/{session_id}/answers", json={"answers": [
+            {"question_id": "q-0", "answer_selected": "A", "correct": True},
+        ]})
+        done = client.post(f"/exam-sessions/{session_id}/complete", json={"record_progress": True})
+        assert done.status_code == 200
+        assert (done.json()["status"], done.json()["correct_count"]) == ("completed", 1)
+        assert writer.stats()["jobs"] == 2
+        assert db.get(ExamSession, session_id).status == "completed"
+
+
+class TestConcurrentWrites:
+    THREADS = 8
+    WRITES = 40
+
+    def _hammer(self, write) -> tuple[float, int]:
+        """THREADS threads x WRITES small write transactions; returns (seconds, lock errors)."""
+        errors = []
+
+        def worker(n):
+            for i in range(self.WRITES):
+                try:
+                    write(n * self.WRITES + i)
+                except OperationalError:
+                    errors.append(1)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(self.THREADS)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start, len(errors)
+
+    def test_writer_serializes_concurrent_writes(self, tmp_path):
+        writer = SQLiteWriter(create_db_engine(f"sqlite:///{tmp_path / 'app.db'}", pool_size=1, max_overflow=0))
+        writer.run(lambda w: w.execute(text("CREATE TABLE submissions (id INTEGER PRIMARY KEY)")))
+        active, overlaps = [], []
+
+        def write(i):
+            def job(w):
+                active.append(i)
+                overlaps.append(len(active))
+                w.execute(text("INSERT INTO submissions (id) VALUES (:id)"), {"id": i})
+                time.sleep(0.0005)
+                active.remove(i)
+
+            writer.run(job)
+
+        try:
+            _, errors = self._hammer(write)
+            pragmas = writer.run(lambda w: _pragmas(w.connection()))
+            rows = writer.run(lambda w: w.execute(text("SELECT count(*) FROM submissions")).scalar())
+        finally:
+            writer.stop()
+            writer.engine.dispose()
+        assert (pragmas["journal_mode"], pragmas["synchronous"]) == ("wal", 1)
+        assert errors == 0 and max(overlaps) == 1
+        assert rows == self.THREADS * self.WRITES
+
+    @pytest.mark.benchmark
+    def test_benchmark_default_vs_tuned_writer(self, tmp_path):
+        """Default journal + racing connections vs WAL/NORMAL + single writer."""
+        ddl = "CREATE TABLE submissions (id INTEGER PRIMARY KEY, payload TEXT)"
+        insert = text("INSERT INTO submissions (id, payload) VALUES (:id, 'x')")
+
+        baseline = create_engine(
+            f"sqlite:///{tmp_path / 'baseline.db'}",
+            connect_args={"check_same_thread": False, "timeout": 1},
+            pool_size=self.THREADS,
+        )
+        with baseline.begin() as conn:
+            conn.execute(text(ddl))
+
+        def baseline_write(i):
+            with baseline.begin() as conn:
+                conn.execute(text("SELECT count(*) FROM submissions")).scalar()
+                conn.execute(insert, {"id": i})
+
+        tuned = SQLiteWriter(create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}", pool_size=1, max_overflow=0))
+        tuned.run(lambda w: w.execute(text(ddl)))
+
+        def tuned_write(i):
+            def job(w):
+                w.execute(text("SELECT count(*) FROM submissions")).scalar()
+                w.execute(insert, {"id": i})
+
+            tuned.run(job)
+
+        try:
+            baseline_s, baseline_errors = self._hammer(baseline_write)
+            tuned_s, tuned_errors = self._hammer(tuned_write)
+            rows = tuned.run(lambda w: w.execute(text("SELECT count(*) FROM submissions")).scalar())
+        finally:
+            tuned.stop()
+            tuned.engine.dispose()
+            baseline.dispose()
+        assert tuned_errors == 0
+        assert rows == self.THREADS * self.WRITES
+        print(
+            f"\n{self.THREADS}x{self.WRITES} writes: racing connections {baseline_s:.2f}s "
+            f"({baseline_errors} lock errors), single writer {tuned_s:.2f}s"
+        )
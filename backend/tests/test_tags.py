@@ -0,0 +1,82 @@
+"""Tests for the flashcard/note tag index, tag filters and facets."""
+from app.models.flashcard import Flashcard, FlashcardDeck
+from app.models.tag import FlashcardTag, NoteTag
+from app.services.tags import parse_tags
+
+
+def _card(db, deck, front="f"):
+    card = Flashcard(deck_id=deck.id, user_id="test-user", front=front, back="b")
+    db.add(card)
+    db.commit()
+    return card
+
+
+def _tag(client, card_id, tags):
+    return client.patch(f"/flashcards/cards/{card_id}", json={"tags": tags}).json()
+
+
+def test_parse_tags():
+    assert parse_tags(" cardio,murmurs ,, cardio,heart sounds") == ["cardio", "murmurs", "heart sounds"]
+    assert parse_tags(None) == []
+
+
+class TestCardTags:
+    def test_update_syncs_index_and_canonicalizes(self, client, db, sample_deck):
+        card = _card(db, sample_deck)
+        assert _tag(client, card.id, "cardio,  murmurs,cardio")["tags"] == "cardio, murmurs"
+        assert {t.tag for t in db.query(FlashcardTag)} == {"cardio", "murmurs"}
+        assert _tag(client, card.id, "")["tags"] is None
+        assert db.query(FlashcardTag).count() == 0
+
+    def test_filter_requires_every_tag(self, client, db, sample_deck):
+        a, b, _ = (_card(db, sample_deck, f) for f in "abc")
+        _tag(client, a.id, "cardio, murmurs")
+        _tag(client, b.id, "cardio")
+        url = f"/flashcards/decks/{sample_deck.id}/cards"
+        assert [c["front"] for c in client.get(url, params={"tag": "cardio"}).json()] == ["a", "b"]
+        assert [c["front"] for c in client.get(url, params={"tag": ["cardio", "murmurs"]}).json()] == ["a"]
+        assert len(client.get(url).json()) == 3
+
+    def test_facets_in_one_query(self, client, db, sample_deck, query_budget):
+        other = FlashcardDeck(user_id="test-user", name="Other", card_count=0)
+        db.add(other)
+        db.commit()
+        a, b = _card(db, sample_deck), _card(db, sample_deck)
+        c = _card(db, other)
+        _tag(client, a.id, "cardio, murmurs")
+        _tag(client, b.id, "cardio")
+        _tag(client, c.id, "renal")
+        with query_budget(2):  # GROUP BY + test user refresh
+            facets = client.get("/flashcards/tags").json()
+        assert facets == [{"tag": "cardio", "count": 2}, {"tag": "murmurs", "count": 1}, {"tag": "renal", "count": 1}]
+        scoped = client.get("/flashcards/tags", params={"deck_id": other.id}).json()
+        assert scoped == [{"tag": "renal", "count": 1}]
+
+    def test_deletes_drop_tag_rows(self, client, db, sample_deck):
+        a, b = _card(db, sample_deck), _card(db, sample_deck)
+        _tag(client, a.id, "x")
+        _tag(client, b.id, "y")
+        client.delete(f"/flashcards/cards/{a.id}")
+        assert [t.tag for t in db.query(FlashcardTag)] == ["y"]
+        client.delete(f"/flashcards/decks/{sample_deck.id}")
+        assert db.query(FlashcardTag).count() == 0
+
+    def test_bulk_tag_updates_index(self, client, db, sample_deck):
+        cards = [_card(db, sample_deck) for _ in range(3)]
+        client.post("/flashcards/cards/bulk", json={"action": "tag", "card_ids": [c.id for c in cards], "tag": "renal"})
+        assert client.get("/flashcards/tags").json() == [{"tag": "renal", "count": 3}]
+        client.post("/flashcards/cards/bulk", json={"action": "untag", "filter": {"tag": "renal"}, "tag": "renal"})
+        assert client.get("/flashcards/tags").json() == []
+
+
+class TestNoteTags:
+    def test_create_filter_facets_delete(self, client, db):
+        first = client.post("/notes", json={"title": "a", "tags": "cardio, murmurs"}).json()
+        client.post("/notes", json={"title": "b", "tags": "cardio"})
+        assert [n["title"] for n in client.get("/notes", params={"tag": "murmurs"}).json()] == ["a"]
+        assert client.get("/notes/tags").json() == [{"tag": "cardio", "count": 2}, {"tag": "murmurs", "count": 1}]
+
+        client.patch(f"/notes/{first['id']}", json={"tags": "renal"})
+        assert {t.tag for t in db.query(NoteTag).filter(NoteTag.note_id == first["id"])} == {"renal"}
+        client.delete(f"/notes/{first['id']}")
+        assert client.get("/notes/tags").json() == [{"tag": "cardio", "count": 1}]
@@ -0,0 +1,152 @@
+"""Tests for the verified-token user cache and Supabase profile sync."""
+from sqlalchemy import event
+
+from app.api import deps
+from app.config import get_settings
+from app.models.user import User
+from app.services.auth import get_or_create_user_from_supabase
+from app.services.token_cache import TokenCache
+
+
+class _Clock:
+    def __init__(self, t: float = 1_000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+class TestTokenCache:
+    def test_hit_within_ttl(self):
+        cache = TokenCache(ttl_seconds=60, max_entries=10, clock=_Clock())
+        cache.put("tok", "user-1")
+        assert cache.get("tok") == "user-1"
+        assert cache.hits == 1
+
+    def test_expires_after_ttl(self):
+        clock = _Clock()
+        cache = TokenCache(ttl_seconds=60, max_entries=10, clock=clock)
+        cache.put("tok", "user-1")
+        clock.t += 61
+        assert cache.get("tok") is None
+        assert len(cache) == 0
+
+    def test_never_outlives_token_exp(self):
+        clock = _Clock()
+        cache = TokenCache(ttl_seconds=600, max_entries=10, clock=clock)
+        cache.put("tok", "user-1", token_exp=clock.t + 5)
+        clock.t += 6
+        assert cache.get("tok") is None
+
+    def test_already_expired_token_not_cached(self):
+        clock = _Clock()
+        cache = TokenCache(ttl_seconds=600, max_entries=10, clock=clock)
+        cache.put("tok", "user-1", token_exp=clock.t - 1)
+        assert len(cache) == 0
+
+    def test_bounded_lru(self):
+        cache = TokenCache(ttl_seconds=60, max_entries=2, clock=_Clock())
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+
+    def test_disabled_with_zero_ttl(self):
+        cache = TokenCache(ttl_seconds=0, max_entries=10)
+        cache.put("tok", "user-1")
+        assert cache.get("tok") is None
+
+
+class TestSupabaseProfileSync:
+    def test_unchanged_profile_does_not_write(self, db):
+        db.add(User(email="a@b.com", supabase_id="sb-1", display_name="A", avatar_url="x"))
+        db.commit()
+
+        updates: list[str] = []
+        event.listen(
+            db.get_bind(), "before_cursor_execute",
+            lambda conn, cur, stmt, *a: updates.append(stmt) if stmt.startswith("UPDATE") else None,
+        )
+        user = get_or_create_user_from_supabase(db, "sb-1", "a@b.com", "A", "x")
+        db.commit()
+        assert user.email == "a@b.com"
+        assert updates == []
+
+    def test_changed_profile_is_synced(self, db):
+        db.add(User(email="a@b.com", supabase_id="sb-1", display_name="A"))
+        db.commit()
+        user = get_or_create_user_from_supabase(db, "sb-1", "new@b.com", "B", None)
+        db.commit()
+        db.refresh(user)
+        assert user.email == "new@b.com"
+        assert user.display_name == "B"
+
+
+class TestResolveToken:
+    def _setup(self, db, monkeypatch):
+        monkeypatch.setattr(get_settings(), "SUPABASE_JWT_SECRET", "secret")
+        cache = TokenCache(ttl_seconds=60, max_entries=10)
+        monkeypatch.setattr(deps, "get_user_cache", lambda: cache)
+        calls = []
+
+        def fake_verify(token):
+            calls.append(token)
+            return {"sub": "sb-1", "email": "cached@example.com", "exp": 10**10}
+
+        monkeypatch.setattr(deps, "verify_supabase_token", fake_verify)
+        return calls
+
+    def test_repeat_token_skips_verification(self, db, monkeypatch):
+        calls = self._setup(db, monkeypatch)
+        first = deps._resolve_token("tok", db)
+        second = deps._resolve_token("tok", db)
+        assert first.id == second.id
+        assert calls == ["tok"]
+
+    def test_plan_change_visible_on_cache_hit(self, db, monkeypatch):
+        self._setup(db, monkeypatch)
+        user = deps._resolve_token("tok", db)
+        assert user.plan == "free"
+
+        db.query(User).filter(User.id == user.id).update({"plan": "pro"})
+        db.commit()
+        db.expire_all()
+        assert deps._resolve_token("tok", db).plan == "pro"
+
+    def test_deleted_user_falls_back_to_verification(self, db, monkeypatch):
+        calls = self._setup(db, monkeypatch)
+        user = deps._resolve_token("tok", db)
+        db.delete(user)
+        db.commit()
+
+        again = deps._resolve_token("tok", db)
+        assert calls == ["tok", "tok"]
+        assert again.email == "cached@example.com"
+        assert again.id != user.id
+
+
+class TestClaimsCache:
+    def test_held_until_token_exp_without_ttl(self):
+        clock = _Clock()
+        cache = TokenCache(ttl_seconds=None, max_entries=10, clock=clock)
+        cache.put("tok", {"sub": "a"}, token_exp=clock.t + 3600)
+        clock.t += 3599
+        assert cache.get("tok") == {"sub": "a"}
+        clock.t += 2
+        assert cache.get("tok") is None
+
+    def test_no_exp_not_cached_without_ttl(self):
+        cache = TokenCache(ttl_seconds=None, max_entries=10, clock=_Clock())
+        cache.put("tok", {"sub": "a"})
+        assert len(cache) == 0
+
+    def test_values_are_copies(self):
+        cache = TokenCache(ttl_seconds=60, max_entries=10, clock=_Clock())
+        claims = {"sub": "a"}
+        cache.put("tok", claims)
+        claims["sub"] = "mutated"
+        cache.get("tok")["sub"] = "mutated"
+        assert cache.get("tok") == {"sub": "a"}